@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""Benchmarks of the edge pipeline hot path.
+
+Every case runs in a fresh process, so peak RSS belongs to that case alone.
+Results are compared with benchmarks/baselines.json. The run fails when
+any case has lost more throughput than the tolerance allows, or when its
+p99 latency, peak RSS or import time has grown by more than that. The
+startup case also fails on its own when importing the app exceeds the
+import budget or loads a dependency that should only load on first use.
+
+Usage:
+    python benchmarks/run.py                    # run all cases and compare
+    python benchmarks/run.py --filter chain     # only cases containing "chain"
+    python benchmarks/run.py --save-baseline    # record this machine's baseline
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import yaml
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+EDGE_APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(EDGE_APP_DIR))
+
+BASELINE_FILE = Path(__file__).with_name("baselines.json")
+CONFIG_FILE = EDGE_APP_DIR / "config.yaml"
+
+# Compared metrics and whether higher values are better
+COMPARED_METRICS = {"samples_per_s": True, "p99_us": False, "peak_rss_mb": False, "import_ms": False}
+
+# Dependencies that importing edge_app must not load
+LAZY_MODULES = ("scipy", "pandas", "yaml")
+# Maximum time to import edge_app, in milliseconds
+IMPORT_BUDGET_MS = 750
+
+SIGNAL_DURATION_S = 60
+BASE_TIME = 1.7e9
+
+
+def load_config(window_s: Optional[float] = None) -> Dict:
+    with open(CONFIG_FILE) as f:
+        config = yaml.safe_load(f)
+    if window_s is not None:
+        config["analysis"]["window_size_s"] = window_s
+    return config
+
+
+def channel_samples(config: Dict, duration_s: float, seed: int = 0) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Generate walking signals per channel as (timestamps, values)."""
+    from sensors.simulator import CHANNEL_UUIDS, SyntheticSource
+
+    slipper = config["sensors"]["slipper"]
+    source = SyntheticSource("gait", slipper["pressure"]["num_sensors"], seed=seed)
+    samples = {}
+    for channel in CHANNEL_UUIDS:
+        rate = slipper[channel]["sample_rate_hz"]
+        t = np.arange(int(duration_s * rate)) / rate
+        samples[channel] = (BASE_TIME + t, source.samples(channel, t).astype(np.float32))
+    return samples
+
+
+def sensor_events(config: Dict, duration_s: float = SIGNAL_DURATION_S) -> List:
+    """Per-sample sensor events in arrival order."""
+    from processing.records import SensorSample
+
+    events = []
+    for channel, (timestamps, values) in channel_samples(config, duration_s).items():
+        for timestamp, row in zip(timestamps.tolist(), values.tolist()):
+            events.append(SensorSample(channel, timestamp, row))
+    events.sort(key=lambda event: event.timestamp)
+    return events
+
+
+def sensor_blocks(config: Dict, duration_s: float = SIGNAL_DURATION_S) -> List:
+    """Micro-batched blocks in arrival order, as the SampleBatcher delivers them."""
+    from processing.records import SampleBlock
+
+    block_samples = config["sensors"]["slipper"]["batching"]["max_samples"]
+    blocks = []
+    for channel, (timestamps, values) in channel_samples(config, duration_s).items():
+        for start in range(0, len(timestamps), block_samples):
+            blocks.append(SampleBlock(
+                channel,
+                timestamps[start:start + block_samples],
+                values[start:start + block_samples]
+            ))
+    blocks.sort(key=lambda block: block.timestamps[-1])
+    return blocks
+
+
+def fused_frames(config: Dict) -> List:
+    from processing.analysis_chain import AnalysisChain
+
+    chain = AnalysisChain(config)
+    return [frame for event in sensor_events(config) for frame in chain.process(event)]
+
+
+def measure(setup: Callable[[], Tuple[Callable, Sequence]], samples_per_item: Callable = len) -> Dict:
+    """Time a function over a workload, then trace its allocations on a fresh copy.
+
+    The allocation figure sums, over the items, how far traced memory rose
+    above its level before the item; memory freed and allocated again
+    within one item counts once.
+
+    Args:
+        setup: Returns (function, items); called once per pass for fresh state
+        samples_per_item: Number of samples an item represents
+
+    Returns:
+        Throughput, per-sample latency percentiles and allocation figures
+    """
+    fn, items = setup()
+    counts = np.array([samples_per_item(item) for item in items], dtype=np.float64)
+    latencies = np.empty(len(items), dtype=np.float64)
+
+    start = time.perf_counter_ns()
+    for i, item in enumerate(items):
+        t0 = time.perf_counter_ns()
+        fn(item)
+        latencies[i] = time.perf_counter_ns() - t0
+    total_ns = time.perf_counter_ns() - start
+
+    # Latency per sample of the item it arrived in
+    per_sample_us = latencies / counts / 1000
+    samples = float(counts.sum())
+
+    fn, items = setup()
+    tracemalloc.start()
+    allocated = 0
+    traced_peak = 0
+    for item in items:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(item)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+        traced_peak = max(traced_peak, peak)
+    tracemalloc.stop()
+
+    return {
+        "samples": int(samples),
+        "samples_per_s": round(samples / (total_ns / 1e9), 1),
+        "p50_us": round(float(np.percentile(per_sample_us, 50)), 2),
+        "p99_us": round(float(np.percentile(per_sample_us, 99)), 2),
+        "alloc_bytes_per_sample": round(allocated / samples, 1),
+        "traced_peak_kb": round(traced_peak / 1024, 1)
+    }
+
+
+def one_sample(_) -> int:
+    return 1
+
+
+def block_samples(block) -> int:
+    return len(block.timestamps)
+
+
+def bench_processor(window_s: float) -> Dict:
+    from processing.etl import DataProcessor
+
+    config = load_config(window_s)
+    events = sensor_events(config)
+
+    def setup():
+        processor = DataProcessor(
+            window_size=int(window_s * config["sensors"]["slipper"]["accelerometer"]["sample_rate_hz"]),
+            num_pressure_sensors=config["sensors"]["slipper"]["pressure"]["num_sensors"]
+        )
+        return processor.process, events
+
+    return measure(setup, one_sample)
+
+
+def bench_processor_block(window_s: float) -> Dict:
+    from processing.etl import DataProcessor
+
+    config = load_config(window_s)
+    blocks = sensor_blocks(config)
+
+    def setup():
+        processor = DataProcessor(
+            window_size=int(window_s * config["sensors"]["slipper"]["accelerometer"]["sample_rate_hz"]),
+            num_pressure_sensors=config["sensors"]["slipper"]["pressure"]["num_sensors"]
+        )
+        return processor.process_block, blocks
+
+    return measure(setup, block_samples)
+
+
+def bench_gait(window_s: float) -> Dict:
+    from processing.gait_analysis import GaitAnalyzer
+
+    config = load_config(window_s)
+    frames = fused_frames(config)
+
+    def setup():
+        return GaitAnalyzer(config["analysis"]).analyze, frames
+
+    return measure(setup, one_sample)
+
+
+def bench_anomaly(window_s: float) -> Dict:
+    from processing.anomaly_detection import AnomalyDetector
+    from processing.gait_analysis import GaitAnalyzer
+
+    config = load_config(window_s)
+    analyzer = GaitAnalyzer(config["analysis"])
+    pairs = [(frame, analyzer.analyze(frame)) for frame in fused_frames(config)]
+
+    def setup():
+        detector = AnomalyDetector(config["analysis"])
+        return lambda pair: detector.detect(*pair), pairs
+
+    return measure(setup, one_sample)
+
+
+def bench_chain(window_s: float, batched: bool) -> Dict:
+    """The full process and analyze path of one device."""
+    from processing.analysis_chain import AnalysisChain
+
+    config = load_config(window_s)
+    items = sensor_blocks(config) if batched else sensor_events(config)
+
+    def setup():
+        return AnalysisChain(config).run, items
+
+    return measure(setup, block_samples if batched else one_sample)
+
+
+def bench_metrics_overhead(window_s: float, calls: int = 200000) -> Dict:
+    """Cost of the stage timings per sample of AnalysisChain.run.
+
+    The difference between runs with monitoring on and off is within the
+    run-to-run noise, so the cost is built from its parts instead: the
+    clock reads and histogram updates the chain made per sample, times
+    their measured unit costs.
+    """
+    from processing.analysis_chain import AnalysisChain
+    from processing.metrics import LatencyHistogram
+
+    config = load_config(window_s)
+    events = sensor_events(config)
+    chain = AnalysisChain(config)
+    start = time.perf_counter_ns()
+    for event in events:
+        chain.run(event)
+    elapsed_ns = time.perf_counter_ns() - start
+
+    loop_ns = timeit.timeit(lambda: None, number=calls) / calls * 1e9
+    clock_ns = timeit.timeit(time.perf_counter_ns, number=calls) / calls * 1e9 - loop_ns
+    histogram = LatencyHistogram()
+    observe_ns = timeit.timeit(lambda: histogram.observe(5000), number=calls) / calls * 1e9 - loop_ns
+
+    # process(): two clock reads and one update per call; analyze(): three and two per frame
+    timings = chain.timings
+    clock_reads = 2 * timings["processor"].count + 3 * timings["gait"].count
+    updates = timings["processor"].count + timings["gait"].count + timings["anomaly"].count
+    overhead_ns = clock_reads * clock_ns + updates * observe_ns
+
+    return {
+        "samples": len(events),
+        "samples_per_s": round(len(events) / (elapsed_ns / 1e9), 1),
+        "clock_ns": round(clock_ns, 1),
+        "observe_ns": round(observe_ns, 1),
+        "overhead_ns_per_sample": round(overhead_ns / len(events), 1),
+        "overhead_ratio": round(overhead_ns / elapsed_ns, 4)
+    }
+
+
+def bench_app(devices: int, duration_s: float = 20) -> Dict:
+    """End to end through GosplEdgeApp with simulated devices at maximum speed."""
+    import math
+    import simulate
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        config = load_config()
+        config["logging"].update(level="WARNING", file=str(Path(data_dir) / "edge_app.log"))
+        config_path = Path(data_dir) / "config.yaml"
+        config_path.write_text(yaml.safe_dump(config))
+
+        args = argparse.Namespace(
+            config=str(config_path), devices=devices, scenario="gait", rate=0,
+            speed=math.inf, duration=duration_s, fall_at=10.0, replay=None,
+            data_dir=data_dir, seed=0
+        )
+        summary = asyncio.run(simulate.simulate(args))
+    return {"samples": summary["samples"], "samples_per_s": summary["samples_per_s"]}
+
+
+def python_run(code: str, *args: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter from the edge-app directory."""
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code, *args],
+        cwd=EDGE_APP_DIR, capture_output=True, text=True, check=True
+    )
+
+
+def bench_startup(runs: int = 5) -> Dict:
+    """Time to import the app and load its config, each in a fresh interpreter."""
+    from storage.config_snapshot import snapshot_path
+
+    import_us = []
+    for _ in range(runs):
+        report = python_run("import edge_app", importtime=True).stderr.splitlines()
+        # Cumulative microseconds are the second column of the edge_app line
+        line = next(line for line in reversed(report) if line.rstrip().endswith("| edge_app"))
+        import_us.append(int(line.split("|")[1]))
+
+    loaded = python_run(
+        "import sys, edge_app; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))",
+        *LAZY_MODULES
+    ).stdout.split()
+
+    # The first load parses the YAML and writes the snapshot, the second reads it
+    load = (
+        "import sys, time\n"
+        "from storage.config_snapshot import load_config\n"
+        "start = time.perf_counter(); load_config(sys.argv[1])\n"
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    with tempfile.TemporaryDirectory() as config_dir:
+        config_path = Path(config_dir) / "config.yaml"
+        config_path.write_text(CONFIG_FILE.read_text())
+        parse_ms, snapshot_ms = (float(python_run(load, str(config_path)).stdout) for _ in range(2))
+        snapshot_path(str(config_path)).unlink(missing_ok=True)
+
+    return {
+        "import_ms": round(float(np.median(import_us)) / 1000, 1),
+        "eager_lazy_modules": " ".join(loaded) or "none",
+        "config_parse_ms": round(parse_ms, 2),
+        "config_snapshot_ms": round(snapshot_ms, 2)
+    }
+
+
+def bench_upload(upload_format: str, batches: int = 40, batch_records: int = 500) -> Dict:
+    """SupabaseClient gait uploads against a local stub server."""
+    from aiohttp import web
+    from network.supabase_client import SupabaseClient
+    from network.wire_format import decode_gait_batch
+
+    received = {"records": 0, "bytes": 0}
+
+    async def gait_data(request):
+        received["bytes"] += request.content_length
+        received["records"] += len(await request.json())
+        return web.Response(status=201)
+
+    async def gait_batch(request):
+        # aiohttp has already undone the Content-Encoding
+        received["bytes"] += request.content_length
+        received["records"] += len(decode_gait_batch(await request.read()))
+        return web.Response(status=204)
+
+    async def run() -> Dict:
+        server = web.Application(client_max_size=64 * 1024 * 1024)
+        server.router.add_post("/rest/v1/gait_data", gait_data)
+        server.router.add_post("/functions/v1/gait-batch", gait_batch)
+        runner = web.AppRunner(server)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+
+        client = SupabaseClient(
+            f"http://127.0.0.1:{port}", "benchmark-key", "benchmark-user",
+            upload_config={"format": upload_format, "compression": "gzip"}
+        )
+        rng = np.random.default_rng(0)
+        batch_list = [
+            [
+                {
+                    "timestamp": BASE_TIME + b * batch_records + i,
+                    "cadence": float(rng.normal(100, 5)),
+                    "step_time_variability": float(rng.uniform(0, 0.2)),
+                    "estimated_stride_length": float(rng.normal(0.6, 0.05)),
+                    "gait_speed": float(rng.normal(1.0, 0.1)),
+                    "steps_in_window": int(rng.integers(0, 20))
+                }
+                for i in range(batch_records)
+            ]
+            for b in range(batches)
+        ]
+
+        latencies = []
+        await client.start()
+        start = time.perf_counter()
+        for batch in batch_list:
+            t0 = time.perf_counter()
+            await client.upload_gait_data(batch)
+            latencies.append(time.perf_counter() - t0)
+        total_s = time.perf_counter() - start
+        await client.close()
+        await runner.cleanup()
+
+        per_record_us = np.array(latencies) / batch_records * 1e6
+        return {
+            "samples": received["records"],
+            "samples_per_s": round(received["records"] / total_s, 1),
+            "p50_us": round(float(np.percentile(per_record_us, 50)), 2),
+            "p99_us": round(float(np.percentile(per_record_us, 99)), 2),
+            "bytes_per_record": round(received["bytes"] / max(received["records"], 1), 1)
+        }
+
+    return asyncio.run(run())
+
+
+# Case name -> (function, arguments); samples are sensor samples or uploaded records
+CASES = {
+    **{f"processor.process[window={w}s]": (bench_processor, (w,)) for w in (1, 5, 20)},
+    "processor.process_block[window=5s]": (bench_processor_block, (5,)),
+    **{f"gait.analyze[window={w}s]": (bench_gait, (w,)) for w in (1, 5, 20)},
+    "anomaly.detect[window=5s]": (bench_anomaly, (5,)),
+    **{f"chain.run[window={w}s]": (bench_chain, (w, False)) for w in (1, 5, 20)},
+    "chain.run_block[window=5s]": (bench_chain, (5, True)),
+    "metrics.overhead[window=5s]": (bench_metrics_overhead, (5,)),
+    **{f"app[devices={n}]": (bench_app, (n,)) for n in (1, 10, 30)},
+    "upload[json]": (bench_upload, ("json",)),
+    "upload[columnar]": (bench_upload, ("columnar",)),
+    "startup": (bench_startup, ()),
+}
+
+
+def run_case(name: str) -> Dict:
+    """Run one case; called in a fresh worker process."""
+    fn, args = CASES[name]
+    result = fn(*args)
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def compare(name: str, result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Get regressions of a result against its baseline."""
+    regressions = []
+    for metric, higher_is_better in COMPARED_METRICS.items():
+        if metric not in result or metric not in baseline or not baseline[metric]:
+            continue
+        change = (result[metric] - baseline[metric]) / baseline[metric]
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(
+                f"{name}: {metric} {baseline[metric]} -> {result[metric]} ({change:+.0%})"
+            )
+    return regressions
+
+
+def check_startup(result: Dict, budget_ms: float) -> List[str]:
+    """Get the ways a startup result breaks the import budget."""
+    failures = []
+    if result["import_ms"] > budget_ms:
+        failures.append(f"startup: import_ms {result['import_ms']} over the budget of {budget_ms}")
+    if result["eager_lazy_modules"] != "none":
+        failures.append(f"startup: importing edge_app loaded {result['eager_lazy_modules']}")
+    return failures
+
+
+def machine_info() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": multiprocessing.cpu_count(),
+        "numpy": np.__version__
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS,
+                        help="Maximum time to import edge_app, checked without a baseline")
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.filter in name]
+    context = multiprocessing.get_context("spawn")
+
+    results = {}
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results[name] = executor.submit(run_case, name).result()
+        metrics = "  ".join(f"{key}={value}" for key, value in results[name].items())
+        print(f"{name:36s} {metrics}", flush=True)
+
+    if "startup" in results:
+        failures = check_startup(results["startup"], args.import_budget_ms)
+        if failures:
+            print("\nSTARTUP BUDGET EXCEEDED:")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"cases": {}}
+        stored["machine"] = machine_info()
+        stored["cases"].update(results)
+        baseline_path.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline of {len(results)} cases to {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to record one")
+        return
+
+    stored = json.loads(baseline_path.read_text())
+    if stored.get("machine") != machine_info():
+        print(f"WARNING: baseline was recorded on {stored.get('machine')}, this is {machine_info()}")
+
+    regressions = []
+    for name, result in results.items():
+        if name in stored["cases"]:
+            regressions += compare(name, result, stored["cases"][name], args.tolerance)
+
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION (tolerance {args.tolerance:.0%}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
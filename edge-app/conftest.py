@@ -0,0 +1,6 @@
+"""Shared pytest setup.
+
+Keeping this file at the top of edge-app puts the directory on sys.path,
+so the tests import sensors, processing, network and storage the same
+way edge_app.py does.
+"""
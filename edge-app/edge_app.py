@@ -1,48 +1,256 @@
 #!/usr/bin/env python3
 
 import asyncio
+import functools
 import logging
 import os
-import yaml
-from datetime import datetime
+import time
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import Optional
 
 # Local imports
+from sensors.ble_backend import create_backend
+from sensors.connection_manager import ConnectionManager
+from sensors.device_registry import DEVICE_TABLE_FILE, DeviceRegistry
 from sensors.slipper_sensor import SlipperSensor
-from processing.etl import DataProcessor
-from processing.gait_analysis import GaitAnalyzer
-from processing.anomaly_detection import AnomalyDetector
+from processing.analysis_chain import AnalysisChain
+from processing.metrics import merge_histograms
+from processing.pipeline import Pipeline
+from processing.records import SampleBlock
+from processing.scheduler import Scheduler
+from processing.worker_pool import AnalysisPool
+from network.alert_manager import AlertManager
+from network.remote_config import RemoteConfig
+from network.stats_server import StatsServer, format_stats_line
 from network.supabase_client import SupabaseClient
+from network.upload_queue import UploadQueue
+from storage.config_snapshot import load_config
+from storage.local_cache import DEVICE_RECORD_FIELDS, DEVICE_RECORD_FORMAT, LocalCache
+from storage.raw_recorder import RawRecorder
 
 # Load environment variables
 load_dotenv()
 
 class GosplEdgeApp:
-    def __init__(self, config_path: str = "config.yaml"):
-        self.config = self._load_config(config_path)
+    def __init__(self, config_path: str = "config.yaml", config: Optional[dict] = None):
+        self.config = config if config is not None else self._load_config(config_path)
         self._setup_logging()
         
+        # Slippers served by this gateway and the users they belong to
+        self.registry = DeviceRegistry.from_config(self.config, os.getenv("SUPABASE_USER_ID"))
+        
         # Initialize components
-        self.sensor = SlipperSensor(self.config["sensors"]["slipper"])
-        self.processor = DataProcessor()
-        self.gait_analyzer = GaitAnalyzer(self.config["analysis"])
-        self.anomaly_detector = AnomalyDetector(self.config["analysis"])
+        slipper_config = self.config["sensors"]["slipper"]
+        connection_config = slipper_config.get("connection", {})
+        self.ble_backend = create_backend(connection_config.get("backend", "bleak"))
+        self.sensors = {
+            device.device_name: SlipperSensor(
+                self.registry.sensor_config(device, slipper_config),
+                backend=self.ble_backend
+            )
+            for device in self.registry
+        }
+        self.connections = ConnectionManager(
+            self.sensors,
+            self.ble_backend,
+            retry_interval_s=slipper_config["connection_retry_interval_s"],
+            max_retry_interval_s=connection_config.get("max_retry_interval_s", 60),
+            scan_timeout_s=connection_config.get("scan_timeout_s")
+        )
+        self._setup_analysis()
+        
+        # Durable local store for metrics awaiting upload, shared by all devices
+        data_config = self.config["data"]
+        cache_dir = Path(data_config["local_cache_dir"])
+        cache_format = {}
+        if self.registry.multi_tenant:
+            # Records carry their device, in a separate store from single-device records
+            cache_dir = cache_dir / "devices"
+            cache_format = {"fields": DEVICE_RECORD_FIELDS, "record_format": DEVICE_RECORD_FORMAT}
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                self.registry.load_cache_ids(str(cache_dir / DEVICE_TABLE_FILE))
+            except ValueError as e:
+                # Records cannot be attributed without the table; keep them for manual recovery
+                orphaned = cache_dir.with_name(f"devices-orphaned-{int(time.time())}")
+                self.logger.error(f"{e}; moving cached records to {orphaned}")
+                cache_dir.rename(orphaned)
+                cache_dir.mkdir()
+                self.registry.load_cache_ids(str(cache_dir / DEVICE_TABLE_FILE))
+        self.cache = LocalCache(
+            str(cache_dir),
+            max_size_mb=data_config["cache_max_size_mb"],
+            segment_size_kb=data_config.get("cache_segment_size_kb", 256),
+            fsync=data_config.get("cache_fsync", "interval"),
+            fsync_interval_s=data_config.get("cache_fsync_interval_s", 5),
+            **cache_format
+        )
+        
+        # Optional recorders of raw decoded samples, one directory per device
+        self.recorders = {}
+        recording_config = data_config.get("raw_recording", {})
+        if recording_config.get("enabled", False):
+            channels = {
+                "accelerometer": (3, slipper_config["accelerometer"]["sample_rate_hz"]),
+                "gyroscope": (3, slipper_config["gyroscope"]["sample_rate_hz"]),
+                "pressure": (
+                    slipper_config["pressure"]["num_sensors"],
+                    slipper_config["pressure"]["sample_rate_hz"]
+                )
+            }
+            for device in self.registry:
+                record_dir = Path(recording_config["dir"])
+                if self.registry.multi_tenant:
+                    record_dir = record_dir / device.device_name
+                self.recorders[device.device_name] = RawRecorder(str(record_dir), channels)
         
         # Initialize cloud client
         self.cloud = SupabaseClient(
             url=os.getenv("SUPABASE_URL") or self.config["supabase"]["url"],
             key=os.getenv("SUPABASE_ANON_KEY") or self.config["supabase"]["anon_key"],
-            user_id=os.getenv("SUPABASE_USER_ID") or self.config["supabase"]["user_id"]
+            user_id=os.getenv("SUPABASE_USER_ID") or self.config["supabase"]["user_id"],
+            http_config=self.config["supabase"].get("http", {}),
+            upload_config=self.config["supabase"].get("upload", {})
+        )
+        
+        # Store-and-forward queue for alerts and cached gait data
+        upload_config = data_config.get("upload", {})
+        self.upload_queue = UploadQueue(
+            self.cloud,
+            self.cache,
+            data_config["local_cache_dir"],
+            max_batch_records=upload_config.get("max_batch_records", 500),
+            max_in_flight=upload_config.get("max_in_flight", 4),
+            base_backoff_s=upload_config.get("base_backoff_s", 1.0),
+            max_backoff_s=upload_config.get("max_backoff_s", 300.0),
+            registry=self.registry
+        )
+        
+        # Deduplicates repeated alerts before they reach the queue
+        alert_config = self.config.get("alerts", {})
+        self.alert_manager = AlertManager(
+            self.upload_queue,
+            suppression_ttl_s=alert_config.get("suppression_ttl_s", 300),
+            send_warnings=alert_config.get("send_warnings", True)
+        )
+        
+        # Per-user detection thresholds tuned in the cloud, cached for offline starts
+        self.remote_config = RemoteConfig(
+            self.cloud,
+            data_config["local_cache_dir"],
+            (device.user_id for device in self.registry),
+            self.config["analysis"]
         )
         
-        self.last_upload_time = datetime.now()
+        self._setup_pipeline()
+        
+        # Self-monitoring: a periodic stats line and an optional local endpoint
+        monitoring_config = self.config.get("monitoring", {})
+        self.stats_interval_s = monitoring_config.get("stats_interval_s", 60)
+        self.stats_server = None
+        if monitoring_config.get("http_port"):
+            self.stats_server = StatsServer(
+                self.collect_metrics,
+                host=monitoring_config.get("http_host", "127.0.0.1"),
+                port=monitoring_config["http_port"]
+            )
+        
+        self._setup_scheduler()
+        
         self.running = False
+        self._stop_requested = asyncio.Event()
         
     def _load_config(self, config_path: str) -> dict:
-        """Load configuration from YAML file."""
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        """Load configuration from YAML file, or its validated snapshot."""
+        return load_config(config_path)
+            
+    def _setup_analysis(self):
+        """Run analysis inline on the event loop or on a worker pool.
+        
+        With a pool, the event loop only decodes and routes sensor data, so
+        analysis spikes cannot delay BLE notifications.
+        """
+        analysis_config = self.config.get("pipeline", {}).get("analysis", {})
+        mode = analysis_config.get("mode", "inline")
+        
+        # Every device has its own analysis state
+        self.chains = {}
+        self.analysis_pool = None
+        if mode == "inline":
+            for device in self.registry:
+                self.chains[device.device_name] = AnalysisChain(self.config)
+            return
+            
+        sensor_config = self.config["sensors"]["slipper"]
+        self.analysis_pool = AnalysisPool(
+            self.config,
+            mode=mode,
+            workers=analysis_config.get("workers", 1),
+            slots=analysis_config.get("slots", 8),
+            slot_samples=sensor_config.get("batching", {}).get("max_samples", 25),
+            width=max(3, sensor_config["pressure"]["num_sensors"]),
+            max_pending=analysis_config.get("max_pending", 64)
+        )
+        
+    def _setup_pipeline(self):
+        """Connect ingest -> process -> analyze -> sink with bounded queues.
+        
+        When the process stage falls behind, the ingest queues drop their
+        oldest items rather than letting callbacks pile up, except
+        accelerometer data holding an impact, which may start a fall and
+        is never dropped.
+        """
+        queue_config = self.config.get("pipeline", {}).get("queues", {})
+        defaults = {
+            "accelerometer": (256, "drop_oldest"),
+            "telemetry": (256, "drop_oldest"),
+            "frames": (512, "block"),
+            "sink": (512, "block")
+        }
+        queues = {}
+        self.pipeline = Pipeline()
+        for name, (size, policy) in defaults.items():
+            settings = queue_config.get(name, {})
+            queues[name] = self.pipeline.add_queue(
+                name,
+                settings.get("size", size),
+                settings.get("policy", policy)
+            )
+            
+        self.acc_queue = queues["accelerometer"]
+        self.telemetry_queue = queues["telemetry"]
+        self.frame_queue = queues["frames"]
+        self.sink_queue = queues["sink"]
+        
+        self.pipeline.add_stage("process", self.acc_queue, self._process_stage)
+        self.pipeline.add_stage("process", self.telemetry_queue, self._process_stage)
+        self.pipeline.add_stage("analyze", self.frame_queue, self._analyze)
+        self.pipeline.add_stage("sink", self.sink_queue, self._sink)
+        
+    def _setup_scheduler(self):
+        """Register the periodic jobs, so the per-sample path never checks the time."""
+        data_config = self.config["data"]
+        jitter = self.config.get("scheduler", {}).get("jitter", 0.1)
+        self.scheduler = Scheduler()
+        
+        # A late upload is still worth one flush, but not one per missed interval
+        self.scheduler.add_job(
+            "upload", self.upload_queue.request_flush, data_config["upload_interval_s"],
+            jitter=jitter, missed="coalesce"
+        )
+        self.scheduler.add_job(
+            "cache_compaction", self.cache.compact,
+            data_config.get("cache_compaction_interval_s", 600), jitter=jitter
+        )
+        if self.stats_interval_s:
+            self.scheduler.add_job("stats", self._log_stats, self.stats_interval_s, jitter=0)
+        refresh_interval_s = self.config["supabase"].get("config_refresh_interval_s", 0)
+        if refresh_interval_s:
+            self.scheduler.add_job(
+                "config_refresh", self._refresh_config, refresh_interval_s,
+                jitter=jitter, missed="coalesce", run_at_start=True, timeout_s=60
+            )
             
     def _setup_logging(self):
         """Configure logging based on config settings."""
@@ -57,60 +265,116 @@ class GosplEdgeApp:
         )
         self.logger = logging.getLogger("GOSPL")
         
-    async def _process_sensor_data(self, raw_data: dict):
-        """Process incoming sensor data and detect anomalies."""
-        # Transform raw sensor data into features
-        processed_data = self.processor.process(raw_data)
-        
-        # Analyze gait patterns
-        gait_metrics = self.gait_analyzer.analyze(processed_data)
-        
-        # Check for anomalies (falls or irregular patterns)
-        anomalies = self.anomaly_detector.detect(processed_data, gait_metrics)
-        
-        # If any critical anomalies (like falls), send alert immediately
-        if any(a["severity"] == "critical" for a in anomalies):
-            await self._send_alerts(anomalies)
+    async def _process_stage(self, item: tuple):
+        """Process stage: record raw data and turn it into fused frames."""
+        device_name, data = item
+        recorder = self.recorders.get(device_name)
+        if recorder:
+            if isinstance(data, SampleBlock):
+                recorder.append(data.type, data.timestamps, data.values)
+            else:
+                recorder.append_sample(data)
+                
+        if self.analysis_pool:
+            # Workers run the whole chain; results come back through _queue_results
+            await self.analysis_pool.submit(data, device_name)
+            return
             
-        # Store processed data for periodic upload
-        self._cache_data(gait_metrics)
-        
-        # Check if it's time for periodic upload
-        await self._check_periodic_upload()
+        # Only fused frames (all sensors on one clock) go through analysis
+        for frame in self.chains[device_name].process(data):
+            await self.frame_queue.put((device_name, frame))
+            
+    async def _queue_results(self, device_name: str, results: list):
+        """Hand the results of the analysis workers to the sink stage."""
+        for gait_metrics, anomalies in results:
+            await self.sink_queue.put((device_name, gait_metrics, anomalies))
+            
+    async def _analyze(self, item: tuple):
+        """Analyze stage: gait analysis and anomaly detection on a fused frame."""
+        device_name, processed_data = item
+        result = self.chains[device_name].analyze(processed_data)
+        if result is not None:
+            await self.sink_queue.put((device_name, *result))
+            
+    async def _sink(self, item: tuple):
+        """Sink stage: queue alerts, cache metrics and trigger uploads."""
+        device_name, gait_metrics, anomalies = item
+        device = self.registry.get(device_name)
         
-    async def _send_alerts(self, anomalies: list):
-        """Send critical alerts to the cloud immediately."""
-        try:
-            for anomaly in anomalies:
-                if anomaly["severity"] == "critical":
-                    await self.cloud.send_alert(anomaly)
-                    self.logger.info(f"Sent critical alert: {anomaly['type']}")
-        except Exception as e:
-            self.logger.error(f"Failed to send alert: {e}")
+        # Critical anomalies (like falls) are queued immediately, repeats coalesced
+        for anomaly in anomalies:
+            if self.registry.multi_tenant:
+                anomaly.user_id = device.user_id
+            self.alert_manager.submit(anomaly.as_dict())
             
+        # Store newly computed gait metrics for periodic upload
+        if gait_metrics is not None:
+            record = gait_metrics.as_dict()
+            if self.registry.multi_tenant:
+                record["device"] = device.cache_id
+            self._cache_data(record)
+        
     def _cache_data(self, data: dict):
         """Cache processed data for periodic upload."""
-        # Implementation for local caching
-        pass
+        try:
+            self.cache.append(data)
+            self.upload_queue.notify_data()
+        except OSError as e:
+            self.logger.error(f"Failed to cache data: {e}")
         
-    async def _check_periodic_upload(self):
-        """Check if it's time to upload cached data to cloud."""
-        now = datetime.now()
-        if (now - self.last_upload_time).total_seconds() >= self.config["data"]["upload_interval_s"]:
-            try:
-                # Upload cached data
-                await self.cloud.upload_gait_data(self.processor.get_cached_data())
-                self.last_upload_time = now
-                self.logger.info("Uploaded periodic gait data to cloud")
-            except Exception as e:
-                self.logger.error(f"Failed to upload periodic data: {e}")
-                
-    async def _sensor_callback(self, data: dict):
-        """Callback function for new sensor data."""
+    async def collect_metrics(self) -> dict:
+        """Collect the metrics of every stage, from BLE links to uploads."""
+        if self.analysis_pool:
+            timings = await self.analysis_pool.timings()
+        else:
+            timings = merge_histograms(
+                chain.timings for chain in self.chains.values() if chain.timings
+            )
+        return {
+            "links": self.connections.stats(),
+            "analysis": timings,
+            "queues": self.pipeline.stats(),
+            "pending_tasks": len(asyncio.all_tasks()),
+            "upload": self.upload_queue.stats(),
+            "jobs": self.scheduler.stats()
+        }
+        
+    async def _log_stats(self):
+        """Log a stats line, to show which stage falls behind."""
+        self.logger.info(format_stats_line(await self.collect_metrics()))
+        
+    async def _refresh_config(self):
+        """Fetch per-user thresholds from the cloud and apply the changed ones."""
+        changed = await self.remote_config.refresh()
+        if changed:
+            await self._apply_thresholds(changed)
+            
+    async def _apply_thresholds(self, thresholds_by_user: dict):
+        """Hot-apply detection thresholds to the analysis chains of each user's devices."""
+        local_impact_g = self.config["analysis"]["fall_detection"]["impact_threshold_g"]
+        for device in self.registry:
+            thresholds = thresholds_by_user.get(device.user_id)
+            if thresholds is None:
+                continue
+            # Impacts the detector now acts on must not be dropped under load
+            self.sensors[device.device_name].set_impact_threshold(
+                thresholds.get("fall_detection", {}).get("impact_threshold_g", local_impact_g)
+            )
+            if self.analysis_pool:
+                await self.analysis_pool.apply_thresholds(device.device_name, thresholds)
+            else:
+                self.chains[device.device_name].apply_thresholds(thresholds)
+            self.logger.info(f"Thresholds of {device.device_name}: {thresholds or 'local configuration'}")
+            
+    async def _sensor_callback(self, device_name: str, data):
+        """Ingest stage: hand new sensor data to the pipeline."""
         try:
-            await self._process_sensor_data(data)
+            if data.type == "accelerometer":
+                await self.acc_queue.put((device_name, data), protected=data.urgent)
+            else:
+                await self.telemetry_queue.put((device_name, data))
         except Exception as e:
-            self.logger.error(f"Error processing sensor data: {e}")
+            self.logger.error(f"Error ingesting sensor data: {e}")
             
     async def start(self):
         """Start the edge application."""
@@ -118,15 +382,25 @@ class GosplEdgeApp:
         self.logger.info("Starting GOSPL Edge Application")
         
         try:
-            # Connect to sensor
-            await self.sensor.connect()
+            # Open pooled cloud connections before the first alert needs them
+            await self.cloud.start()
+            await self.upload_queue.start()
+            if self.analysis_pool:
+                self.analysis_pool.start(self._queue_results)
+            # Thresholds from the last run apply before the first sample, even offline
+            await self._apply_thresholds(self.remote_config.thresholds())
+            self.pipeline.start()
+            self.scheduler.start()
+            if self.stats_server:
+                await self.stats_server.start()
             
-            # Start sensor data collection
-            await self.sensor.start_collection(self._sensor_callback)
+            # Connect to all sensors in the background, reconnecting on link loss
+            await self.connections.start(
+                lambda device_name: functools.partial(self._sensor_callback, device_name)
+            )
             
             # Keep running until stopped
-            while self.running:
-                await asyncio.sleep(1)
+            await self._stop_requested.wait()
                 
         except Exception as e:
             self.logger.error(f"Error in main loop: {e}")
@@ -135,10 +409,31 @@ class GosplEdgeApp:
         finally:
             await self.stop()
             
+    def request_stop(self):
+        """Make a running start() return after stopping the application."""
+        self.running = False
+        self._stop_requested.set()
+        
     async def stop(self):
         """Stop the edge application."""
         self.running = False
-        await self.sensor.disconnect()
+        await self.scheduler.stop()
+        if self.stats_server:
+            await self.stats_server.stop()
+        await self.connections.stop()
+        if self.analysis_pool:
+            # Results of submitted data still have to reach the sink stage
+            await self.pipeline.drain(2.0)
+            await self.analysis_pool.drain(2.0)
+        await self.pipeline.stop()
+        if self.analysis_pool:
+            await self.analysis_pool.stop()
+        self.alert_manager.close()
+        await self.upload_queue.stop()
+        await self.cloud.close()
+        self.cache.close()
+        for recorder in self.recorders.values():
+            recorder.close()
         self.logger.info("GOSPL Edge Application stopped")
 
 def main():
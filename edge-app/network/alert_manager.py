@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from network.upload_queue import UploadQueue
+
+logger = logging.getLogger("GOSPL.alerts")
+
+
+class _Episode:
+    """Repeated occurrences of one alert key within the suppression TTL."""
+
+    def __init__(self, alert: Dict, sent: bool):
+        self.alert = alert
+        self.count = 1
+        self.first_timestamp = alert["timestamp"]
+        self.last_timestamp = alert["timestamp"]
+        self.last_seen = time.monotonic()
+        self.sent_count = 1 if sent else 0
+        self.reported_at = self.last_seen
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class AlertManager:
+    """Deduplicate and coalesce alerts before they are queued for upload.
+
+    Alerts are keyed by (user, type, severity). Critical alerts are always
+    queued immediately, since each one (e.g. a fall) is a new event;
+    repeats within ``suppression_ttl_s`` carry the episode's occurrence
+    count and time span. Repeated warnings are only counted, and when
+    their episode has been quiet for the TTL, one record with the count
+    and time span is queued. An episode that keeps going is summarized
+    once per TTL as well. Warnings are therefore sent once per episode,
+    or per TTL, instead of once per sample.
+    """
+
+    def __init__(self, upload_queue: UploadQueue, suppression_ttl_s: float = 300,
+                 send_warnings: bool = True):
+        """Initialize the alert manager.
+
+        Args:
+            upload_queue: Queue that delivers alerts to the cloud
+            suppression_ttl_s: Quiet time after which an episode is closed, and
+                the interval of summaries while it lasts
+            send_warnings: Whether non-critical alerts are uploaded at all
+        """
+        self.upload_queue = upload_queue
+        self.suppression_ttl_s = suppression_ttl_s
+        self.send_warnings = send_warnings
+
+        self.episodes: Dict[Tuple[Optional[str], str, str], _Episode] = {}
+        self.suppressed = 0
+
+    def submit(self, alert: Dict) -> None:
+        """Handle a newly detected alert without blocking.
+
+        Args:
+            alert: Alert dictionary from the anomaly detector
+        """
+        if alert["severity"] != "critical" and not self.send_warnings:
+            return
+
+        key = (alert.get("user_id"), alert["type"], alert["severity"])
+        critical = alert["severity"] == "critical"
+        episode = self.episodes.get(key)
+        if episode is not None:
+            episode.count += 1
+            episode.last_timestamp = alert["timestamp"]
+            episode.last_seen = time.monotonic()
+            if critical:
+                # Never held back: a repeated fall is another fall
+                self.upload_queue.put_alert(self._with_episode(alert, episode))
+                episode.sent_count = episode.count
+                logger.info(f"Queued critical alert: {alert['type']} (x{episode.count})")
+            else:
+                self.suppressed += 1
+            return
+
+        if critical:
+            self.upload_queue.put_alert(alert)
+            logger.info(f"Queued critical alert: {alert['type']}")
+
+        episode = _Episode(alert, sent=critical)
+        self.episodes[key] = episode
+        self._schedule(key, self.suppression_ttl_s)
+
+    def _schedule(self, key: Tuple[Optional[str], str, str], delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        self.episodes[key].timer = loop.call_later(delay, self._expire, key)
+
+    def _expire(self, key: Tuple[Optional[str], str, str]) -> None:
+        """Close an episode once it has been quiet for the TTL, summarizing it meanwhile."""
+        episode = self.episodes.get(key)
+        if episode is None:
+            return
+
+        now = time.monotonic()
+        remaining = episode.last_seen + self.suppression_ttl_s - now
+        if remaining > 0:
+            # A sustained episode would otherwise never be reported
+            if now - episode.reported_at >= self.suppression_ttl_s:
+                self._report(episode)
+            self._schedule(key, min(remaining, episode.reported_at + self.suppression_ttl_s - now))
+            return
+
+        del self.episodes[key]
+        self._report(episode)
+
+    def _report(self, episode: _Episode) -> None:
+        """Queue one coalesced record for occurrences not reported yet."""
+        episode.reported_at = time.monotonic()
+        if episode.count <= episode.sent_count:
+            return
+
+        self.upload_queue.put_alert(
+            self._with_episode({**episode.alert, "timestamp": episode.last_timestamp}, episode)
+        )
+        episode.sent_count = episode.count
+
+    def _with_episode(self, alert: Dict, episode: _Episode) -> Dict:
+        """Attach the occurrence count and time span of its episode to an alert."""
+        details = dict(alert.get("details", {}))
+        details.update({
+            "occurrences": episode.count,
+            "first_detected": datetime.fromtimestamp(episode.first_timestamp).isoformat(),
+            "last_detected": datetime.fromtimestamp(episode.last_timestamp).isoformat(),
+            "duration_s": episode.last_timestamp - episode.first_timestamp
+        })
+        message = alert["message"]
+        if episode.count > 1:
+            message = f"{message} (x{episode.count})"
+        return {**alert, "message": message, "details": details}
+
+    def close(self) -> None:
+        """Report all open episodes, e.g. on shutdown."""
+        for episode in self.episodes.values():
+            if episode.timer is not None:
+                episode.timer.cancel()
+            self._report(episode)
+        self.episodes.clear()
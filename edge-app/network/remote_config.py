@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+from numbers import Real
+from pathlib import Path
+from typing import Dict, Iterable
+
+from network.supabase_client import SupabaseClient
+
+logger = logging.getLogger("GOSPL.config")
+
+REMOTE_CONFIG_FILE = "remote_config.json"
+
+# Analysis config sections whose values clinicians may tune per user
+THRESHOLD_SECTIONS = ("fall_detection", "step_detection", "anomaly_detection")
+
+# Remote values may differ from the local ones by at most this factor either way
+MAX_THRESHOLD_RATIO = 4.0
+
+
+def extract_thresholds(remote: Dict, analysis_config: Dict,
+                       max_ratio: float = MAX_THRESHOLD_RATIO) -> Dict[str, Dict]:
+    """Pick the valid detection thresholds out of a user's remote configuration.
+
+    The user_config row holds one JSON object per section of
+    THRESHOLD_SECTIONS. Only settings that exist in the local analysis
+    config are taken, and only as numbers within ``max_ratio`` of the
+    local value, so a typo such as an impact threshold of 300 g cannot
+    switch fall detection off. Anything else is logged and ignored.
+
+    Args:
+        remote: Configuration row of one user
+        analysis_config: Local analysis configuration
+        max_ratio: Largest allowed factor between a remote and local value
+
+    Returns:
+        Threshold values by section, for AnalysisChain.apply_thresholds
+    """
+    thresholds = {}
+    for section in THRESHOLD_SECTIONS:
+        values = remote.get(section)
+        if not isinstance(values, dict):
+            continue
+        local = analysis_config.get(section, {})
+        valid = {}
+        for name, value in values.items():
+            if name not in local:
+                logger.warning(f"Ignoring unknown remote setting {section}.{name}")
+            elif not _is_positive(value) or not _is_positive(local[name]):
+                logger.warning(f"Ignoring invalid remote setting {section}.{name}: {value!r}")
+            elif not local[name] / max_ratio <= value <= local[name] * max_ratio:
+                logger.warning(
+                    f"Ignoring remote setting {section}.{name}: {value!r} is out of range "
+                    f"{local[name] / max_ratio:g}..{local[name] * max_ratio:g}"
+                )
+            else:
+                valid[name] = value
+        if valid:
+            thresholds[section] = valid
+    return thresholds
+
+
+def _is_positive(value) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool) and value > 0
+
+
+class RemoteConfig:
+    """Per-user detection thresholds fetched from the cloud.
+
+    Requests are conditional on the ETag of the last response, so an
+    unchanged configuration costs a 304 without a body. The last fetched
+    thresholds and their ETags are kept on disk, so a gateway that starts
+    offline still uses the thresholds its clinicians set.
+    """
+
+    def __init__(self, client: SupabaseClient, cache_dir: str, user_ids: Iterable[str],
+                 analysis_config: Dict):
+        """Initialize the remote configuration, loading the disk cache.
+
+        Args:
+            client: Supabase client
+            cache_dir: Directory for the cached configuration
+            user_ids: Users whose configuration to fetch
+            analysis_config: Local analysis configuration the thresholds override
+        """
+        self.client = client
+        self.cache_path = Path(cache_dir) / REMOTE_CONFIG_FILE
+        self.user_ids = sorted({user_id for user_id in user_ids if user_id})
+        self.analysis_config = analysis_config
+
+        # user_id -> {"etag": ..., "thresholds": {section: {name: value}}}
+        self.users: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        """Load the thresholds cached by a previous run.
+
+        Cached thresholds are validated again, as the local configuration
+        they are checked against may have changed since.
+        """
+        if not self.cache_path.exists():
+            return {}
+        try:
+            users = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable remote config cache: {e}")
+            return {}
+        cached = {}
+        for user_id in self.user_ids:
+            entry = users.get(user_id)
+            if not isinstance(entry, dict) or not isinstance(entry.get("thresholds"), dict):
+                continue
+            thresholds = extract_thresholds(entry["thresholds"], self.analysis_config)
+            if thresholds != entry["thresholds"]:
+                entry = {"etag": None, "thresholds": thresholds}  # Refetch what was rejected
+            cached[user_id] = entry
+        return cached
+
+    def _save(self) -> None:
+        """Atomically rewrite the cache."""
+        try:
+            tmp = self.cache_path.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.users, f)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Failed to cache remote config: {e}")
+
+    def thresholds(self) -> Dict[str, Dict[str, Dict]]:
+        """Get the current thresholds of every user that has any."""
+        return {user_id: entry["thresholds"] for user_id, entry in self.users.items()}
+
+    async def refresh(self) -> Dict[str, Dict[str, Dict]]:
+        """Fetch the configuration of every user.
+
+        A user whose request fails keeps their current thresholds; the
+        others are still refreshed.
+
+        Returns:
+            Thresholds of the users whose thresholds changed
+        """
+        changed = {}
+        fetched = False
+        errors = []
+        for user_id in self.user_ids:
+            entry = self.users.get(user_id, {})
+            try:
+                remote, etag = await self.client.get_config(user_id, entry.get("etag"))
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            if remote is None:
+                continue  # Not modified since the cached ETag
+            thresholds = extract_thresholds(remote, self.analysis_config)
+            if thresholds != entry.get("thresholds", {}):
+                changed[user_id] = thresholds
+            self.users[user_id] = {"etag": etag, "thresholds": thresholds}
+            fetched = True
+
+        if fetched:
+            self._save()
+        if errors and len(errors) == len(self.user_ids):
+            raise errors[0]
+        return changed
+
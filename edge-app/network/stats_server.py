@@ -0,0 +1,159 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+
+from processing.metrics import PrometheusText, snapshot_metrics
+
+logger = logging.getLogger("GOSPL.stats")
+
+
+def render_prometheus(metrics: Dict) -> str:
+    """Render the metrics collected by GosplEdgeApp in Prometheus text format.
+
+    Args:
+        metrics: Result of GosplEdgeApp.collect_metrics()
+
+    Returns:
+        Exposition text
+    """
+    text = PrometheusText()
+
+    for device, link in metrics["links"].items():
+        labels = {"device": device}
+        text.add("link_connected", link["connected"], labels, help_text="Whether the slipper is connected")
+        text.add("link_uptime_ratio", link["uptime_ratio"], labels)
+        text.add("link_disconnects_total", link["disconnects"], labels, kind="counter")
+        text.add("link_retry_attempts", link["retry_attempts"], labels)
+        for channel, stats in link["channels"].items():
+            labels = {"device": device, "channel": channel}
+            text.add("notifications_total", stats["notifications"], labels, kind="counter",
+                     help_text="BLE notifications received per characteristic")
+            text.add("notification_rate_hz", stats["rate_hz"], labels)
+            text.add("notification_gap_mean_seconds", stats["gap_mean_ms"] / 1000, labels)
+            text.add("notification_gap_max_seconds", stats["gap_max_ms"] / 1000, labels)
+
+    for stage, histogram in metrics["analysis"].items():
+        text.histogram("stage_duration_seconds", histogram, {"stage": stage},
+                       help_text="Duration of processor, gait and anomaly calls")
+        text.add("stage_samples_total", histogram.samples, {"stage": stage}, kind="counter")
+
+    for name, queue in metrics["queues"].items():
+        labels = {"queue": name}
+        text.add("queue_depth", queue["depth"], labels, help_text="Items waiting between pipeline stages")
+        text.add("queue_high_water", queue["high_water"], labels)
+        text.add("queue_dropped_total", queue["dropped"], labels, kind="counter")
+    text.add("pending_tasks", metrics["pending_tasks"], help_text="Tasks on the event loop")
+
+    upload = metrics["upload"]
+    for endpoint, histogram in upload["request_times"].items():
+        labels = {"endpoint": endpoint}
+        text.histogram("upload_request_duration_seconds", histogram, labels,
+                       help_text="Duration of cloud requests, failures included")
+        text.add("upload_bytes_total", upload["bytes_sent"][endpoint], labels, kind="counter")
+    text.add("upload_retries_total", upload["retries"], kind="counter")
+    text.add("upload_pending_alerts", upload["pending_alerts"])
+    text.add("upload_unsent_records", upload["unsent_records"])
+
+    return text.render()
+
+
+def format_stats_line(metrics: Dict) -> str:
+    """Summarize the metrics collected by GosplEdgeApp in one log line.
+
+    Latencies are percentiles since startup; rates are per connected second.
+    """
+    links = metrics["links"].values()
+    connected = sum(1 for link in links if link["connected"])
+    rate = sum(stats["rate_hz"] for link in links for stats in link["channels"].values())
+    gap_max = max((link["gap_max_ms"] for link in links), default=0.0)
+
+    stages = " ".join(
+        f"{stage} p99 {histogram.quantile(0.99):.0f}us ({histogram.snapshot()['ns_per_sample']} ns/sample)"
+        for stage, histogram in metrics["analysis"].items()
+    )
+    queues = " ".join(
+        f"{name} {queue['depth']}/{queue['maxsize']}" + (f" (dropped {queue['dropped']})" if queue["dropped"] else "")
+        for name, queue in metrics["queues"].items()
+    )
+
+    upload = metrics["upload"]
+    requests = sum(histogram.count for histogram in upload["request_times"].values())
+    request_p99_ms = max(
+        (histogram.quantile(0.99) / 1000 for histogram in upload["request_times"].values()), default=0.0
+    )
+    upload_kb = sum(upload["bytes_sent"].values()) / 1024
+
+    return (
+        f"Stats: links {connected}/{len(metrics['links'])} up, {rate:.0f} notifications/s, "
+        f"max gap {gap_max:g}ms | {stages or 'analysis idle'} | queues {queues} | "
+        f"tasks {metrics['pending_tasks']} | upload {requests} requests, {upload_kb:.1f} kB, "
+        f"p99 {request_p99_ms:.0f}ms, {upload['retries']} retries, {upload['unsent_records']} unsent"
+    )
+
+
+class StatsServer:
+    """Minimal local HTTP endpoint for metrics.
+
+    ``GET /metrics`` returns the Prometheus text format and ``GET /stats``
+    the same metrics as JSON. Binds to localhost by default, since metrics
+    name the devices served by the gateway.
+    """
+
+    def __init__(self, collect: Callable[[], Awaitable[Dict]],
+                 host: str = "127.0.0.1", port: int = 9464):
+        """Initialize the server.
+
+        Args:
+            collect: Returns the current metrics, e.g. GosplEdgeApp.collect_metrics
+            host: Address to listen on
+            port: Port to listen on
+        """
+        self.collect = collect
+        self.host = host
+        self.port = port
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """Start listening."""
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one request and close the connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed
+
+            path = request_line[1].split("?")[0] if len(request_line) > 1 else ""
+            if not request_line or request_line[0] != "GET":
+                status, content_type, body = "405 Method Not Allowed", "text/plain", "GET only\n"
+            elif path == "/metrics":
+                status, content_type = "200 OK", "text/plain; version=0.0.4"
+                body = render_prometheus(await self.collect())
+            elif path == "/stats":
+                status, content_type = "200 OK", "application/json"
+                body = json.dumps(snapshot_metrics(await self.collect()))
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "Try /metrics or /stats\n"
+
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.debug(f"Metrics request aborted: {e}")
+        except Exception as e:
+            logger.error(f"Error serving metrics: {e}")
+        finally:
+            writer.close()
@@ -1,25 +1,83 @@
 import aiohttp
 import json
 import logging
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from network import wire_format
+from processing.metrics import LatencyHistogram
+
 logger = logging.getLogger("GOSPL.network")
 
+# Upper bounds of request duration buckets in microseconds (1 ms to 30 s)
+REQUEST_BUCKETS_US = (
+    1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000,
+    1000000, 2500000, 5000000, 10000000, 30000000
+)
+
+class SupabaseError(Exception):
+    """Error response from the Supabase REST API."""
+    
+    def __init__(self, message: str, status: int, retry_after: Optional[float] = None):
+        """Initialize the error.
+        
+        Args:
+            message: Error description
+            status: HTTP status code of the response
+            retry_after: Seconds the server asked us to wait, if any
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        
+    @classmethod
+    def from_response(cls, message: str, response: aiohttp.ClientResponse) -> "SupabaseError":
+        """Create an error from a failed response, keeping any Retry-After hint."""
+        retry_after = None
+        try:
+            retry_after = float(response.headers.get("Retry-After", ""))
+        except ValueError:
+            pass
+        return cls(f"{message}: {response.status}", response.status, retry_after)
+        
+
 class SupabaseClient:
     """Client for communicating with Supabase backend."""
     
-    def __init__(self, url: str, key: str, user_id: str):
+    def __init__(self, url: str, key: str, user_id: str, http_config: Optional[Dict] = None,
+                 upload_config: Optional[Dict] = None):
         """Initialize the Supabase client.
         
         Args:
             url: Supabase project URL
             key: Supabase API key (anon or service role)
-            user_id: User ID for the elder
+            user_id: User ID for the elder; records and alerts carrying
+                their own user_id (multi-device gateways) keep it
+            http_config: Connection pool and timeout settings
+            upload_config: Wire format settings for bulk gait uploads
         """
         self.base_url = url.rstrip('/')
         self.key = key
         self.user_id = user_id
+        self.http_config = http_config or {}
+        
+        upload_config = upload_config or {}
+        self.upload_format = upload_config.get("format", "json")
+        self.compression = upload_config.get("compression", "gzip")
+        self.columnar_endpoint = upload_config.get("columnar_endpoint", "/functions/v1/gait-batch")
+        if not wire_format.compression_available(self.compression):
+            logger.warning(f"{self.compression} compression unavailable, using gzip")
+            self.compression = "gzip"
+        self.session: Optional[aiohttp.ClientSession] = None
+        
+        # Request durations and bytes sent per endpoint, failures included
+        self.request_times = {
+            "alerts": LatencyHistogram(REQUEST_BUCKETS_US),
+            "gait": LatencyHistogram(REQUEST_BUCKETS_US),
+            "config": LatencyHistogram(REQUEST_BUCKETS_US)
+        }
+        self.bytes_sent = {"alerts": 0, "gait": 0, "config": 0}
         
         # Headers for Supabase REST API
         self.headers = {
@@ -29,40 +87,94 @@ class SupabaseClient:
             'Prefer': 'return=minimal'  # Don't return the inserted/updated records
         }
         
+    async def __aenter__(self) -> "SupabaseClient":
+        await self.start()
+        return self
+        
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+        
+    async def start(self) -> None:
+        """Open the pooled HTTP session shared by all requests.
+        
+        Connections are kept alive and reused, and DNS lookups are cached,
+        so requests after the first skip the TCP and TLS handshakes.
+        """
+        if self.session is not None and not self.session.closed:
+            return
+            
+        config = self.http_config
+        connector = aiohttp.TCPConnector(
+            limit=config.get("connection_limit", 10),
+            limit_per_host=config.get("connection_limit_per_host", 4),
+            keepalive_timeout=config.get("keepalive_s", 60),
+            ttl_dns_cache=config.get("dns_cache_ttl_s", 300)
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=config.get("request_timeout_s", 30),
+            connect=config.get("connect_timeout_s", 10)
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers=self.headers
+        )
+        
+    async def close(self) -> None:
+        """Close the HTTP session and its pooled connections."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the pooled session, opening it on first use."""
+        if self.session is None or self.session.closed:
+            await self.start()
+        return self.session
+        
+    def _observe(self, endpoint: str, start_ns: int, body_bytes: int, records: int = 1) -> None:
+        """Record the duration and size of one request."""
+        self.request_times[endpoint].observe(time.perf_counter_ns() - start_ns, records)
+        self.bytes_sent[endpoint] += body_bytes
+        
     async def send_alert(self, alert: Dict) -> None:
         """Send an alert to the cloud.
         
         Args:
             alert: Alert data dictionary
         """
-        # Add user ID and format timestamp
+        # Add user ID (unless the alert belongs to another tenant) and format timestamp
         alert_data = {
             **alert,
-            "user_id": self.user_id,
+            "user_id": alert.get("user_id", self.user_id),
             "created_at": datetime.fromtimestamp(alert["timestamp"]).isoformat()
         }
         
         # Remove raw timestamp as Supabase will use created_at
         alert_data.pop("timestamp", None)
+        body = json.dumps(alert_data)
         
+        start = time.perf_counter_ns()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/rest/v1/alerts",
-                    headers=self.headers,
-                    json=alert_data
-                ) as response:
-                    if response.status not in (200, 201):
-                        error_text = await response.text()
-                        logger.error(f"Failed to send alert: {error_text}")
-                        raise Exception(f"Alert API error: {response.status}")
-                        
-                    logger.info(f"Successfully sent alert: {alert['type']}")
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/rest/v1/alerts",
+                data=body
+            ) as response:
+                if response.status not in (200, 201):
+                    error_text = await response.text()
+                    logger.error(f"Failed to send alert: {error_text}")
+                    raise SupabaseError.from_response("Alert API error", response)
                     
+                logger.info(f"Successfully sent alert: {alert['type']}")
+                
         except Exception as e:
             logger.error(f"Error sending alert to Supabase: {e}")
             raise
             
+        finally:
+            self._observe("alerts", start, len(body))
+            
     async def upload_gait_data(self, data: List[Dict]) -> None:
         """Upload processed gait data to the cloud.
         
@@ -72,11 +184,15 @@ class SupabaseClient:
         if not data:
             return
             
+        if self.upload_format == "columnar":
+            await self._upload_columnar(data)
+            return
+            
         # Format data for upload
         records = []
         for record in data:
             formatted_record = {
-                "user_id": self.user_id,
+                "user_id": record.get("user_id", self.user_id),
                 "created_at": datetime.fromtimestamp(record["timestamp"]).isoformat(),
                 "metrics": json.dumps({
                     k: v for k, v in record.items()
@@ -84,46 +200,104 @@ class SupabaseClient:
                 })
             }
             records.append(formatted_record)
+        body = json.dumps(records)
             
+        start = time.perf_counter_ns()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.base_url}/rest/v1/gait_data",
-                    headers=self.headers,
-                    json=records
-                ) as response:
-                    if response.status not in (200, 201):
-                        error_text = await response.text()
-                        logger.error(f"Failed to upload gait data: {error_text}")
-                        raise Exception(f"Gait data API error: {response.status}")
-                        
-                    logger.info(f"Successfully uploaded {len(records)} gait records")
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}/rest/v1/gait_data",
+                data=body
+            ) as response:
+                if response.status not in (200, 201):
+                    error_text = await response.text()
+                    logger.error(f"Failed to upload gait data: {error_text}")
+                    raise SupabaseError.from_response("Gait data API error", response)
                     
+                logger.info(f"Successfully uploaded {len(records)} gait records")
+                
         except Exception as e:
             logger.error(f"Error uploading gait data to Supabase: {e}")
             raise
             
-    async def get_config(self) -> Dict:
+        finally:
+            self._observe("gait", start, len(body), len(data))
+            
+    async def _upload_columnar(self, data: List[Dict]) -> None:
+        """Upload gait data as one compressed columnar batch.
+        
+        Args:
+            data: List of gait data records
+        """
+        body, encoding = wire_format.compress(
+            wire_format.encode_gait_batch(data, self.user_id),
+            self.compression
+        )
+        headers = {"Content-Type": wire_format.CONTENT_TYPE}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            
+        start = time.perf_counter_ns()
+        try:
+            session = await self._get_session()
+            async with session.post(
+                f"{self.base_url}{self.columnar_endpoint}",
+                data=body,
+                headers=headers
+            ) as response:
+                if response.status not in (200, 201, 204):
+                    error_text = await response.text()
+                    logger.error(f"Failed to upload gait data: {error_text}")
+                    raise SupabaseError.from_response("Gait data API error", response)
+                    
+                logger.info(f"Successfully uploaded {len(data)} gait records ({len(body)} bytes)")
+                
+        except Exception as e:
+            logger.error(f"Error uploading gait data to Supabase: {e}")
+            raise
+            
+        finally:
+            self._observe("gait", start, len(body), len(data))
+            
+    async def get_config(self, user_id: Optional[str] = None,
+                         etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
         """Get configuration from the cloud.
         
+        With the ETag of a previous response, the request is conditional
+        and the server can answer 304 Not Modified without a body.
+        
+        Args:
+            user_id: User whose configuration to get (the client's user if None)
+            etag: ETag of the configuration already held
+            
         Returns:
-            Dictionary of configuration values
+            Tuple of (dictionary of configuration values, or None if it is
+            unchanged since etag; ETag of the response)
         """
+        headers = {"If-None-Match": etag} if etag else None
+        
+        start = time.perf_counter_ns()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/rest/v1/user_config",
-                    headers=self.headers,
-                    params={"user_id": f"eq.{self.user_id}", "select": "*"}
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Failed to get config: {error_text}")
-                        raise Exception(f"Config API error: {response.status}")
-                        
-                    config = await response.json()
-                    return config[0] if config else {}
+            session = await self._get_session()
+            async with session.get(
+                f"{self.base_url}/rest/v1/user_config",
+                params={"user_id": f"eq.{user_id or self.user_id}", "select": "*"},
+                headers=headers
+            ) as response:
+                if response.status == 304:
+                    return None, etag
+                    
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Failed to get config: {error_text}")
+                    raise SupabaseError.from_response("Config API error", response)
                     
+                config = await response.json()
+                return (config[0] if config else {}), response.headers.get("ETag")
+                
         except Exception as e:
             logger.error(f"Error getting config from Supabase: {e}")
-            raise 
\ No newline at end of file
+            raise
+            
+        finally:
+            self._observe("config", start, 0)
\ No newline at end of file
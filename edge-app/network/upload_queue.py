@@ -0,0 +1,281 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from network.supabase_client import SupabaseClient, SupabaseError
+from sensors.device_registry import DeviceRegistry
+from storage.local_cache import LocalCache
+
+logger = logging.getLogger("GOSPL.network")
+
+ALERT_SPOOL_FILE = "alerts.jsonl"
+
+# Client errors that will fail the same way on every retry
+PERMANENT_STATUSES = {400, 401, 403, 404, 405, 409, 413, 422}
+
+
+class UploadQueue:
+    """Persistent store-and-forward queue for cloud uploads.
+
+    Alerts are spooled to disk and always sent before bulk gait data, up to
+    ``max_in_flight`` at a time. Gait metrics stay in the LocalCache until
+    the batch that carries them is accepted by the server. Batches are
+    bounded by ``max_batch_records`` and sent when full or when a flush is
+    requested. Failed requests are retried with jittered exponential
+    backoff, honoring Retry-After on 429 responses.
+    """
+
+    def __init__(self, client: SupabaseClient, cache: LocalCache, spool_dir: str,
+                 max_batch_records: int = 500, max_in_flight: int = 4,
+                 base_backoff_s: float = 1.0, max_backoff_s: float = 300.0,
+                 registry: Optional[DeviceRegistry] = None):
+        """Initialize the upload queue.
+
+        Args:
+            client: Supabase client used to send requests
+            cache: Durable store holding gait metrics awaiting upload
+            spool_dir: Directory for the pending alert spool
+            max_batch_records: Maximum number of gait records per request
+            max_in_flight: Maximum number of concurrent requests
+            base_backoff_s: Delay before the first retry
+            max_backoff_s: Upper bound on the retry delay
+            registry: Maps the device index of cached records to user IDs
+        """
+        self.client = client
+        self.cache = cache
+        self.spool_path = Path(spool_dir) / ALERT_SPOOL_FILE
+        self.max_batch_records = max_batch_records
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.registry = registry
+
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.pending_alerts: List[Dict] = self._load_spool()
+
+        # Retry state per lane ("alerts", "gait")
+        self.attempts = {"alerts": 0, "gait": 0}
+        self.retry_at = {"alerts": 0.0, "gait": 0.0}
+
+        self.unsent_records = self.cache.pending_records()
+        self.flush_requested = False
+        self.retries = 0
+
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_spool(self) -> List[Dict]:
+        """Load alerts that were queued but not sent before a restart."""
+        if not self.spool_path.exists():
+            return []
+        alerts = []
+        for line in self.spool_path.read_text().splitlines():
+            try:
+                alerts.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt line in alert spool")
+        if alerts:
+            logger.info(f"Recovered {len(alerts)} unsent alerts")
+        return alerts
+
+    def _write_spool(self) -> None:
+        """Atomically rewrite the alert spool from the pending alerts."""
+        tmp = self.spool_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            for alert in self.pending_alerts:
+                f.write(json.dumps(alert) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.spool_path)
+
+    def put_alert(self, alert: Dict) -> None:
+        """Queue an alert for immediate delivery.
+
+        Args:
+            alert: Alert data dictionary
+        """
+        self.pending_alerts.append(alert)
+        with open(self.spool_path, "a") as f:
+            f.write(json.dumps(alert) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._wake.set()
+
+    def notify_data(self, count: int = 1) -> None:
+        """Tell the queue new gait records were added to the cache.
+
+        Args:
+            count: Number of records added
+        """
+        self.unsent_records += count
+        if self.unsent_records >= self.max_batch_records:
+            self._wake.set()
+
+    def request_flush(self) -> None:
+        """Send all cached gait data, e.g. when the upload interval elapsed."""
+        self.flush_requested = True
+        self._wake.set()
+
+    def stats(self) -> Dict:
+        """Get queue and request metrics of the uploads."""
+        return {
+            "pending_alerts": len(self.pending_alerts),
+            "unsent_records": self.unsent_records,
+            "retries": self.retries,
+            "request_times": dict(self.client.request_times),
+            "bytes_sent": dict(self.client.bytes_sent)
+        }
+
+    async def start(self) -> None:
+        """Start the background sender."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            if self.pending_alerts or self.unsent_records:
+                self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop the background sender; unsent data stays on disk."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Send queued data whenever there is work and no backoff is pending."""
+        while True:
+            await self._wait_for_work()
+            self._wake.clear()
+
+            try:
+                if self.pending_alerts and self._ready("alerts"):
+                    await self._send_alerts()
+
+                # Alerts always go first; gait batches are sent one at a time
+                while (not self.pending_alerts and self._ready("gait")
+                       and self._gait_due()):
+                    if not await self._send_gait_batch():
+                        break
+            except Exception as e:
+                # E.g. a full disk while rewriting the spool; keep the sender alive
+                logger.error(f"Upload queue error: {e}")
+                for lane in self.retry_at:
+                    self._settle(lane, True)
+
+    async def _wait_for_work(self) -> None:
+        """Sleep until woken or until the earliest pending retry is due."""
+        # Gait data only moves once no alerts are waiting
+        deadline = None
+        if self.pending_alerts:
+            deadline = self.retry_at["alerts"]
+        elif self._gait_due():
+            deadline = self.retry_at["gait"]
+
+        # A timer sets the event instead of wait_for(), which can swallow
+        # the cancellation from stop() if the event fires at the same time
+        timer = None
+        if deadline is not None:
+            delay = max(0.0, deadline - time.monotonic())
+            timer = asyncio.get_running_loop().call_later(delay, self._wake.set)
+        try:
+            await self._wake.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _ready(self, lane: str) -> bool:
+        return time.monotonic() >= self.retry_at[lane]
+
+    def _gait_due(self) -> bool:
+        if not self.unsent_records:
+            return False
+        return self.flush_requested or self.unsent_records >= self.max_batch_records
+
+    async def _send_alerts(self) -> None:
+        """Send all pending alerts concurrently."""
+        alerts = list(self.pending_alerts)
+        results = await asyncio.gather(*(self._send(self.client.send_alert, a) for a in alerts))
+
+        failed = False
+        for alert, result in zip(alerts, results):
+            if result is False:
+                failed = True
+            else:
+                # Sent, or rejected permanently
+                self.pending_alerts.remove(alert)
+        self._write_spool()
+        self._settle("alerts", failed)
+
+    async def _send_gait_batch(self) -> bool:
+        """Send the oldest batch of cached gait records.
+
+        Returns:
+            True if the batch was handled and more may follow
+        """
+        records, position = self.cache.read(self.max_batch_records)
+        if not records:
+            self.unsent_records = 0
+            self.flush_requested = False
+            return False
+
+        payload = self.registry.resolve(records) if self.registry else records
+        result = await self._send(self.client.upload_gait_data, payload)
+        if result is False:
+            self._settle("gait", True)
+            return False
+
+        self.cache.ack(position)
+        self.unsent_records = max(0, self.unsent_records - len(records))
+        if len(records) < self.max_batch_records:
+            self.unsent_records = 0
+            self.flush_requested = False
+        self._settle("gait", False)
+        return True
+
+    async def _send(self, method, payload) -> Optional[bool]:
+        """Send one request under the in-flight cap.
+
+        Returns:
+            True on success, None if permanently rejected, False to retry
+        """
+        async with self.in_flight:
+            try:
+                await method(payload)
+                return True
+            except SupabaseError as e:
+                if e.status in PERMANENT_STATUSES:
+                    logger.error(f"Dropping upload rejected with status {e.status}")
+                    return None
+                if e.retry_after is not None:
+                    self._defer(e.retry_after)
+                return False
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                logger.warning(f"Upload failed, will retry: {e}")
+                return False
+
+    def _defer(self, delay_s: float) -> None:
+        """Hold every lane for a server-requested delay."""
+        until = time.monotonic() + min(delay_s, self.max_backoff_s)
+        for lane in self.retry_at:
+            self.retry_at[lane] = max(self.retry_at[lane], until)
+
+    def _settle(self, lane: str, failed: bool) -> None:
+        """Update the backoff state of a lane after a send attempt."""
+        if not failed:
+            self.attempts[lane] = 0
+            return
+
+        self.attempts[lane] += 1
+        self.retries += 1
+        delay = min(self.max_backoff_s, self.base_backoff_s * 2 ** (self.attempts[lane] - 1))
+        delay *= random.uniform(0.5, 1.0)  # Jitter spreads retries across gateways
+        self.retry_at[lane] = max(self.retry_at[lane], time.monotonic() + delay)
+        logger.info(f"Retrying {lane} upload in {delay:.1f}s (attempt {self.attempts[lane]})")
@@ -0,0 +1,176 @@
+import gzip
+import json
+import struct
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional; gzip is used when zstd is unavailable
+    zstandard = None
+
+# Compact columnar encoding of a batch of gait metric records.
+#
+# Layout (little-endian), compressed as a whole with gzip or zstd:
+#   magic "GSPL", version u8, record count u32, column count u8
+#   user_id: length u16 + UTF-8 bytes
+#   base time f64 (seconds), then int32 per record: milliseconds since the
+#   previous record (the first is relative to the base time)
+#   version 2 only: uint16 per record, index into the user table
+#   per column: name length u8 + UTF-8 name, type u8 ("f" float32 or
+#   "i" int32), then one value per record
+#
+# Version 2 batches hold records of several users (multi-device gateways):
+# the user_id field becomes a table, user count u16 followed by length u16 +
+# UTF-8 bytes per user. Single-user batches are always written as version 1.
+MAGIC = b"GSPL"
+VERSION = 1
+MULTI_USER_VERSION = 2
+CONTENT_TYPE = "application/vnd.gospl.gait-batch"
+
+INTEGER_COLUMNS = {"steps_in_window"}
+
+HEADER = struct.Struct("<4sBIB")
+NAME_LENGTH = struct.Struct("<B")
+USER_ID_LENGTH = struct.Struct("<H")
+USER_COUNT = struct.Struct("<H")
+BASE_TIME = struct.Struct("<d")
+COLUMN_TYPE = struct.Struct("<c")
+
+
+def compression_available(name: str) -> bool:
+    """Check whether a compression scheme can be used here."""
+    return name in ("gzip", "none") or (name == "zstd" and zstandard is not None)
+
+
+def compress(payload: bytes, compression: str) -> Tuple[bytes, Optional[str]]:
+    """Compress a payload.
+
+    Args:
+        payload: Raw bytes
+        compression: "zstd", "gzip" or "none"
+
+    Returns:
+        Tuple of (body, Content-Encoding header value or None)
+    """
+    if compression == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=10).compress(payload), "zstd"
+    if compression in ("gzip", "zstd"):
+        return gzip.compress(payload, compresslevel=6), "gzip"
+    return payload, None
+
+
+def decompress(body: bytes, content_encoding: Optional[str]) -> bytes:
+    """Undo compress() given the request's Content-Encoding."""
+    if content_encoding == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd payload but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    if content_encoding == "gzip":
+        return gzip.decompress(body)
+    return body
+
+
+def encode_gait_batch(records: Sequence[Dict], user_id: str) -> bytes:
+    """Encode gait metric records into the columnar batch layout.
+
+    Args:
+        records: Gait metric dictionaries with a timestamp
+        user_id: User ID of records that do not carry their own
+
+    Returns:
+        Uncompressed payload
+    """
+    names = sorted({k for record in records for k in record if k not in ("timestamp", "user_id")})
+    users = [record.get("user_id", user_id) for record in records]
+    user_table = list(dict.fromkeys(users)) or [user_id]
+    version = VERSION if len(user_table) == 1 else MULTI_USER_VERSION
+    times = np.array([record["timestamp"] for record in records], dtype=np.float64)
+    base_time = float(times[0]) if len(times) else 0.0
+
+    # Delta-encode absolute millisecond offsets so rounding never accumulates
+    offsets_ms = np.rint((times - base_time) * 1000).astype(np.int64)
+    deltas = np.diff(offsets_ms, prepend=0).astype("<i4")
+
+    parts = [HEADER.pack(MAGIC, version, len(records), len(names))]
+    if version == MULTI_USER_VERSION:
+        parts.append(USER_COUNT.pack(len(user_table)))
+    for user in user_table:
+        user_bytes = user.encode("utf-8")
+        parts += [USER_ID_LENGTH.pack(len(user_bytes)), user_bytes]
+    parts += [BASE_TIME.pack(base_time), deltas.tobytes()]
+    if version == MULTI_USER_VERSION:
+        index = {user: i for i, user in enumerate(user_table)}
+        parts.append(np.array([index[user] for user in users], dtype="<u2").tobytes())
+    for name in names:
+        kind = b"i" if name in INTEGER_COLUMNS else b"f"
+        dtype = "<i4" if kind == b"i" else "<f4"
+        column = np.array([record.get(name, 0) for record in records], dtype=dtype)
+        name_bytes = name.encode("utf-8")
+        parts += [NAME_LENGTH.pack(len(name_bytes)), name_bytes, COLUMN_TYPE.pack(kind), column.tobytes()]
+
+    return b"".join(parts)
+
+
+def decode_gait_batch(body: bytes, content_encoding: Optional[str] = None) -> List[Dict]:
+    """Decode a columnar batch into rows of the gait_data table schema.
+
+    Intended for the server side of the columnar upload.
+
+    Args:
+        body: Request body
+        content_encoding: Content-Encoding header of the request
+
+    Returns:
+        List of records with user_id, created_at and JSON-encoded metrics
+    """
+    payload = memoryview(decompress(body, content_encoding))
+    magic, version, count, num_columns = HEADER.unpack_from(payload, 0)
+    if magic != MAGIC or version not in (VERSION, MULTI_USER_VERSION):
+        raise ValueError("Not a GOSPL gait batch")
+    pos = HEADER.size
+
+    num_users = 1
+    if version == MULTI_USER_VERSION:
+        (num_users,) = USER_COUNT.unpack_from(payload, pos)
+        pos += USER_COUNT.size
+    user_table = []
+    for _ in range(num_users):
+        (user_length,) = USER_ID_LENGTH.unpack_from(payload, pos)
+        pos += USER_ID_LENGTH.size
+        user_table.append(bytes(payload[pos:pos + user_length]).decode("utf-8"))
+        pos += user_length
+
+    (base_time,) = BASE_TIME.unpack_from(payload, pos)
+    pos += BASE_TIME.size
+    deltas = np.frombuffer(payload, dtype="<i4", count=count, offset=pos)
+    pos += 4 * count
+    times = base_time + np.cumsum(deltas, dtype=np.int64) / 1000
+
+    if version == MULTI_USER_VERSION:
+        users = [user_table[i] for i in np.frombuffer(payload, dtype="<u2", count=count, offset=pos).tolist()]
+        pos += 2 * count
+    else:
+        users = user_table * count
+
+    columns = {}
+    for _ in range(num_columns):
+        (name_length,) = NAME_LENGTH.unpack_from(payload, pos)
+        pos += NAME_LENGTH.size
+        name = bytes(payload[pos:pos + name_length]).decode("utf-8")
+        pos += name_length
+        (kind,) = COLUMN_TYPE.unpack_from(payload, pos)
+        pos += COLUMN_TYPE.size
+        dtype = "<i4" if kind == b"i" else "<f4"
+        columns[name] = np.frombuffer(payload, dtype=dtype, count=count, offset=pos).tolist()
+        pos += 4 * count
+
+    return [
+        {
+            "user_id": users[i],
+            "created_at": datetime.fromtimestamp(timestamp).isoformat(),
+            "metrics": json.dumps({name: values[i] for name, values in columns.items()})
+        }
+        for i, timestamp in enumerate(times.tolist())
+    ]
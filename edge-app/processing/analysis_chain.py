@@ -0,0 +1,134 @@
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from processing.anomaly_detection import AnomalyDetector
+from processing.etl import DataProcessor, SensorFusion
+from processing.gait_analysis import GaitAnalyzer
+from processing.metrics import LatencyHistogram
+from processing.records import Alert, FusedFrame, GaitMetrics, SampleBlock, SensorSample
+
+# What analyze() reports: newly computed gait metrics or None, and anomalies
+AnalysisResult = Tuple[Optional[GaitMetrics], List[Alert]]
+
+
+class AnalysisChain:
+    """Processing state of one device: ETL, fusion, gait analysis and anomaly detection.
+
+    Keeping the whole chain in one object lets it run inline on the event
+    loop or inside a worker process, where it stays resident between calls.
+    Unless monitoring is disabled, ``timings`` holds latency histograms of
+    the processor, gait analysis and anomaly detection calls.
+    """
+
+    def __init__(self, config: Dict):
+        """Initialize the chain.
+
+        Args:
+            config: Full application configuration
+        """
+        sensor_config = config["sensors"]["slipper"]
+        analysis_config = config["analysis"]
+
+        # Sliding window length in samples at the IMU sample rate
+        window_size = int(
+            analysis_config["window_size_s"] * sensor_config["accelerometer"]["sample_rate_hz"]
+        )
+
+        self.processor = DataProcessor(
+            window_size=window_size,
+            num_pressure_sensors=sensor_config["pressure"]["num_sensors"]
+        )
+        self.fusion = SensorFusion(
+            max_lag_ms=analysis_config.get("fusion", {}).get("max_lag_ms", 200)
+        )
+        self.analysis_config = analysis_config
+        self.gait_analyzer = GaitAnalyzer(analysis_config)
+        self.anomaly_detector = AnomalyDetector(analysis_config)
+
+        self.timings: Optional[Dict[str, LatencyHistogram]] = None
+        if config.get("monitoring", {}).get("enabled", True):
+            self.timings = {
+                "processor": LatencyHistogram(),
+                "gait": LatencyHistogram(),
+                "anomaly": LatencyHistogram()
+            }
+
+    def apply_thresholds(self, thresholds: Dict[str, Dict]) -> None:
+        """Override detection thresholds without losing window state.
+
+        Args:
+            thresholds: Values by analysis config section, e.g.
+                {"fall_detection": {"impact_threshold_g": 2.5}}; anything
+                not given falls back to the local configuration
+        """
+        config = dict(self.analysis_config)
+        for section, values in thresholds.items():
+            config[section] = {**self.analysis_config.get(section, {}), **values}
+        self.gait_analyzer.update_config(config)
+        self.anomaly_detector.update_config(config)
+
+    def process(self, data: Union[SensorSample, SampleBlock]) -> List[FusedFrame]:
+        """Turn a raw sample or block into fused frames.
+
+        Args:
+            data: Per-sample sensor event or micro-batched block
+
+        Returns:
+            Fused frames that became ready
+        """
+        timings = self.timings
+        start = time.perf_counter_ns() if timings else 0
+        if isinstance(data, SampleBlock):
+            features = self.processor.process_block(data)
+            if timings:
+                timings["processor"].observe(time.perf_counter_ns() - start, len(data.timestamps))
+            return self.fusion.extend(data.type, features)
+
+        features = self.processor.process(data)
+        if timings:
+            timings["processor"].observe(time.perf_counter_ns() - start)
+        return self.fusion.add(data.type, features)
+
+    def analyze(self, frame: FusedFrame) -> Optional[AnalysisResult]:
+        """Run gait analysis and anomaly detection on a fused frame.
+
+        Args:
+            frame: Fused feature frame
+
+        Returns:
+            Tuple of (newly computed gait metrics or None, anomalies), or
+            None if there is nothing to store or report
+        """
+        timings = self.timings
+        if timings:
+            start = time.perf_counter_ns()
+            gait_metrics = self.gait_analyzer.analyze(frame)
+            analyzed = time.perf_counter_ns()
+            anomalies = self.anomaly_detector.detect(frame, gait_metrics)
+            timings["gait"].observe(analyzed - start)
+            timings["anomaly"].observe(time.perf_counter_ns() - analyzed)
+        else:
+            gait_metrics = self.gait_analyzer.analyze(frame)
+            anomalies = self.anomaly_detector.detect(frame, gait_metrics)
+
+        # Only newly computed gait metrics need caching
+        new_metrics = gait_metrics if self.gait_analyzer.metrics_changed else None
+        if anomalies or new_metrics is not None:
+            return new_metrics, anomalies
+        return None
+
+    def run(self, data: Union[SensorSample, SampleBlock]) -> List[AnalysisResult]:
+        """Process and analyze sensor data in one call.
+
+        Args:
+            data: Per-sample sensor event or micro-batched block
+
+        Returns:
+            Results of analyze() that are not None
+        """
+        results = []
+        for frame in self.process(data):
+            result = self.analyze(frame)
+            if result is not None:
+                results.append(result)
+        return results
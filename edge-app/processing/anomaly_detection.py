@@ -1,8 +1,10 @@
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 from datetime import datetime
 
+from processing.records import Alert, FusedFrame, GaitMetrics
+
 logger = logging.getLogger("GOSPL.anomaly")
 
 class AnomalyDetector:
@@ -23,12 +25,25 @@ class AnomalyDetector:
         self.inactivity_start = None
         self.baseline_gait_speed = None
         
-    def detect(self, processed_data: Dict, gait_metrics: Dict) -> List[Dict]:
+        # Gait metrics object evaluated last; GaitAnalyzer reuses it between steps
+        self.last_gait_metrics = None
+        
+    def update_config(self, config: Dict) -> None:
+        """Switch to new detection parameters, keeping fall and baseline state.
+        
+        Args:
+            config: Configuration dictionary with detection parameters
+        """
+        self.config = config
+        self.fall_config = config["fall_detection"]
+        self.anomaly_config = config["anomaly_detection"]
+        
+    def detect(self, frame: Optional[FusedFrame], gait_metrics: Optional[GaitMetrics]) -> List[Alert]:
         """Detect anomalies in the sensor data and gait patterns.
         
         Args:
-            processed_data: Dictionary of processed sensor features
-            gait_metrics: Dictionary of current gait metrics
+            frame: Fused features of one sample
+            gait_metrics: Current gait metrics
             
         Returns:
             List of detected anomalies
@@ -36,8 +51,8 @@ class AnomalyDetector:
         anomalies = []
         
         # Check for falls
-        if self._detect_fall(processed_data):
-            anomalies.append(self._create_fall_alert(processed_data["timestamp"]))
+        if self._detect_fall(frame):
+            anomalies.append(self._create_fall_alert(frame.timestamp))
             
         # Check for gait anomalies
         gait_anomalies = self._detect_gait_anomalies(gait_metrics)
@@ -45,24 +60,24 @@ class AnomalyDetector:
         
         return anomalies
         
-    def _detect_fall(self, data: Dict) -> bool:
+    def _detect_fall(self, frame: Optional[FusedFrame]) -> bool:
         """Detect if a fall has occurred based on sensor data.
         
         Args:
-            data: Dictionary of processed sensor features
+            frame: Fused features of one sample
             
         Returns:
             True if a fall is detected
         """
-        if not data:
+        if frame is None:
             return False
             
-        current_time = data.get("timestamp")
+        current_time = frame.timestamp
         if not current_time:
             return False
             
         # Check for impact (high acceleration)
-        acc_magnitude = data.get("acc_magnitude", 0)
+        acc_magnitude = frame.acc_magnitude
         if acc_magnitude > self.fall_config["impact_threshold_g"]:
             self.last_impact_time = current_time
             self.inactivity_start = current_time
@@ -84,30 +99,31 @@ class AnomalyDetector:
                 
         return False
         
-    def _detect_gait_anomalies(self, metrics: Dict) -> List[Dict]:
+    def _detect_gait_anomalies(self, metrics: Optional[GaitMetrics]) -> List[Alert]:
         """Detect anomalies in gait patterns.
         
         Args:
-            metrics: Dictionary of current gait metrics
+            metrics: Current gait metrics
             
         Returns:
             List of detected gait anomalies
         """
         anomalies = []
-        if not metrics:
+        if metrics is None or metrics is self.last_gait_metrics:
             return anomalies
+        self.last_gait_metrics = metrics
             
-        timestamp = metrics.get("timestamp")
+        timestamp = metrics.timestamp
         if not timestamp:
             return anomalies
             
         # Update baseline gait speed if not set
-        if self.baseline_gait_speed is None and metrics.get("gait_speed", 0) > 0:
-            self.baseline_gait_speed = metrics["gait_speed"]
+        if self.baseline_gait_speed is None and metrics.gait_speed > 0:
+            self.baseline_gait_speed = metrics.gait_speed
             
         # Check gait speed deviation
         if self.baseline_gait_speed:
-            current_speed = metrics.get("gait_speed", 0)
+            current_speed = metrics.gait_speed
             speed_deviation = abs(current_speed - self.baseline_gait_speed) / self.baseline_gait_speed
             
             if speed_deviation > self.anomaly_config["speed_deviation_threshold"]:
@@ -119,7 +135,7 @@ class AnomalyDetector:
                 ))
                 
         # Check cadence variation
-        cadence_var = metrics.get("step_time_variability", 0)
+        cadence_var = metrics.step_time_variability
         if cadence_var > self.anomaly_config["cadence_variation_threshold"]:
             anomalies.append(self._create_gait_alert(
                 timestamp,
@@ -130,29 +146,29 @@ class AnomalyDetector:
             
         return anomalies
         
-    def _create_fall_alert(self, timestamp: float) -> Dict:
-        """Create a fall alert dictionary.
+    def _create_fall_alert(self, timestamp: float) -> Alert:
+        """Create a fall alert.
         
         Args:
             timestamp: Time of the fall detection
             
         Returns:
-            Alert dictionary
+            Fall alert
         """
-        return {
-            "timestamp": timestamp,
-            "type": "fall",
-            "message": "Possible fall detected",
-            "severity": "critical",
-            "details": {
+        return Alert(
+            timestamp,
+            "fall",
+            "Possible fall detected",
+            "critical",
+            {
                 "detection_time": datetime.fromtimestamp(timestamp).isoformat(),
                 "impact_magnitude": self.fall_config["impact_threshold_g"]
             }
-        }
+        )
         
     def _create_gait_alert(self, timestamp: float, alert_type: str, 
-                          message: str, severity: str) -> Dict:
-        """Create a gait anomaly alert dictionary.
+                          message: str, severity: str) -> Alert:
+        """Create a gait anomaly alert.
         
         Args:
             timestamp: Time of the anomaly detection
@@ -161,14 +177,14 @@ class AnomalyDetector:
             severity: Alert severity level
             
         Returns:
-            Alert dictionary
+            Gait anomaly alert
         """
-        return {
-            "timestamp": timestamp,
-            "type": alert_type,
-            "message": message,
-            "severity": severity,
-            "details": {
+        return Alert(
+            timestamp,
+            alert_type,
+            message,
+            severity,
+            {
                 "detection_time": datetime.fromtimestamp(timestamp).isoformat()
             }
-        } 
\ No newline at end of file
+        ) 
\ No newline at end of file
@@ -1,153 +1,418 @@
+import math
 import numpy as np
-from typing import Dict, List
 from collections import deque
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Union
 import logging
 
+from processing.records import FusedFrame, GyroFeatures, PressureFeatures, SampleBlock, SensorSample
+from processing.ring_buffer import RingBuffer
+from processing.rolling_stats import RollingStats
+
 logger = logging.getLogger("GOSPL.processing")
 
+# Features of one sample, as returned for each channel by DataProcessor
+Features = Union[FusedFrame, GyroFeatures, PressureFeatures]
+
 class DataProcessor:
     """Process raw sensor data into features for gait analysis."""
     
-    def __init__(self, window_size: int = 100):
+    def __init__(self, window_size: int = 100, num_pressure_sensors: int = 4):
         """Initialize the data processor.
         
         Args:
             window_size: Number of samples to keep in sliding window
+            num_pressure_sensors: Number of pressure points per slipper
         """
         self.window_size = window_size
         
-        # Sliding windows for each sensor type
-        self.acc_window = deque(maxlen=window_size)
-        self.gyro_window = deque(maxlen=window_size)
-        self.pressure_window = deque(maxlen=window_size)
+        # Sliding windows for each sensor type (x, y, z columns for the IMUs)
+        self.acc_window = RingBuffer(window_size, 3)
+        self.gyro_window = RingBuffer(window_size, 3)
+        self.pressure_window = RingBuffer(window_size, num_pressure_sensors)
         
-        # Cache for processed data
-        self.cached_data = []
+        # Streaming statistics over the magnitude of each IMU window
+        self.acc_stats = RollingStats(window_size, resolution_bits=20)
+        self.gyro_stats = RollingStats(window_size, resolution_bits=10)
+
         
-    def process(self, raw_data: Dict) -> Dict:
+    def process(self, sample: SensorSample) -> Optional[Features]:
         """Process incoming sensor data.
         
         Args:
-            raw_data: Dictionary containing sensor readings
+            sample: Sensor reading of one channel
+            
+        Returns:
+            Processed features, or None while the window is filling up
+        """
+        data_type = sample.type
+        
+        if data_type == "accelerometer":
+            return self._process_accelerometer(sample.values, sample.timestamp)
+        elif data_type == "gyroscope":
+            return self._process_gyroscope(sample.values, sample.timestamp)
+        elif data_type == "pressure":
+            return self._process_pressure(sample.values, sample.timestamp)
+        else:
+            logger.warning(f"Unknown data type: {data_type}")
+            return None
+            
+    def process_block(self, block: SampleBlock) -> List[Optional[Features]]:
+        """Process a micro-batched block of samples from one sensor channel.
+        
+        Args:
+            block: Timestamps and values of consecutive samples
             
         Returns:
-            Dictionary of processed features
+            List of processed features, one per sample
         """
-        data_type = raw_data["type"]
-        timestamp = raw_data["timestamp"]
+        data_type = block.type
+        timestamps = block.timestamps.tolist()
+        values = block.values.tolist()
         
         if data_type == "accelerometer":
-            return self._process_accelerometer(raw_data["data"], timestamp)
+            process = self._process_accelerometer
         elif data_type == "gyroscope":
-            return self._process_gyroscope(raw_data["data"], timestamp)
+            process = self._process_gyroscope
         elif data_type == "pressure":
-            return self._process_pressure(raw_data["data"], timestamp)
+            process = self._process_pressure
+        else:
+            logger.warning(f"Unknown data type: {data_type}")
+            return []
+            
+        return [process(v, t) for t, v in zip(timestamps, values)]
+            
+    def process_batch(self, block: SampleBlock) -> Dict[str, np.ndarray]:
+        """Process a whole recording of one sensor channel in a single vectorized pass.
+        
+        The result is bit-for-bit identical to feeding the samples one at a
+        time into a fresh DataProcessor: running sums become cumulative sums
+        over the same fixed-point values, and rolling min/max become O(N)
+        filters. The streaming state of this instance is not touched.
+        
+        Args:
+            block: Samples with timestamps (N,) and values (N, width)
+            
+        Returns:
+            Dictionary of feature columns, one row per sample that the
+            streaming path would have produced features for
+        """
+        data_type = block.type
+        timestamps = np.asarray(block.timestamps, dtype=np.float64)
+        values = np.asarray(block.values, dtype=np.float32)
+        
+        if data_type == "accelerometer":
+            return self._batch_accelerometer(timestamps, values)
+        elif data_type == "gyroscope":
+            return self._batch_gyroscope(timestamps, values)
+        elif data_type == "pressure":
+            return self._batch_pressure(timestamps, values)
         else:
             logger.warning(f"Unknown data type: {data_type}")
             return {}
             
-    def _process_accelerometer(self, data: Dict, timestamp: float) -> Dict:
+    def _rolling_sums(self, quantized: np.ndarray) -> np.ndarray:
+        """Get trailing-window sums of fixed-point values.
+        
+        Cumulative sums may wrap around in int64, but window differences are
+        exact as long as a single window's sum fits, matching RollingStats.
+        
+        Args:
+            quantized: Fixed-point sample values
+            
+        Returns:
+            Sum of each sample's window
+        """
+        cumulative = np.cumsum(quantized)
+        sums = cumulative.copy()
+        sums[self.window_size:] -= cumulative[:-self.window_size]
+        return sums
+        
+    def _rolling_mean_std(self, magnitude: np.ndarray, scale: int) -> tuple:
+        """Get the trailing-window mean and std, exactly as RollingStats does.
+        
+        Args:
+            magnitude: Per-sample magnitudes
+            scale: Fixed-point scale of the matching RollingStats
+            
+        Returns:
+            Tuple of (mean, std) arrays
+        """
+        quantized = np.rint(magnitude * scale).astype(np.int64)
+        counts = np.minimum(np.arange(1, len(magnitude) + 1), self.window_size)
+        
+        mean = self._rolling_sums(quantized).astype(np.float64)
+        mean /= counts * scale
+        variance = self._rolling_sums(quantized * quantized).astype(np.float64)
+        variance /= counts * scale * scale
+        variance -= mean * mean
+        std = np.sqrt(np.maximum(variance, 0.0, out=variance), out=variance)
+        
+        return mean, std
+        
+    def _batch_accelerometer(self, timestamps: np.ndarray, values: np.ndarray) -> Dict:
+        """Vectorized counterpart of _process_accelerometer."""
+        # Imported here: scipy dominates startup time and streaming never needs it
+        from scipy.ndimage import maximum_filter1d, minimum_filter1d
+        
+        ax, ay, az = np.ascontiguousarray(values.T, dtype=np.float64)
+        resultant = np.sqrt(ax * ax + ay * ay + az * az)
+        
+        mean, std = self._rolling_mean_std(resultant, self.acc_stats.scale)
+        origin = (self.window_size - 1) // 2  # Trailing window ending at each sample
+        acc_max = maximum_filter1d(resultant, self.window_size, mode="nearest", origin=origin)
+        acc_min = minimum_filter1d(resultant, self.window_size, mode="nearest", origin=origin)
+        
+        # The streaming path needs two samples before emitting features
+        return {
+            "timestamp": timestamps[1:],
+            "acc_magnitude": resultant[1:],
+            "acc_mean": mean[1:],
+            "acc_std": std[1:],
+            "acc_min": acc_min[1:],
+            "acc_max": acc_max[1:],
+            "vertical_acceleration": ay[1:]
+        }
+        
+    def _batch_gyroscope(self, timestamps: np.ndarray, values: np.ndarray) -> Dict:
+        """Vectorized counterpart of _process_gyroscope."""
+        gx, gy, gz = np.ascontiguousarray(values.T, dtype=np.float64)
+        angular_velocity = np.sqrt(gx * gx + gy * gy + gz * gz)
+        
+        mean, _ = self._rolling_mean_std(angular_velocity, self.gyro_stats.scale)
+        
+        return {
+            "timestamp": timestamps[1:],
+            "angular_velocity": angular_velocity[1:],
+            "angular_velocity_mean": mean[1:],
+            "rotation_y": gy[1:]
+        }
+        
+    def _batch_pressure(self, timestamps: np.ndarray, values: np.ndarray) -> Dict:
+        """Vectorized counterpart of _process_pressure."""
+        pressures = values[1:]
+        
+        total_pressure = np.sum(pressures, axis=1)
+        max_pressure = np.max(pressures, axis=1)
+        pressure_ratio = max_pressure / (np.mean(pressures, axis=1) + 1e-6)
+        
+        return {
+            "timestamp": timestamps[1:],
+            "total_pressure": total_pressure.astype(np.float64),
+            "max_pressure": max_pressure.astype(np.float64),
+            "pressure_ratio": pressure_ratio.astype(np.float64)
+        }
+        
+    def _process_accelerometer(self, values: Sequence[float], timestamp: float) -> Optional[FusedFrame]:
         """Process accelerometer data.
         
         Args:
-            data: Dictionary with ax, ay, az values
+            values: ax, ay, az values
             timestamp: Time of measurement
             
         Returns:
-            Processed features from accelerometer
+            Frame with the accelerometer features filled in
         """
         # Add to sliding window
-        self.acc_window.append((timestamp, data))
+        self.acc_window.append(timestamp, values)
+        
+        # Resultant of the stored (float32) sample, updated into the running stats
+        ax, ay, az = self.acc_window.latest().tolist()
+        resultant = math.sqrt(ax * ax + ay * ay + az * az)
+        self.acc_stats.push(resultant)
         
-        # Convert recent window to numpy array for processing
         if len(self.acc_window) < 2:
-            return {}
+            return None
             
-        recent_data = np.array([[d["ax"], d["ay"], d["az"]] 
-                               for _, d in self.acc_window])
-        
         # Calculate features
-        resultant = np.sqrt(np.sum(recent_data**2, axis=1))
-        
-        features = {
-            "timestamp": timestamp,
-            "acc_magnitude": float(resultant[-1]),
-            "acc_mean": float(np.mean(resultant)),
-            "acc_std": float(np.std(resultant)),
-            "vertical_acceleration": float(recent_data[-1, 1])  # Assuming y is vertical
-        }
+        return FusedFrame(
+            timestamp,
+            resultant,
+            self.acc_stats.mean(),
+            self.acc_stats.std(),
+            self.acc_stats.min(),
+            self.acc_stats.max(),
+            ay  # Assuming y is vertical
+        )
         
-        return features
-        
-    def _process_gyroscope(self, data: Dict, timestamp: float) -> Dict:
+    def _process_gyroscope(self, values: Sequence[float], timestamp: float) -> Optional[GyroFeatures]:
         """Process gyroscope data.
         
         Args:
-            data: Dictionary with gx, gy, gz values
+            values: gx, gy, gz values
             timestamp: Time of measurement
             
         Returns:
             Processed features from gyroscope
         """
         # Add to sliding window
-        self.gyro_window.append((timestamp, data))
+        self.gyro_window.append(timestamp, values)
+        
+        # Angular velocity of the stored (float32) sample
+        gx, gy, gz = self.gyro_window.latest().tolist()
+        angular_velocity = math.sqrt(gx * gx + gy * gy + gz * gz)
+        self.gyro_stats.push(angular_velocity)
         
         if len(self.gyro_window) < 2:
-            return {}
+            return None
             
-        recent_data = np.array([[d["gx"], d["gy"], d["gz"]] 
-                               for _, d in self.gyro_window])
-        
         # Calculate angular velocity features
-        angular_velocity = np.sqrt(np.sum(recent_data**2, axis=1))
-        
-        features = {
-            "timestamp": timestamp,
-            "angular_velocity": float(angular_velocity[-1]),
-            "angular_velocity_mean": float(np.mean(angular_velocity)),
-            "rotation_y": float(recent_data[-1, 1])  # Sagittal plane rotation
-        }
+        return GyroFeatures(timestamp, angular_velocity, self.gyro_stats.mean(), gy)
         
-        return features
-        
-    def _process_pressure(self, data: Dict, timestamp: float) -> Dict:
+    def _process_pressure(self, values: Sequence[float], timestamp: float) -> Optional[PressureFeatures]:
         """Process pressure sensor data.
         
         Args:
-            data: Dictionary with pressure values
+            values: One reading per pressure sensor
             timestamp: Time of measurement
             
         Returns:
             Processed features from pressure sensors
         """
         # Add to sliding window
-        self.pressure_window.append((timestamp, data))
+        self.pressure_window.append(timestamp, values)
         
         if len(self.pressure_window) < 2:
-            return {}
+            return None
             
-        pressures = np.array(data["pressures"])
+        pressures = self.pressure_window.latest()
         
         # Calculate pressure distribution features
         total_pressure = np.sum(pressures)
         max_pressure = np.max(pressures)
         pressure_ratio = np.max(pressures) / (np.mean(pressures) + 1e-6)
         
-        features = {
-            "timestamp": timestamp,
-            "total_pressure": float(total_pressure),
-            "max_pressure": float(max_pressure),
-            "pressure_ratio": float(pressure_ratio)
+        return PressureFeatures(timestamp, float(total_pressure), float(max_pressure), float(pressure_ratio))
+
+
+class SensorFusion:
+    """Align per-channel features onto the accelerometer clock as fused frames.
+    
+    Accelerometer features define the common clock, so impact peaks reach
+    fall detection unsmoothed. Gyroscope and pressure features are linearly
+    interpolated onto those timestamps once every stream has caught up, or
+    once a lagging stream is more than ``max_lag_ms`` behind, in which case
+    its last value is held.
+    """
+    
+    REFERENCE_CHANNEL = "accelerometer"
+    CHANNEL_FEATURES = {
+        "gyroscope": ("angular_velocity", "angular_velocity_mean", "rotation_y"),
+        "pressure": ("total_pressure", "max_pressure", "pressure_ratio")
+    }
+    # Reads a channel's feature values off its record in one call
+    _FEATURE_GETTERS = {channel: attrgetter(*names) for channel, names in CHANNEL_FEATURES.items()}
+    
+    def __init__(self, max_lag_ms: float = 200, history_size: int = 64):
+        """Initialize the fusion stage.
+        
+        Args:
+            max_lag_ms: How long to wait for a lagging stream before emitting
+            history_size: Number of recent samples kept per secondary channel
+        """
+        self.max_lag_s = max_lag_ms / 1000
+        
+        # Reference features waiting for the other streams to catch up
+        self.pending = deque()
+        self.latest_reference_time = None
+        
+        self.windows = {
+            channel: RingBuffer(history_size, len(names))
+            for channel, names in self.CHANNEL_FEATURES.items()
         }
         
-        return features
+    def add(self, data_type: str, features: Optional[Features]) -> List[FusedFrame]:
+        """Add processed features from one channel.
         
-    def get_cached_data(self) -> List[Dict]:
-        """Get cached processed data for upload.
+        Args:
+            data_type: Sensor channel the features came from
+            features: Processed features for a single sample
+            
+        Returns:
+            Fused frames that became ready
+        """
+        self._store(data_type, features)
+        return self._emit()
         
+    def extend(self, data_type: str, features: List[Optional[Features]]) -> List[FusedFrame]:
+        """Add processed features for a block of samples from one channel.
+        
+        Args:
+            data_type: Sensor channel the features came from
+            features: Processed features, one per sample
+            
         Returns:
-            List of processed data records
+            Fused frames that became ready
         """
-        data = self.cached_data.copy()
-        self.cached_data = []  # Clear cache after retrieval
-        return data 
\ No newline at end of file
+        for sample_features in features:
+            self._store(data_type, sample_features)
+        return self._emit()
+        
+    def fuse_batch(self, columns: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """Fuse whole recordings of feature columns, e.g. from process_batch.
+        
+        Args:
+            columns: Feature columns keyed by sensor channel
+            
+        Returns:
+            Feature columns of all channels on the accelerometer clock
+        """
+        fused = dict(columns[self.REFERENCE_CHANNEL])
+        times = fused["timestamp"]
+        for channel, names in self.CHANNEL_FEATURES.items():
+            channel_columns = columns.get(channel)
+            if not channel_columns or not len(channel_columns["timestamp"]):
+                continue
+            for name in names:
+                fused[name] = np.interp(times, channel_columns["timestamp"], channel_columns[name])
+                
+        return fused
+        
+    def _store(self, data_type: str, features: Optional[Features]) -> None:
+        """Buffer features of one sample."""
+        if features is None:
+            return
+            
+        if data_type == self.REFERENCE_CHANNEL:
+            self.pending.append(features)
+            self.latest_reference_time = features.timestamp
+        elif data_type in self.windows:
+            self.windows[data_type].append(
+                features.timestamp, self._FEATURE_GETTERS[data_type](features)
+            )
+            
+    def _emit(self) -> List[FusedFrame]:
+        """Fuse and return reference frames that every stream has covered.
+        
+        Returns:
+            List of fused frames
+        """
+        if not self.pending:
+            return []
+            
+        latest = [float(w.timestamps()[-1]) for w in self.windows.values() if len(w)]
+        newest = max(latest + [self.latest_reference_time])
+        horizon = newest - self.max_lag_s
+        if len(latest) == len(self.windows):
+            horizon = max(horizon, min(latest))
+            
+        ready = []
+        while self.pending and self.pending[0].timestamp <= horizon:
+            ready.append(self.pending.popleft())
+        if not ready:
+            return []
+            
+        # Interpolate every secondary feature column for all ready frames at once
+        times = np.fromiter((f.timestamp for f in ready), dtype=np.float64, count=len(ready))
+        for channel, names in self.CHANNEL_FEATURES.items():
+            window = self.windows[channel]
+            if not len(window):
+                continue
+                
+            window_times = window.timestamps()
+            for index, name in enumerate(names):
+                column = np.interp(times, window_times, window.column(index)).tolist()
+                for frame, value in zip(ready, column):
+                    setattr(frame, name, value)
+                    
+        return ready
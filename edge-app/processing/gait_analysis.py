@@ -1,12 +1,20 @@
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
 import logging
 
+from processing.records import FusedFrame, GaitMetrics
+
 logger = logging.getLogger("GOSPL.gait")
 
 class GaitAnalyzer:
     """Analyze gait patterns from processed sensor data."""
     
+    # Pressure needed to confirm a foot strike (arbitrary, would be calibrated)
+    MIN_STEP_PRESSURE = 0.5
+    # Number of recent stride length estimates kept
+    STRIDE_HISTORY = 100
+    
     def __init__(self, config: Dict):
         """Initialize the gait analyzer.
         
@@ -18,40 +26,162 @@ class GaitAnalyzer:
         
         # State for step detection
         self.last_step_time: Optional[float] = None
-        self.steps_buffer: List[Tuple[float, float]] = []  # (timestamp, magnitude)
-        self.stride_lengths: List[float] = []
+        self.steps_buffer: Deque[Tuple[float, float]] = deque()  # (timestamp, magnitude)
+        self.stride_lengths: Deque[float] = deque(maxlen=self.STRIDE_HISTORY)
+        
+        # Memoized metrics, recomputed only after the step buffer changes
+        self.last_metrics: Optional[GaitMetrics] = None
+        self._metrics_stale = False
+        self.metrics_changed = False
+        
+    def update_config(self, config: Dict) -> None:
+        """Switch to new analysis parameters, keeping the detected steps.
+        
+        Args:
+            config: Configuration dictionary with analysis parameters
+        """
+        self.config = config
+        self.step_config = config["step_detection"]
         
-    def analyze(self, processed_data: Dict) -> Dict:
+    def analyze(self, frame: Optional[FusedFrame]) -> Optional[GaitMetrics]:
         """Analyze processed sensor data for gait patterns.
         
         Args:
-            processed_data: Dictionary of processed sensor features
+            frame: Fused features of one sample
             
         Returns:
-            Dictionary of gait metrics
+            Gait metrics, or None until two steps have been seen. Between
+            steps this is the same, unchanged object as the previous call;
+            check metrics_changed to see whether it was recomputed.
         """
-        if not processed_data:
-            return {}
+        self.metrics_changed = False
+        if frame is None:
+            return None
             
-        timestamp = processed_data.get("timestamp")
+        timestamp = frame.timestamp
         if not timestamp:
-            return {}
+            return None
             
         # Detect steps from vertical acceleration and pressure
-        step_detected = self._detect_step(
-            timestamp,
-            processed_data.get("vertical_acceleration", 0),
-            processed_data.get("total_pressure", 0)
+        if self._detect_step(timestamp, frame.vertical_acceleration, frame.total_pressure):
+            # The step buffer changed, metrics are recomputed on next access
+            self._metrics_stale = True
+            
+        return self.current_metrics()
+        
+    def current_metrics(self) -> Optional[GaitMetrics]:
+        """Get the latest gait metrics, computing them only if new steps arrived.
+        
+        Returns:
+            The last computed gait metrics (None until at least two steps
+            have been seen)
+        """
+        if self._metrics_stale:
+            self._metrics_stale = False
+            if len(self.steps_buffer) >= 2:
+                self.last_metrics = self._compute_gait_metrics(self.steps_buffer[-1][0])
+                self.metrics_changed = True
+                
+        return self.last_metrics
+        
+    def analyze_batch(self, fused: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Detect steps and compute gait metrics over a whole fused recording.
+        
+        Steps are the peaks of |vertical acceleration| above the step
+        threshold, at least min_step_interval_ms apart, where pressure
+        confirms a foot strike. Metrics are computed for every step over
+        the steps in the preceding window, like the streaming path. The
+        streaming state of this instance is not touched.
+        
+        Args:
+            fused: Fused feature columns (see SensorFusion.fuse_batch)
+            
+        Returns:
+            Dictionary of gait metric columns, one row per step that has
+            at least one earlier step in its window
+        """
+        # Imported here: scipy dominates startup time and streaming never needs it
+        from scipy.signal import find_peaks
+        
+        times = np.asarray(fused["timestamp"], dtype=np.float64)
+        signal = np.abs(np.asarray(fused["vertical_acceleration"], dtype=np.float64))
+        if "total_pressure" in fused:
+            signal[np.asarray(fused["total_pressure"]) < self.MIN_STEP_PRESSURE] = 0.0
+            
+        if len(times) < 2:
+            return self._empty_batch_metrics()
+            
+        # Minimum step interval expressed in samples at the recording's rate
+        sample_period = float(np.median(np.diff(times)))
+        min_interval_s = self.step_config["min_step_interval_ms"] / 1000
+        distance = max(1, int(np.ceil(min_interval_s / sample_period))) if sample_period > 0 else 1
+        
+        peaks, _ = find_peaks(
+            signal,
+            height=self.step_config["acc_threshold_g"],
+            distance=distance
         )
+        step_times = times[peaks]
+        step_accels = signal[peaks]
+        return self._batch_metrics(step_times, step_accels)
         
-        if step_detected:
-            # Update gait metrics when a step is detected
-            metrics = self._compute_gait_metrics(timestamp)
-        else:
-            # Return current state without updates
-            metrics = self._get_current_metrics()
+    def _batch_metrics(self, step_times: np.ndarray, step_accels: np.ndarray) -> Dict[str, np.ndarray]:
+        """Compute gait metrics for every step window in one vectorized pass.
+        
+        Args:
+            step_times: Timestamps of detected steps
+            step_accels: Acceleration magnitude at each step
             
-        return metrics
+        Returns:
+            Dictionary of gait metric columns
+        """
+        if len(step_times) < 2:
+            return self._empty_batch_metrics()
+            
+        # First step inside each step's window
+        starts = np.searchsorted(step_times, step_times - self.config["window_size_s"], side="left")
+        counts = np.arange(len(step_times)) - starts + 1
+        valid = counts >= 2
+        
+        # Window sums via prefix sums; interval j is step_times[j+1] - step_times[j]
+        intervals = np.diff(step_times)
+        interval_sum = np.concatenate(([0.0], np.cumsum(intervals)))
+        interval_sq_sum = np.concatenate(([0.0], np.cumsum(intervals * intervals)))
+        accel_sum = np.concatenate(([0.0], np.cumsum(step_accels)))
+        
+        end = np.arange(len(step_times))[valid]
+        start = starts[valid]
+        n_intervals = end - start
+        n_steps = counts[valid]
+        
+        mean_interval = (interval_sum[end] - interval_sum[start]) / n_intervals
+        mean_sq_interval = (interval_sq_sum[end] - interval_sq_sum[start]) / n_intervals
+        std_interval = np.sqrt(np.maximum(mean_sq_interval - mean_interval ** 2, 0.0))
+        mean_accel = (accel_sum[end + 1] - accel_sum[start]) / n_steps
+        
+        cadence = 60 / mean_interval
+        estimated_stride = 0.5 * mean_accel * mean_interval ** 2
+        
+        return {
+            "timestamp": step_times[valid],
+            "cadence": cadence,
+            "step_time_variability": std_interval / mean_interval,
+            "estimated_stride_length": estimated_stride,
+            "gait_speed": estimated_stride * cadence / 120,
+            "steps_in_window": n_steps
+        }
+        
+    def _empty_batch_metrics(self) -> Dict[str, np.ndarray]:
+        """Get gait metric columns with no rows."""
+        empty = np.empty(0, dtype=np.float64)
+        return {
+            "timestamp": empty,
+            "cadence": empty,
+            "step_time_variability": empty,
+            "estimated_stride_length": empty,
+            "gait_speed": empty,
+            "steps_in_window": np.empty(0, dtype=np.int64)
+        }
         
     def _detect_step(self, timestamp: float, vert_acc: float, pressure: float) -> bool:
         """Detect if a step has occurred based on sensor data.
@@ -75,7 +205,7 @@ class GaitAnalyzer:
                 return False
                 
         # Confirm with pressure reading (should be high during foot strike)
-        if pressure < 0.5:  # Arbitrary threshold, would be calibrated
+        if pressure < self.MIN_STEP_PRESSURE:
             return False
             
         # Step detected
@@ -85,22 +215,19 @@ class GaitAnalyzer:
         # Keep only recent steps
         while (self.steps_buffer and 
                timestamp - self.steps_buffer[0][0] > self.config["window_size_s"]):
-            self.steps_buffer.pop(0)
+            self.steps_buffer.popleft()
             
         return True
         
-    def _compute_gait_metrics(self, current_time: float) -> Dict:
-        """Compute gait metrics when a new step is detected.
+    def _compute_gait_metrics(self, current_time: float) -> GaitMetrics:
+        """Compute gait metrics from a step buffer holding at least two steps.
         
         Args:
             current_time: Current timestamp
             
         Returns:
-            Dictionary of gait metrics
+            Gait metrics over the step buffer
         """
-        if len(self.steps_buffer) < 2:
-            return self._get_current_metrics()
-            
         # Calculate step timing metrics
         step_times = np.diff([t for t, _ in self.steps_buffer])
         cadence = 60 / np.mean(step_times)  # steps per minute
@@ -117,35 +244,11 @@ class GaitAnalyzer:
         # Calculate gait speed
         gait_speed = estimated_stride * cadence / 120  # meters per second
         
-        # Prepare metrics dictionary
-        metrics = {
-            "timestamp": current_time,
-            "cadence": float(cadence),
-            "step_time_variability": float(step_time_variability),
-            "estimated_stride_length": float(estimated_stride),
-            "gait_speed": float(gait_speed),
-            "steps_in_window": len(self.steps_buffer)
-        }
-        
-        return metrics
-        
-    def _get_current_metrics(self) -> Dict:
-        """Get current gait metrics without updates.
-        
-        Returns:
-            Dictionary of current gait metrics
-        """
-        if not self.steps_buffer:
-            return {}
-            
-        # Return last known values
-        last_metrics = {
-            "timestamp": self.steps_buffer[-1][0],
-            "cadence": 0.0,
-            "step_time_variability": 0.0,
-            "estimated_stride_length": 0.0,
-            "gait_speed": 0.0,
-            "steps_in_window": len(self.steps_buffer)
-        }
-        
-        return last_metrics 
\ No newline at end of file
+        return GaitMetrics(
+            current_time,
+            float(cadence),
+            float(step_time_variability),
+            float(estimated_stride),
+            float(gait_speed),
+            len(self.steps_buffer)
+        )
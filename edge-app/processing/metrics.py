@@ -0,0 +1,173 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+# Upper bucket bounds in microseconds, from a cheap sample to a stalled loop
+LATENCY_BUCKETS_US = (
+    1, 2, 5, 10, 20, 50, 100, 200, 500,
+    1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram that is cheap enough for the hot path.
+
+    Recording is one bisect over the bucket bounds and a few integer
+    additions. Histograms are plain objects, so worker processes can
+    return theirs to be merged in the main process.
+    """
+
+    def __init__(self, bounds_us: Iterable[float] = LATENCY_BUCKETS_US):
+        """Initialize the histogram.
+
+        Args:
+            bounds_us: Ascending upper bounds of the buckets in microseconds
+        """
+        self.bounds_us = tuple(bounds_us)
+        self.bounds_ns = [int(bound * 1000) for bound in self.bounds_us]
+        self.buckets = [0] * (len(self.bounds_ns) + 1)  # Last one is +Inf
+        self.count = 0
+        self.samples = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def observe(self, elapsed_ns: int, samples: int = 1) -> None:
+        """Record one call.
+
+        Args:
+            elapsed_ns: Duration of the call in nanoseconds
+            samples: Sensor samples (or records) the call handled
+        """
+        self.buckets[bisect_left(self.bounds_ns, elapsed_ns)] += 1
+        self.count += 1
+        self.samples += samples
+        self.sum_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the observations of another histogram with the same buckets."""
+        for i, count in enumerate(other.buckets):
+            self.buckets[i] += count
+        self.count += other.count
+        self.samples += other.samples
+        self.sum_ns += other.sum_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of its bucket.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Latency in microseconds (the maximum for the +Inf bucket)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                if i < len(self.bounds_us):
+                    return float(min(self.bounds_us[i], self.max_ns / 1000))
+                break
+        return self.max_ns / 1000
+
+    def snapshot(self) -> Dict:
+        """Get summary statistics."""
+        return {
+            "count": self.count,
+            "samples": self.samples,
+            "mean_us": round(self.sum_ns / self.count / 1000, 2) if self.count else 0.0,
+            "p50_us": round(self.quantile(0.5), 2),
+            "p99_us": round(self.quantile(0.99), 2),
+            "max_us": round(self.max_ns / 1000, 2),
+            "ns_per_sample": round(self.sum_ns / self.samples) if self.samples else 0
+        }
+
+
+def merge_histograms(groups: Iterable[Dict[str, LatencyHistogram]]) -> Dict[str, LatencyHistogram]:
+    """Merge mappings of name to histogram, e.g. the timings of several devices."""
+    merged: Dict[str, LatencyHistogram] = {}
+    for group in groups:
+        for name, histogram in group.items():
+            if name not in merged:
+                merged[name] = LatencyHistogram(histogram.bounds_us)
+            merged[name].merge(histogram)
+    return merged
+
+
+def snapshot_metrics(metrics):
+    """Convert collected metrics into JSON-serializable values."""
+    if isinstance(metrics, LatencyHistogram):
+        return metrics.snapshot()
+    if isinstance(metrics, dict):
+        return {key: snapshot_metrics(value) for key, value in metrics.items()}
+    return metrics
+
+
+def _escape_label(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusText:
+    """Builder of the Prometheus text exposition format.
+
+    Samples may be added in any order; they are rendered grouped by metric
+    family, since the format requires all lines of a family to be contiguous.
+    """
+
+    def __init__(self, prefix: str = "gospl_"):
+        self.prefix = prefix
+        self.families: Dict[str, List[str]] = {}  # Name -> lines, in order of first use
+
+    @staticmethod
+    def _labels(labels: Optional[Dict]) -> str:
+        if not labels:
+            return ""
+        pairs = ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+        return "{" + pairs + "}"
+
+    def _family(self, name: str, kind: str, help_text: str) -> List[str]:
+        """Get the lines of a metric family, declaring it on first use."""
+        lines = self.families.get(name)
+        if lines is None:
+            lines = self.families[name] = []
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        return lines
+
+    def add(self, name: str, value, labels: Optional[Dict] = None,
+            kind: str = "gauge", help_text: str = "") -> None:
+        """Add a gauge or counter sample.
+
+        Args:
+            name: Metric name without the prefix
+            value: Numeric value (booleans become 0 or 1)
+            labels: Label names and values
+            kind: "gauge" or "counter"
+            help_text: Description, emitted with the first sample
+        """
+        name = self.prefix + name
+        self._family(name, kind, help_text).append(f"{name}{self._labels(labels)} {float(value):g}")
+
+    def histogram(self, name: str, histogram: LatencyHistogram,
+                  labels: Optional[Dict] = None, help_text: str = "") -> None:
+        """Add a latency histogram in seconds."""
+        name = self.prefix + name
+        lines = self._family(name, "histogram", help_text)
+        labels = labels or {}
+        cumulative = 0
+        for bound, count in zip(histogram.bounds_us, histogram.buckets):
+            cumulative += count
+            bucket_labels = self._labels({**labels, "le": f"{bound / 1e6:g}"})
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_bucket{self._labels({**labels, 'le': '+Inf'})} {histogram.count}")
+        lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum_ns / 1e9:g}")
+        lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+
+    def render(self) -> str:
+        return "\n".join(line for lines in self.families.values() for line in lines) + "\n"
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+
+logger = logging.getLogger("GOSPL.pipeline")
+
+
+class StageQueue:
+    """Bounded queue between two pipeline stages with an overflow policy.
+
+    With the "drop_oldest" policy a full queue discards its oldest item to
+    make room, which suits telemetry where fresh data matters most. Items
+    put as protected (e.g. accelerometer blocks holding an impact) are
+    never discarded: the oldest unprotected item goes instead, and when
+    only protected items are queued a protected item waits for space while
+    any other is dropped. With "block" the producer waits for space, so
+    nothing is ever dropped.
+    """
+
+    POLICIES = ("drop_oldest", "block")
+
+    def __init__(self, name: str, maxsize: int, policy: str = "block"):
+        """Initialize the queue.
+
+        Args:
+            name: Queue name used in stats
+            maxsize: Maximum number of queued items (unbounded if 0)
+            policy: Overflow policy, "drop_oldest" or "block"
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+
+        self.name = name
+        self.policy = policy
+        self.maxsize = maxsize
+        self.items: Deque[Tuple[Any, bool]] = deque()  # (item, protected)
+        self.high_water = 0
+        self.dropped = 0
+
+        # Items taken but not yet marked done, for join()
+        self._unfinished = 0
+        self._added = asyncio.Event()
+        self._removed = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    async def put(self, item, protected: bool = False) -> None:
+        """Add an item, applying the overflow policy when full.
+
+        Args:
+            item: Item for the consuming stage
+            protected: Never drop the item, even under the "drop_oldest" policy
+        """
+        while 0 < self.maxsize <= len(self.items):
+            if self.policy == "drop_oldest":
+                if self._drop_oldest():
+                    continue
+                if not protected:
+                    self.dropped += 1  # Everything queued is protected
+                    return
+            self._removed.clear()
+            await self._removed.wait()
+
+        self.items.append((item, protected))
+        self._unfinished += 1
+        self._finished.clear()
+        self._added.set()
+
+        depth = len(self.items)
+        if depth > self.high_water:
+            self.high_water = depth
+
+    def _drop_oldest(self) -> bool:
+        """Discard the oldest unprotected item; False if there is none."""
+        for index, (_, protected) in enumerate(self.items):
+            if not protected:
+                del self.items[index]
+                self.dropped += 1
+                self.task_done()
+                return True
+        return False
+
+    async def get(self):
+        """Remove and return the oldest item, waiting until there is one."""
+        while not self.items:
+            self._added.clear()
+            await self._added.wait()
+        item, _ = self.items.popleft()
+        self._removed.set()
+        return item
+
+    def task_done(self) -> None:
+        """Mark an item returned by get() as handled."""
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._finished.set()
+
+    async def join(self) -> None:
+        """Wait until every queued item has been handled."""
+        await self._finished.wait()
+
+    def stats(self) -> Dict:
+        """Get queue depth metrics."""
+        return {
+            "depth": len(self.items),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "dropped": self.dropped,
+            "policy": self.policy
+        }
+
+
+class Pipeline:
+    """Stages connected by bounded queues, each drained by its own worker task."""
+
+    def __init__(self):
+        self.queues: Dict[str, StageQueue] = {}
+        self.workers: List = []  # (name, queue, handler)
+        self.tasks: List[asyncio.Task] = []
+
+    def add_queue(self, name: str, maxsize: int, policy: str = "block") -> StageQueue:
+        """Create a named queue.
+
+        Args:
+            name: Queue name
+            maxsize: Maximum number of queued items
+            policy: Overflow policy, "drop_oldest" or "block"
+
+        Returns:
+            The new queue
+        """
+        queue = StageQueue(name, maxsize, policy)
+        self.queues[name] = queue
+        return queue
+
+    def add_stage(self, name: str, queue: StageQueue,
+                  handler: Callable[..., Awaitable[None]]) -> None:
+        """Register a stage that handles every item from a queue.
+
+        Args:
+            name: Stage name used in logs
+            queue: Queue the stage consumes
+            handler: Async function called with each item
+        """
+        self.workers.append((name, queue, handler))
+
+    async def _run_stage(self, name: str, queue: StageQueue,
+                         handler: Callable[..., Awaitable[None]]) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await handler(item)
+            except Exception as e:
+                logger.error(f"Error in {name} stage: {e}")
+            finally:
+                queue.task_done()
+
+    def start(self) -> None:
+        """Start one worker task per stage."""
+        for name, queue, handler in self.workers:
+            self.tasks.append(asyncio.create_task(self._run_stage(name, queue, handler)))
+
+    async def stop(self, drain_timeout_s: float = 2.0) -> None:
+        """Let queued items drain for a while, then cancel all stage workers.
+
+        Args:
+            drain_timeout_s: Maximum time to wait for queues to empty
+        """
+        if self.tasks:
+            await self.drain(drain_timeout_s)
+
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def drain(self, timeout_s: float) -> None:
+        """Wait for a while until every queue is empty and its items handled.
+
+        Args:
+            timeout_s: Maximum time to wait
+        """
+        try:
+            # Queues were added upstream first, so drain in that order
+            await asyncio.wait_for(self._drain(), timeout_s)
+        except asyncio.TimeoutError:
+            logger.warning("Pipeline did not drain before shutdown")
+
+    async def _drain(self) -> None:
+        for queue in self.queues.values():
+            await queue.join()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get depth metrics for every queue."""
+        return {name: queue.stats() for name, queue in self.queues.items()}
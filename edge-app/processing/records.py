@@ -0,0 +1,176 @@
+"""Records passed between the pipeline stages.
+
+SlipperSensor -> DataProcessor -> SensorFusion -> GaitAnalyzer ->
+AnomalyDetector hand each other these slotted objects instead of dicts:
+they take a third of the memory, have no per-instance hash table to fill
+and make each stage's contract explicit. At the storage and upload
+boundary, GaitMetrics and Alert turn into dicts of the upload schema.
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+
+class SensorSample:
+    """One decoded sample of a sensor channel."""
+
+    __slots__ = ("type", "timestamp", "values", "urgent")
+
+    def __init__(self, type: str, timestamp: float, values: Sequence[float],
+                 urgent: bool = False):
+        """Initialize the sample.
+
+        Args:
+            type: Channel name ("accelerometer", "gyroscope" or "pressure")
+            timestamp: Time the sample was taken
+            values: (x, y, z) for the IMUs, one reading per pressure sensor
+            urgent: Whether it is an impact that may start a fall
+        """
+        self.type = type
+        self.timestamp = timestamp
+        self.values = values
+        self.urgent = urgent
+
+
+class SampleBlock:
+    """Consecutive samples of one channel, micro-batched into arrays."""
+
+    __slots__ = ("type", "timestamps", "values", "urgent")
+
+    def __init__(self, type: str, timestamps: np.ndarray, values: np.ndarray,
+                 urgent: bool = False):
+        """Initialize the block.
+
+        Args:
+            type: Channel name
+            timestamps: Sample times with shape (N,)
+            values: Sample values with shape (N, width)
+            urgent: Whether it holds an impact that may start a fall
+        """
+        self.type = type
+        self.timestamps = timestamps
+        self.values = values
+        self.urgent = urgent
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+class GyroFeatures:
+    """Gyroscope features of one sample."""
+
+    __slots__ = ("timestamp", "angular_velocity", "angular_velocity_mean", "rotation_y")
+
+    def __init__(self, timestamp: float, angular_velocity: float,
+                 angular_velocity_mean: float, rotation_y: float):
+        self.timestamp = timestamp
+        self.angular_velocity = angular_velocity
+        self.angular_velocity_mean = angular_velocity_mean
+        self.rotation_y = rotation_y  # Sagittal plane rotation
+
+
+class PressureFeatures:
+    """Pressure distribution features of one sample."""
+
+    __slots__ = ("timestamp", "total_pressure", "max_pressure", "pressure_ratio")
+
+    def __init__(self, timestamp: float, total_pressure: float,
+                 max_pressure: float, pressure_ratio: float):
+        self.timestamp = timestamp
+        self.total_pressure = total_pressure
+        self.max_pressure = max_pressure
+        self.pressure_ratio = pressure_ratio
+
+
+class FusedFrame:
+    """Features of all channels on the accelerometer clock.
+
+    DataProcessor creates the frame from an accelerometer sample; the
+    gyroscope and pressure features stay 0.0 until SensorFusion fills in
+    the values interpolated at the frame's timestamp.
+    """
+
+    __slots__ = (
+        "timestamp", "acc_magnitude", "acc_mean", "acc_std", "acc_min", "acc_max",
+        "vertical_acceleration",
+        "angular_velocity", "angular_velocity_mean", "rotation_y",
+        "total_pressure", "max_pressure", "pressure_ratio"
+    )
+
+    def __init__(self, timestamp: float, acc_magnitude: float, acc_mean: float,
+                 acc_std: float, acc_min: float, acc_max: float,
+                 vertical_acceleration: float):
+        self.timestamp = timestamp
+        self.acc_magnitude = acc_magnitude
+        self.acc_mean = acc_mean
+        self.acc_std = acc_std
+        self.acc_min = acc_min
+        self.acc_max = acc_max
+        self.vertical_acceleration = vertical_acceleration  # Assuming y is vertical
+        self.angular_velocity = 0.0
+        self.angular_velocity_mean = 0.0
+        self.rotation_y = 0.0
+        self.total_pressure = 0.0
+        self.max_pressure = 0.0
+        self.pressure_ratio = 0.0
+
+
+class GaitMetrics:
+    """Gait metrics over the steps in the analysis window."""
+
+    __slots__ = (
+        "timestamp", "cadence", "step_time_variability",
+        "estimated_stride_length", "gait_speed", "steps_in_window"
+    )
+
+    def __init__(self, timestamp: float, cadence: float, step_time_variability: float,
+                 estimated_stride_length: float, gait_speed: float, steps_in_window: int):
+        self.timestamp = timestamp
+        self.cadence = cadence  # Steps per minute
+        self.step_time_variability = step_time_variability
+        self.estimated_stride_length = estimated_stride_length
+        self.gait_speed = gait_speed  # Meters per second
+        self.steps_in_window = steps_in_window
+
+    def as_dict(self) -> Dict:
+        """Get the metrics as a gait record of the cache and upload schema."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Alert:
+    """A detected fall or gait anomaly."""
+
+    __slots__ = ("timestamp", "type", "message", "severity", "details", "user_id")
+
+    def __init__(self, timestamp: float, type: str, message: str, severity: str,
+                 details: Optional[Dict] = None, user_id: Optional[str] = None):
+        """Initialize the alert.
+
+        Args:
+            timestamp: Time of detection
+            type: Alert type, e.g. "fall" or "speed_deviation"
+            message: Human-readable description
+            severity: "critical" or "warning"
+            details: Extra information uploaded with the alert
+            user_id: Owner on multi-device gateways (the client's user if None)
+        """
+        self.timestamp = timestamp
+        self.type = type
+        self.message = message
+        self.severity = severity
+        self.details = details if details is not None else {}
+        self.user_id = user_id
+
+    def as_dict(self) -> Dict:
+        """Get the alert in the format of the alert queue and the alerts table."""
+        alert = {
+            "timestamp": self.timestamp,
+            "type": self.type,
+            "message": self.message,
+            "severity": self.severity,
+            "details": self.details
+        }
+        if self.user_id is not None:
+            alert["user_id"] = self.user_id
+        return alert
@@ -0,0 +1,82 @@
+import numpy as np
+from typing import Sequence
+
+
+class RingBuffer:
+    """Fixed-size sliding window backed by preallocated NumPy columns.
+
+    Samples are stored column-wise as float32 with a float64 timestamp
+    column. Every row is written twice, at ``i`` and ``i + capacity``, so the
+    current window is always a single contiguous slice and reads never copy.
+    """
+
+    def __init__(self, capacity: int, num_columns: int):
+        """Initialize the ring buffer.
+
+        Args:
+            capacity: Maximum number of samples in the window
+            num_columns: Number of values stored per sample
+        """
+        self.capacity = capacity
+        self.num_columns = num_columns
+
+        self._timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self._data = np.zeros((num_columns, 2 * capacity), dtype=np.float32)
+        self._head = 0  # Next write position in [0, capacity)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, values: Sequence[float]) -> None:
+        """Add a sample, evicting the oldest one when the window is full.
+
+        Args:
+            timestamp: Time of measurement
+            values: One value per column
+        """
+        i = self._head
+        j = i + self.capacity
+        self._timestamps[i] = timestamp
+        self._timestamps[j] = timestamp
+        self._data[:, i] = values
+        self._data[:, j] = values
+
+        self._head = i + 1 if i + 1 < self.capacity else 0
+        if self._count < self.capacity:
+            self._count += 1
+
+    def _start(self) -> int:
+        """Get the storage index of the oldest sample in the window."""
+        return (self._head - self._count) % self.capacity
+
+    def column(self, index: int) -> np.ndarray:
+        """Get a zero-copy view of one column, oldest sample first.
+
+        Args:
+            index: Column index
+
+        Returns:
+            Contiguous float32 view over the current window
+        """
+        start = self._start()
+        return self._data[index, start:start + self._count]
+
+    def columns(self) -> np.ndarray:
+        """Get a zero-copy view of all columns with shape (num_columns, N)."""
+        start = self._start()
+        return self._data[:, start:start + self._count]
+
+    def timestamps(self) -> np.ndarray:
+        """Get a zero-copy view of the timestamps, oldest sample first."""
+        start = self._start()
+        return self._timestamps[start:start + self._count]
+
+    def latest(self) -> np.ndarray:
+        """Get a view of the most recent sample's values."""
+        return self._data[:, self._head - 1 + self.capacity]
+
+    def clear(self) -> None:
+        """Drop all samples from the window."""
+        self._head = 0
+        self._count = 0
@@ -0,0 +1,104 @@
+import math
+from collections import deque
+
+
+class RollingStats:
+    """Constant-time mean, standard deviation, min and max over a sliding window.
+
+    Sums are accumulated in fixed point as Python integers, so adding and
+    evicting samples is exact and the running statistics never drift from
+    a full recompute, however long the stream runs. Min and max are tracked
+    with monotonic deques.
+    """
+
+    def __init__(self, capacity: int, resolution_bits: int = 20):
+        """Initialize the rolling statistics.
+
+        Args:
+            capacity: Number of samples in the window
+            resolution_bits: Fixed-point fraction bits (resolution 2**-bits)
+        """
+        self.capacity = capacity
+        self.scale = 1 << resolution_bits
+
+        self._quantized = [0] * capacity
+        self._sum = 0
+        self._sum_sq = 0
+        self._count = 0
+        self._index = 0  # Total samples pushed
+
+        # (index, value) pairs with monotonically decreasing/increasing values
+        self._max_deque = deque()
+        self._min_deque = deque()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, value: float) -> None:
+        """Add a sample, evicting the oldest one when the window is full.
+
+        Args:
+            value: New sample value
+        """
+        q = round(value * self.scale)
+        slot = self._index % self.capacity
+
+        if self._count == self.capacity:
+            old = self._quantized[slot]
+            self._sum -= old
+            self._sum_sq -= old * old
+        else:
+            self._count += 1
+
+        self._quantized[slot] = q
+        self._sum += q
+        self._sum_sq += q * q
+
+        # Drop samples that can no longer be the window max/min
+        oldest = self._index - self.capacity
+        max_deque = self._max_deque
+        while max_deque and max_deque[-1][1] <= value:
+            max_deque.pop()
+        max_deque.append((self._index, value))
+        if max_deque[0][0] <= oldest:
+            max_deque.popleft()
+
+        min_deque = self._min_deque
+        while min_deque and min_deque[-1][1] >= value:
+            min_deque.pop()
+        min_deque.append((self._index, value))
+        if min_deque[0][0] <= oldest:
+            min_deque.popleft()
+
+        self._index += 1
+
+    def mean(self) -> float:
+        """Get the mean of the window."""
+        if not self._count:
+            return 0.0
+        return float(self._sum) / (self._count * self.scale)
+
+    def std(self) -> float:
+        """Get the population standard deviation of the window."""
+        if not self._count:
+            return 0.0
+        mean = float(self._sum) / (self._count * self.scale)
+        variance = float(self._sum_sq) / (self._count * self.scale * self.scale) - mean * mean
+        return math.sqrt(variance) if variance > 0.0 else 0.0
+
+    def max(self) -> float:
+        """Get the maximum value in the window."""
+        return self._max_deque[0][1] if self._max_deque else 0.0
+
+    def min(self) -> float:
+        """Get the minimum value in the window."""
+        return self._min_deque[0][1] if self._min_deque else 0.0
+
+    def clear(self) -> None:
+        """Drop all samples from the window."""
+        self._sum = 0
+        self._sum_sq = 0
+        self._count = 0
+        self._index = 0
+        self._max_deque.clear()
+        self._min_deque.clear()
@@ -0,0 +1,183 @@
+import asyncio
+import inspect
+import logging
+import math
+import random
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("GOSPL.scheduler")
+
+
+class Job:
+    """A periodic job and its schedule state."""
+
+    MISSED_POLICIES = ("skip", "coalesce", "catch_up")
+
+    def __init__(self, name: str, func: Callable, interval_s: float, jitter: float = 0.1,
+                 missed: str = "skip", run_at_start: bool = False,
+                 timeout_s: Optional[float] = None):
+        """Initialize the job.
+
+        Args:
+            name: Job name used in logs and stats
+            func: Function or coroutine function called without arguments
+            interval_s: Time between scheduled runs
+            jitter: Each run is delayed by up to this fraction of the interval
+            missed: What to do about runs that were due while the job was
+                still running or the loop was stalled: "skip" them and keep
+                to the schedule, "coalesce" them into one immediate run, or
+                "catch_up" by running each of them back to back
+            run_at_start: Run once right after the scheduler starts
+            timeout_s: Cancel a run that takes longer than this
+        """
+        if interval_s <= 0:
+            raise ValueError(f"Interval of job {name} must be positive")
+        if missed not in self.MISSED_POLICIES:
+            raise ValueError(f"Unknown missed-run policy: {missed}")
+
+        self.name = name
+        self.func = func
+        self.interval_s = interval_s
+        self.jitter = jitter
+        self.missed = missed
+        self.run_at_start = run_at_start
+        self.timeout_s = timeout_s
+
+        self.due = 0.0  # Slot on the schedule, in event loop time
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.missed_runs = 0
+
+    def stats(self) -> Dict:
+        """Get run counts of the job."""
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "missed_runs": self.missed_runs,
+            "running": self.task is not None
+        }
+
+
+class Scheduler:
+    """Run periodic jobs from event loop timers.
+
+    Nothing polls: each job has one timer armed for its next run, and the
+    next timer is armed when a run finishes, so a job never overlaps
+    itself. Runs are kept on a fixed grid of ``interval_s`` from the start,
+    with jitter added per run so gateways started together do not hit the
+    cloud in lockstep.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Job] = {}
+        self.running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add_job(self, name: str, func: Callable, interval_s: float, **kwargs) -> Job:
+        """Register a periodic job.
+
+        Args:
+            name: Unique job name
+            func: Function or coroutine function called without arguments
+            interval_s: Time between scheduled runs
+            **kwargs: Further Job arguments (jitter, missed, run_at_start, timeout_s)
+
+        Returns:
+            The new job
+        """
+        if name in self.jobs:
+            raise ValueError(f"Duplicate job: {name}")
+        job = self.jobs[name] = Job(name, func, interval_s, **kwargs)
+        if self.running:
+            self._start_job(job)
+        return job
+
+    def start(self) -> None:
+        """Arm the timers of all jobs; must be called from the event loop."""
+        if self.running:
+            return
+        self.running = True
+        self._loop = asyncio.get_running_loop()
+        for job in self.jobs.values():
+            self._start_job(job)
+
+    def _start_job(self, job: Job) -> None:
+        now = self._loop.time()
+        job.due = now if job.run_at_start else now + job.interval_s
+        self._arm(job)
+
+    def _arm(self, job: Job) -> None:
+        """Set the timer of the next run; overdue runs start without jitter."""
+        when = job.due
+        if when > self._loop.time():
+            when += random.uniform(0, job.jitter * job.interval_s)
+        job.handle = self._loop.call_at(when, self._fire, job)
+
+    def _fire(self, job: Job) -> None:
+        job.handle = None
+        job.task = self._loop.create_task(self._run(job))
+
+    async def _run(self, job: Job) -> None:
+        try:
+            result = job.func()
+            if inspect.isawaitable(result):
+                if job.timeout_s:
+                    await asyncio.wait_for(result, job.timeout_s)
+                else:
+                    await result
+            job.runs += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            job.failures += 1
+            logger.error(f"Job {job.name} timed out after {job.timeout_s}s")
+        except Exception as e:
+            job.failures += 1
+            logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            job.task = None
+
+        if self.running:
+            self._advance(job)
+            self._arm(job)
+
+    def _advance(self, job: Job) -> None:
+        """Move a job to its next slot, applying its missed-run policy."""
+        now = self._loop.time()
+        job.due += job.interval_s
+        if job.due > now:
+            return
+
+        missed = math.floor((now - job.due) / job.interval_s) + 1
+        if job.missed == "catch_up":
+            return  # The slot is in the past, so the next run starts right away
+
+        if job.missed == "skip":
+            dropped = missed
+            job.due += missed * job.interval_s
+        else:
+            # One run now stands in for all missed ones; the grid restarts from it
+            dropped = missed - 1
+            job.due = now
+        if dropped:
+            job.missed_runs += dropped
+            logger.warning(f"Job {job.name} missed {dropped} run(s)")
+
+    async def stop(self) -> None:
+        """Cancel pending timers and running jobs."""
+        self.running = False
+        tasks = []
+        for job in self.jobs.values():
+            if job.handle is not None:
+                job.handle.cancel()
+                job.handle = None
+            if job.task is not None:
+                job.task.cancel()
+                tasks.append(job.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get run counts of every job."""
+        return {name: job.stats() for name, job in self.jobs.items()}
@@ -0,0 +1,352 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import numpy as np
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from processing.analysis_chain import AnalysisChain, AnalysisResult
+from processing.metrics import LatencyHistogram, merge_histograms
+from processing.records import SampleBlock, SensorSample
+
+logger = logging.getLogger("GOSPL.workers")
+
+DEFAULT_KEY = "default"
+
+# Called with the device and the results of one submitted item
+ResultsCallback = Callable[[str, List[AnalysisResult]], Awaitable[None]]
+
+# Worker process state, set up by _init_worker
+_worker_config: Optional[Dict] = None
+_worker_chains: Dict[str, AnalysisChain] = {}
+_worker_slab: Optional[shared_memory.SharedMemory] = None
+_worker_slots: List[Tuple[np.ndarray, np.ndarray]] = []
+
+
+def _slot_views(buf, num_slots: int, slot_samples: int,
+                width: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Map (timestamps, values) arrays onto the slots of a shared slab."""
+    slot_bytes = slot_samples * (8 + 4 * width)
+    views = []
+    for slot in range(num_slots):
+        offset = slot * slot_bytes
+        timestamps = np.ndarray((slot_samples,), dtype=np.float64, buffer=buf, offset=offset)
+        values = np.ndarray(
+            (slot_samples, width), dtype=np.float32, buffer=buf, offset=offset + 8 * slot_samples
+        )
+        views.append((timestamps, values))
+    return views
+
+
+def _init_worker(config: Dict, slab_name: str, num_slots: int,
+                 slot_samples: int, width: int) -> None:
+    """Attach a worker process to its shared slab."""
+    global _worker_config, _worker_slab, _worker_slots
+    _worker_config = config
+    _worker_slab = shared_memory.SharedMemory(name=slab_name)
+    _worker_slots = _slot_views(_worker_slab.buf, num_slots, slot_samples, width)
+
+
+def _worker_chain(key: str) -> AnalysisChain:
+    chain = _worker_chains.get(key)
+    if chain is None:
+        chain = _worker_chains[key] = AnalysisChain(_worker_config)
+    return chain
+
+
+def _run_slot(key: str, channel: str, slot: int, count: int, width: int) -> List[AnalysisResult]:
+    """Analyze a block that the main process wrote into a slab slot."""
+    timestamps, values = _worker_slots[slot]
+    block = SampleBlock(channel, timestamps[:count], values[:count, :width])
+    return _worker_chain(key).run(block)
+
+
+def _run_sample(key: str, data: SensorSample) -> List[AnalysisResult]:
+    """Analyze a single per-sample event."""
+    return _worker_chain(key).run(data)
+
+
+def _apply_thresholds(key: str, thresholds: Dict[str, Dict]) -> None:
+    """Override detection thresholds of a chain in a worker process."""
+    _worker_chain(key).apply_thresholds(thresholds)
+
+
+def _worker_timings() -> Dict[str, LatencyHistogram]:
+    """Get the merged stage timings of the chains in a worker process."""
+    return merge_histograms(chain.timings for chain in _worker_chains.values() if chain.timings)
+
+
+class _Shard:
+    """One single-threaded executor and, in process mode, its shared slab."""
+
+    def __init__(self, executor: Executor, slab: Optional[shared_memory.SharedMemory],
+                 slots: List[Tuple[np.ndarray, np.ndarray]], max_pending: int,
+                 max_in_flight: int):
+        self.executor = executor
+        self.slab = slab
+        self.slots = slots
+        self.free: asyncio.Queue = asyncio.Queue()
+        for slot in range(len(slots)):
+            self.free.put_nowait(slot)
+
+        # (key, dispatch, done) items started in order by the feeder task
+        self.pending: asyncio.Queue = asyncio.Queue(max_pending)
+        # (key, futures, done) items started on the executor, collected in order
+        self.in_flight: asyncio.Queue = asyncio.Queue(max_in_flight)
+        self.feeder: Optional[asyncio.Task] = None
+        self.collector: Optional[asyncio.Task] = None
+
+
+class AnalysisPool:
+    """Run AnalysisChains off the event loop in worker processes or threads.
+
+    Each shard is a single-worker executor, so the analysis state of a
+    device always lives in one place and its data is processed in order.
+    In "process" mode, blocks are copied into preallocated slots of a
+    shared-memory slab and only the slot number crosses the process
+    boundary; the chains stay resident in the worker between calls. In
+    "thread" mode the chains live in this process and the executor threads
+    read the blocks directly.
+
+    Data handed to submit() is queued per shard and started on the shard
+    by its own task, up to `slots` items ahead of the results, so a block
+    is copied into its slot while the previous ones are analyzed. The
+    executor runs them in order and a second task collects the results in
+    the same order, so all shards are busy at once while the data of each
+    device is still analyzed in order.
+    """
+
+    MODES = ("process", "thread")
+
+    def __init__(self, config: Dict, mode: str = "process", workers: int = 1,
+                 slots: int = 8, slot_samples: int = 25, width: int = 3,
+                 max_pending: int = 64):
+        """Initialize the pool.
+
+        Args:
+            config: Full application configuration, used to build chains
+            mode: "process" or "thread"
+            workers: Number of shards (worker processes or threads)
+            slots: Items in flight per shard, and shared-memory slots in process mode
+            slot_samples: Samples per slot; larger blocks are split
+            width: Maximum values per sample across channels
+            max_pending: Items queued per shard before submit() waits
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+
+        self.config = config
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.num_slots = max(1, slots)
+        self.slot_samples = max(1, slot_samples)
+        self.width = width
+        self.max_pending = max(1, max_pending)
+        self.on_results: Optional[ResultsCallback] = None
+
+        self.shards: List[_Shard] = []
+        self.assignments: Dict[str, int] = {}
+        self.chains: Dict[str, AnalysisChain] = {}  # Thread mode only
+
+    def start(self, on_results: Optional[ResultsCallback] = None) -> None:
+        """Start the worker processes or threads and their feeder and collector tasks.
+
+        Must be called from the event loop.
+
+        Args:
+            on_results: Awaited with the device and the results of each submitted item
+        """
+        self.on_results = on_results
+        for _ in range(self.workers):
+            if self.mode == "process":
+                shard = self._start_process_shard()
+            else:
+                shard = _Shard(
+                    ThreadPoolExecutor(max_workers=1), None, [], self.max_pending, self.num_slots
+                )
+            shard.feeder = asyncio.create_task(self._feed(shard))
+            shard.collector = asyncio.create_task(self._collect(shard))
+            self.shards.append(shard)
+        logger.info(f"Analysis running on {self.workers} {self.mode} worker(s)")
+
+    def _start_process_shard(self) -> _Shard:
+        slot_bytes = self.slot_samples * (8 + 4 * self.width)
+        slab = shared_memory.SharedMemory(create=True, size=self.num_slots * slot_bytes)
+
+        # Spawned workers do not inherit the event loop or open sockets
+        executor = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.config, slab.name, self.num_slots, self.slot_samples, self.width)
+        )
+        slots = _slot_views(slab.buf, self.num_slots, self.slot_samples, self.width)
+        return _Shard(executor, slab, slots, self.max_pending, self.num_slots)
+
+    def _shard(self, key: str) -> _Shard:
+        """Get the shard that owns a device, assigning new devices round-robin."""
+        index = self.assignments.get(key)
+        if index is None:
+            index = self.assignments[key] = len(self.assignments) % len(self.shards)
+        return self.shards[index]
+
+    async def submit(self, data: Union[SensorSample, SampleBlock], key: str = DEFAULT_KEY) -> None:
+        """Queue sensor data for analysis without waiting for the results.
+
+        Waits only while the device's shard has max_pending items queued.
+        The results are handed to on_results.
+
+        Args:
+            data: Per-sample sensor event or micro-batched block
+            key: Device whose analysis state the data belongs to
+        """
+        await self._shard(key).pending.put((key, functools.partial(self._dispatch, data, key), None))
+
+    async def _feed(self, shard: _Shard) -> None:
+        while True:
+            key, dispatch, done = await shard.pending.get()
+            try:
+                futures = await dispatch()
+            except Exception as e:
+                failed = asyncio.get_running_loop().create_future()
+                failed.set_exception(e)
+                futures = [failed]
+            await shard.in_flight.put((key, futures, done))
+
+    async def _collect(self, shard: _Shard) -> None:
+        while True:
+            key, futures, done = await shard.in_flight.get()
+            try:
+                parts = await asyncio.gather(*futures)
+                results = [result for part in parts if part for result in part]
+                if done is not None:
+                    if not done.done():
+                        done.set_result(results)
+                elif results and self.on_results:
+                    await self.on_results(key, results)
+            except Exception as e:
+                if done is not None:
+                    if not done.done():
+                        done.set_exception(e)
+                else:
+                    logger.error(f"Analysis of {key} failed: {e}")
+            finally:
+                shard.pending.task_done()
+
+    async def _dispatch(self, data: Union[SensorSample, SampleBlock],
+                        key: str) -> List[asyncio.Future]:
+        """Start the analysis of sensor data on the device's worker.
+
+        Waits only for free slots; the executor runs the work in order.
+
+        Args:
+            data: Per-sample sensor event or micro-batched block
+            key: Device whose analysis state the data belongs to
+
+        Returns:
+            Futures of the lists of (new gait metrics or None, anomalies) tuples
+        """
+        shard = self._shard(key)
+        loop = asyncio.get_running_loop()
+
+        if self.mode == "thread":
+            return [loop.run_in_executor(shard.executor, self._thread_chain(key).run, data)]
+
+        if not isinstance(data, SampleBlock):
+            return [loop.run_in_executor(shard.executor, _run_sample, key, data)]
+
+        futures = []
+        timestamps = data.timestamps
+        values = data.values
+        width = values.shape[1]
+        for start in range(0, len(timestamps), self.slot_samples):
+            end = min(start + self.slot_samples, len(timestamps))
+            slot = await shard.free.get()
+            slot_timestamps, slot_values = shard.slots[slot]
+            slot_timestamps[:end - start] = timestamps[start:end]
+            slot_values[:end - start, :width] = values[start:end]
+            future = loop.run_in_executor(
+                shard.executor, _run_slot, key, data.type, slot, end - start, width
+            )
+            # The slot is reused once the worker has read it
+            future.add_done_callback(lambda _, slot=slot: shard.free.put_nowait(slot))
+            futures.append(future)
+        return futures
+
+    def _thread_chain(self, key: str) -> AnalysisChain:
+        chain = self.chains.get(key)
+        if chain is None:
+            chain = self.chains[key] = AnalysisChain(self.config)
+        return chain
+
+    async def apply_thresholds(self, key: str, thresholds: Dict[str, Dict]) -> None:
+        """Override detection thresholds of a device's chain.
+
+        The update is queued behind the device's submitted data, so data
+        sent before it is analyzed with the old thresholds and data sent
+        after with the new.
+
+        Args:
+            key: Device whose chain to update
+            thresholds: Values by analysis config section (see AnalysisChain.apply_thresholds)
+        """
+        done = asyncio.get_running_loop().create_future()
+        work = functools.partial(self._update_thresholds, key, thresholds)
+        await self._shard(key).pending.put((key, work, done))
+        await done
+
+    async def _update_thresholds(self, key: str, thresholds: Dict[str, Dict]) -> List[asyncio.Future]:
+        shard = self._shard(key)
+        loop = asyncio.get_running_loop()
+        if self.mode == "thread":
+            return [loop.run_in_executor(
+                shard.executor, self._thread_chain(key).apply_thresholds, thresholds
+            )]
+        return [loop.run_in_executor(shard.executor, _apply_thresholds, key, thresholds)]
+
+    async def timings(self) -> Dict[str, LatencyHistogram]:
+        """Get the stage timings of all chains, merged across devices."""
+        if self.mode == "thread":
+            return merge_histograms(chain.timings for chain in self.chains.values() if chain.timings)
+
+        loop = asyncio.get_running_loop()
+        groups = await asyncio.gather(*(
+            loop.run_in_executor(shard.executor, _worker_timings) for shard in self.shards
+        ))
+        return merge_histograms(groups)
+
+    async def drain(self, timeout_s: float) -> None:
+        """Wait for a while until all submitted data is analyzed.
+
+        Args:
+            timeout_s: Maximum time to wait
+        """
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(shard.pending.join() for shard in self.shards)), timeout_s
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Analysis queues did not drain before shutdown")
+
+    async def stop(self, drain_timeout_s: float = 2.0) -> None:
+        """Wait for queued work, then stop the workers and free the slabs.
+
+        Args:
+            drain_timeout_s: Maximum time to wait for submitted data
+        """
+        await self.drain(drain_timeout_s)
+        tasks = [task for shard in self.shards for task in (shard.feeder, shard.collector) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        for shard in self.shards:
+            await asyncio.to_thread(shard.executor.shutdown, True)
+            if shard.slab is not None:
+                # Views must be released before the mapping can be closed
+                shard.slots.clear()
+                shard.slab.close()
+                shard.slab.unlink()
+        self.shards = []
@@ -0,0 +1,99 @@
+import asyncio
+import numpy as np
+from typing import Callable, Dict, Optional
+
+from processing.records import SampleBlock
+
+
+class _ChannelBuffer:
+    """Preallocated sample storage for a single sensor channel."""
+
+    def __init__(self, capacity: int, width: int):
+        self.timestamps = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty((capacity, width), dtype=np.float32)
+        self.count = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class SampleBatcher:
+    """Micro-batch decoded samples and deliver them to the callback as blocks.
+
+    Each channel is flushed when it holds ``max_samples`` samples or when its
+    oldest pending sample is ``max_latency_ms`` old, whichever comes first.
+    Urgent samples (e.g. impacts that may start a fall) flush immediately.
+    """
+
+    def __init__(self, callback: Callable, channels: Dict[str, int],
+                 max_samples: int = 25, max_latency_ms: float = 100):
+        """Initialize the batcher.
+
+        Args:
+            callback: Async function called with each flushed block
+            channels: Mapping of channel name to values per sample
+            max_samples: Maximum number of samples held per channel
+            max_latency_ms: Maximum time a sample may wait before delivery
+        """
+        self.callback = callback
+        self.max_samples = max_samples
+        self.max_latency_s = max_latency_ms / 1000
+        self.buffers = {
+            channel: _ChannelBuffer(max_samples, width)
+            for channel, width in channels.items()
+        }
+
+    def add(self, channel: str, timestamps: np.ndarray, values: np.ndarray,
+            urgent: bool = False) -> None:
+        """Append a frame of samples to a channel buffer.
+
+        Args:
+            channel: Channel name
+            timestamps: Sample timestamps with shape (N,)
+            values: Sample values with shape (N, width)
+            urgent: Flush the channel right after appending
+        """
+        buffer = self.buffers[channel]
+        start = 0
+        total = len(timestamps)
+        while start < total:
+            n = min(total - start, self.max_samples - buffer.count)
+            buffer.timestamps[buffer.count:buffer.count + n] = timestamps[start:start + n]
+            buffer.values[buffer.count:buffer.count + n] = values[start:start + n]
+            buffer.count += n
+            start += n
+
+            if buffer.count == self.max_samples:
+                self.flush(channel, urgent)
+
+        if buffer.count and urgent:
+            self.flush(channel, urgent)
+        elif buffer.count and buffer.timer is None:
+            loop = asyncio.get_running_loop()
+            buffer.timer = loop.call_later(self.max_latency_s, self.flush, channel)
+
+    def flush(self, channel: str, urgent: bool = False) -> None:
+        """Deliver all pending samples of a channel as one block.
+
+        Args:
+            channel: Channel name
+            urgent: Mark the block as holding urgent samples
+        """
+        buffer = self.buffers[channel]
+        if buffer.timer is not None:
+            buffer.timer.cancel()
+            buffer.timer = None
+        if not buffer.count:
+            return
+
+        block = SampleBlock(
+            channel,
+            buffer.timestamps[:buffer.count].copy(),
+            buffer.values[:buffer.count].copy(),
+            urgent
+        )
+        buffer.count = 0
+        asyncio.create_task(self.callback(block))
+
+    def flush_all(self) -> None:
+        """Deliver pending samples of every channel."""
+        for channel in self.buffers:
+            self.flush(channel)
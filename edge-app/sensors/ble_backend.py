@@ -0,0 +1,75 @@
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from bleak import BleakClient, BleakScanner
+
+
+class BleakBackend:
+    """BLE access through bleak.
+
+    The connection manager and sensors only use ``scan``, ``find``,
+    ``create_client`` and ``clock``, so a fake backend can stand in for
+    the radio.
+    """
+
+    async def scan(self, names: Iterable[str], timeout: float) -> Dict:
+        """Run one scan for several devices at once.
+
+        Args:
+            names: Advertised device names to look for
+            timeout: Maximum scan time in seconds
+
+        Returns:
+            Mapping of device name to the discovered device
+        """
+        wanted = set(names)
+        found = {}
+        all_found = asyncio.Event()
+
+        def detected(device, advertisement_data) -> None:
+            name = advertisement_data.local_name or device.name
+            if name in wanted and name not in found:
+                found[name] = device
+                if len(found) == len(wanted):
+                    all_found.set()
+
+        async with BleakScanner(detection_callback=detected):
+            try:
+                await asyncio.wait_for(all_found.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return found
+
+    async def find(self, name: str, timeout: float):
+        """Scan for a single device.
+
+        Returns:
+            The discovered device or None
+        """
+        return await BleakScanner.find_device_by_name(name, timeout=timeout)
+
+    def create_client(self, device, disconnected_callback: Optional[Callable] = None) -> BleakClient:
+        """Create a client for a discovered device."""
+        return BleakClient(device, disconnected_callback=disconnected_callback)
+
+    def clock(self) -> float:
+        """Get the time used to timestamp received samples."""
+        return time.time()
+
+
+def create_backend(name: str = "bleak"):
+    """Create the BLE backend named in the config.
+
+    Args:
+        name: "bleak" for real hardware or "fake" for the in-memory backend
+
+    Returns:
+        Backend instance
+    """
+    if name == "fake":
+        from sensors.fake_ble import FakeBleBackend
+        return FakeBleBackend()
+    if name != "bleak":
+        raise ValueError(f"Unknown BLE backend: {name}")
+    return BleakBackend()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from sensors.slipper_sensor import SlipperSensor
+
+logger = logging.getLogger("GOSPL.sensor")
+
+
+class _Link:
+    """Connection state of one managed slipper."""
+
+    def __init__(self, sensor: SlipperSensor):
+        self.sensor = sensor
+        self.attempts = 0
+        self.retry_at = 0.0
+        self.connecting = False
+        self.collecting = False
+
+
+class ConnectionManager:
+    """Keep many slippers connected and reconnect them when links drop.
+
+    Every slipper that is not connected and due for a retry is looked for
+    in one shared scan, and the ones found are connected concurrently. A
+    dropped link is retried right away; failed attempts back off
+    exponentially from ``retry_interval_s`` up to ``max_retry_interval_s``,
+    with jitter so that a corridor of slippers does not retry in lockstep.
+    """
+
+    def __init__(self, sensors: Dict[str, SlipperSensor], backend,
+                 retry_interval_s: float = 5.0, max_retry_interval_s: float = 60.0,
+                 scan_timeout_s: Optional[float] = None):
+        """Initialize the connection manager.
+
+        Args:
+            sensors: Mapping of device name to sensor
+            backend: BLE backend used for the shared scan
+            retry_interval_s: Delay after the first failed attempt
+            max_retry_interval_s: Upper bound on the retry delay
+            scan_timeout_s: Maximum duration of one scan (retry_interval_s if None)
+        """
+        self.backend = backend
+        self.retry_interval_s = retry_interval_s
+        self.max_retry_interval_s = max_retry_interval_s
+        self.scan_timeout_s = scan_timeout_s or retry_interval_s
+        self.links = {name: _Link(sensor) for name, sensor in sensors.items()}
+
+        self.callback_factory: Optional[Callable[[str], Callable]] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._connects: List[asyncio.Task] = []
+
+    async def start(self, callback_factory: Callable[[str], Callable]) -> None:
+        """Start connecting in the background.
+
+        Args:
+            callback_factory: Returns the data callback of a device, given its name
+        """
+        self.callback_factory = callback_factory
+        for link in self.links.values():
+            link.sensor.on_disconnect = self._handle_disconnect
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop reconnecting and disconnect every slipper."""
+        tasks = ([self._task] if self._task else []) + self._connects
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._connects = []
+
+        for link in self.links.values():
+            await link.sensor.disconnect()
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [
+                name for name, link in self.links.items()
+                if not link.sensor.connected and not link.connecting and link.retry_at <= now
+            ]
+            if due:
+                self._wake.clear()
+                try:
+                    found = await self.backend.scan(due, self.scan_timeout_s)
+                except Exception as e:
+                    # E.g. a scan already in progress or an adapter reset; retry later
+                    logger.error(f"BLE scan failed: {e}")
+                    for name in due:
+                        self._backoff(name, f"scan failed: {e}")
+                    continue
+                for name in due:
+                    link = self.links[name]
+                    if name in found:
+                        link.connecting = True
+                        task = asyncio.create_task(self._connect(name, found[name]))
+                        self._connects.append(task)
+                        task.add_done_callback(self._connects.remove)
+                    else:
+                        self._backoff(name, "not found")
+                continue
+
+            await self._wait()
+
+    async def _wait(self) -> None:
+        """Sleep until a link drops, a connect finishes or a retry is due."""
+        deadlines = [
+            link.retry_at for link in self.links.values()
+            if not link.sensor.connected and not link.connecting
+        ]
+        timer = None
+        if deadlines:
+            delay = max(0.0, min(deadlines) - time.monotonic())
+            timer = asyncio.get_running_loop().call_later(delay, self._wake.set)
+        try:
+            await self._wake.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        self._wake.clear()
+
+    async def _connect(self, name: str, device) -> None:
+        link = self.links[name]
+        try:
+            await link.sensor.connect(device)
+            if not link.collecting:
+                await link.sensor.start_collection(self.callback_factory(name))
+                link.collecting = True
+            link.attempts = 0
+        except Exception as e:
+            self._backoff(name, str(e))
+        finally:
+            link.connecting = False
+            self._wake.set()
+
+    def _backoff(self, name: str, reason: str) -> None:
+        """Schedule the next attempt for a device after a failure."""
+        link = self.links[name]
+        link.attempts += 1
+        delay = min(self.max_retry_interval_s, self.retry_interval_s * 2 ** (link.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        link.retry_at = time.monotonic() + delay
+        logger.info(f"Retrying {name} in {delay:.1f}s (attempt {link.attempts}): {reason}")
+
+    def _handle_disconnect(self, sensor: SlipperSensor) -> None:
+        """Reconnect a dropped slipper as soon as possible."""
+        link = self.links[sensor.device_name]
+        stats = sensor.link.snapshot()
+        logger.info(
+            f"{sensor.device_name} link lost after {stats['uptime_s']}s total uptime, "
+            f"max notification gap {stats['gap_max_ms']}ms"
+        )
+        link.attempts = 0
+        link.retry_at = time.monotonic()
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get link statistics of every device."""
+        return {
+            name: {**link.sensor.link.snapshot(), "retry_attempts": link.attempts}
+            for name, link in self.links.items()
+        }
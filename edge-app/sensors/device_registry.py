@@ -0,0 +1,169 @@
+import copy
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger("GOSPL.devices")
+
+DEVICE_TABLE_FILE = "devices.json"
+
+# Largest cache ID that fits the uint16 device field of cached records
+MAX_CACHE_ID = 0xFFFF
+
+
+class Device:
+    """A slipper and the user it belongs to."""
+
+    def __init__(self, index: int, device_name: str, user_id: str):
+        self.index = index
+        self.device_name = device_name
+        self.user_id = user_id
+        self.cache_id: Optional[int] = None  # Set by DeviceRegistry.load_cache_ids
+
+
+class DeviceRegistry:
+    """Map BLE devices to user IDs for a gateway serving one or many users.
+
+    Without a ``devices`` list in the config, the registry holds the single
+    slipper from ``sensors.slipper`` owned by the configured user.
+
+    Cached records of multi-device gateways store a small cache ID instead
+    of the user ID. The IDs are kept in a table on disk, one per pair of
+    device name and user, so reordering or removing devices in the config
+    cannot attribute a record to someone else, and records cached before a
+    slipper moved to another user still go to the previous user.
+    """
+
+    def __init__(self, devices: List[Dict], multi_tenant: bool = True):
+        """Initialize the registry.
+
+        Args:
+            devices: Entries with device_name and user_id
+            multi_tenant: Whether records need to carry their device
+        """
+        self.multi_tenant = multi_tenant
+        self.cache_ids: Dict[int, Dict] = {}  # cache ID -> {"device_name", "user_id"}
+        self.devices: List[Device] = []
+        self.by_name: Dict[str, Device] = {}
+        for entry in devices:
+            name = entry["device_name"]
+            if name in self.by_name:
+                raise ValueError(f"Device {name} is registered twice")
+            device = Device(len(self.devices), name, entry["user_id"])
+            self.devices.append(device)
+            self.by_name[name] = device
+
+        if not self.devices:
+            raise ValueError("No devices configured")
+
+    @classmethod
+    def from_config(cls, config: Dict, default_user_id: Optional[str] = None) -> "DeviceRegistry":
+        """Build the registry from the application configuration.
+
+        Args:
+            config: Full application configuration
+            default_user_id: User ID of the single-device setup
+
+        Returns:
+            The device registry
+        """
+        devices = config.get("devices")
+        if devices:
+            logger.info(f"Serving {len(devices)} devices")
+            return cls(devices, multi_tenant=True)
+
+        return cls([{
+            "device_name": config["sensors"]["slipper"]["device_name"],
+            "user_id": default_user_id or config["supabase"]["user_id"]
+        }], multi_tenant=False)
+
+    def __iter__(self) -> Iterator[Device]:
+        return iter(self.devices)
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def get(self, device_name: str) -> Device:
+        """Get a device by its BLE name."""
+        return self.by_name[device_name]
+
+    def sensor_config(self, device: Device, slipper_config: Dict) -> Dict:
+        """Get the sensor configuration for one device.
+
+        Args:
+            device: Registered device
+            slipper_config: Shared sensors.slipper configuration
+
+        Returns:
+            Copy of the shared configuration with the device name set
+        """
+        config = copy.deepcopy(slipper_config)
+        config["device_name"] = device.device_name
+        return config
+
+    def load_cache_ids(self, path: str) -> None:
+        """Give every device the cache ID stored for it, adding new ones.
+
+        Args:
+            path: JSON file of the cache ID table, next to the cache it describes
+
+        Raises:
+            ValueError: If the table is unreadable or full; records could not be attributed
+        """
+        table = Path(path)
+        self.cache_ids = {}
+        if table.exists():
+            try:
+                entries = json.loads(table.read_text())
+                self.cache_ids = {int(key): entry for key, entry in entries.items()}
+            except (OSError, ValueError, AttributeError) as e:
+                raise ValueError(f"Unreadable device table {table}: {e}")
+
+        ids = {(entry["device_name"], entry["user_id"]): key for key, entry in self.cache_ids.items()}
+        added = False
+        for device in self.devices:
+            cache_id = ids.get((device.device_name, device.user_id))
+            if cache_id is None:
+                cache_id = max(self.cache_ids, default=-1) + 1
+                if cache_id > MAX_CACHE_ID:
+                    raise ValueError(f"Device table {table} is full")
+                self.cache_ids[cache_id] = {"device_name": device.device_name, "user_id": device.user_id}
+                added = True
+            device.cache_id = cache_id
+
+        if added:
+            # The table must be on disk before any record refers to the new IDs
+            tmp = table.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.cache_ids, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, table)
+
+    def resolve(self, records: List[Dict]) -> List[Dict]:
+        """Replace the device cache ID of cached records with the user ID.
+
+        Records whose ID is not in the table are dropped rather than
+        attributed to a guessed user.
+
+        Args:
+            records: Records read from the cache
+
+        Returns:
+            Records ready for upload
+        """
+        if not self.multi_tenant:
+            return records
+        resolved = []
+        for record in records:
+            record = dict(record)
+            cache_id = record.pop("device")
+            entry = self.cache_ids.get(cache_id)
+            if entry is not None:
+                record["user_id"] = entry["user_id"]
+                resolved.append(record)
+            else:
+                logger.warning(f"Dropping cached record of unknown device {cache_id}")
+        return resolved
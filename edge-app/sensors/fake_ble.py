@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger("GOSPL.ble")
+
+
+class FakeDevice:
+    """Discovered device of the fake backend."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.address = f"fake:{name}"
+
+
+class FakeBleClient:
+    """In-memory stand-in for BleakClient."""
+
+    def __init__(self, backend: "FakeBleBackend", device: FakeDevice,
+                 disconnected_callback: Optional[Callable] = None):
+        self.backend = backend
+        self.device = device
+        self.disconnected_callback = disconnected_callback
+        self.handlers: Dict[str, Callable] = {}
+        self.is_connected = False
+
+    async def connect(self) -> None:
+        if self.device.name not in self.backend.available:
+            raise OSError(f"{self.device.name} is out of range")
+        self.is_connected = True
+        self.backend.clients[self.device.name] = self
+
+    async def disconnect(self) -> None:
+        if self.is_connected:
+            self.is_connected = False
+            if self.disconnected_callback:
+                self.disconnected_callback(self)
+
+    async def start_notify(self, uuid: str, handler: Callable) -> None:
+        self.handlers[uuid] = handler
+
+
+class FakeBleBackend:
+    """BLE backend without a radio, for simulations and tests.
+
+    Devices are reachable while they are in ``available``. Frames are
+    delivered with notify(), and link drops are injected with
+    drop_link() or by taking the device out of range. A simulator can
+    replace ``time_source`` so that samples are timestamped on its clock.
+    """
+
+    def __init__(self, device_names: Iterable[str] = ()):
+        """Initialize the backend.
+
+        Args:
+            device_names: Devices that are in range from the start
+        """
+        self.available: Set[str] = set(device_names)
+        self.clients: Dict[str, FakeBleClient] = {}
+        self.scans = 0
+        self.time_source: Callable[[], float] = time.time
+
+    def add_device(self, name: str) -> None:
+        """Bring a device into range."""
+        self.available.add(name)
+
+    def remove_device(self, name: str) -> None:
+        """Take a device out of range, dropping its link."""
+        self.available.discard(name)
+        self.drop_link(name)
+
+    def drop_link(self, name: str) -> None:
+        """Drop the connection of a device as if the link was lost."""
+        client = self.clients.pop(name, None)
+        if client is not None and client.is_connected:
+            client.is_connected = False
+            logger.info(f"Injected disconnect of {name}")
+            if client.disconnected_callback:
+                client.disconnected_callback(client)
+
+    def notify(self, name: str, uuid: str, data: bytes) -> bool:
+        """Deliver a notification from a connected device.
+
+        Returns:
+            False if the device is not connected or not subscribed
+        """
+        client = self.clients.get(name)
+        if client is None or not client.is_connected or uuid not in client.handlers:
+            return False
+        client.handlers[uuid](0, bytearray(data))
+        return True
+
+    async def scan(self, names: Iterable[str], timeout: float) -> Dict[str, FakeDevice]:
+        self.scans += 1
+        await asyncio.sleep(0)
+        return {name: FakeDevice(name) for name in names if name in self.available}
+
+    async def find(self, name: str, timeout: float) -> Optional[FakeDevice]:
+        found = await self.scan([name], timeout)
+        return found.get(name)
+
+    def create_client(self, device: FakeDevice,
+                      disconnected_callback: Optional[Callable] = None) -> FakeBleClient:
+        return FakeBleClient(self, device, disconnected_callback)
+
+    def clock(self) -> float:
+        return self.time_source()
@@ -0,0 +1,71 @@
+import numpy as np
+from typing import Tuple
+
+# Binary layout of slipper BLE notifications.
+#
+# Every notification is a packed frame: a little-endian uint32 device
+# timestamp (microseconds, taken at the first sample) followed by N
+# fixed-width samples. IMU samples are int16 xyz triplets scaled to the
+# configured full-scale range; pressure samples are one uint16 per sensor
+# point, normalized to 0..1.
+FRAME_HEADER_SIZE = 4
+IMU_AXES = 3
+IMU_SAMPLE_DTYPE = np.dtype("<i2")
+PRESSURE_SAMPLE_DTYPE = np.dtype("<u2")
+
+INT16_FULL_SCALE = 32768.0
+UINT16_FULL_SCALE = 65535.0
+
+
+def imu_scale(full_range: float) -> float:
+    """Get the factor converting raw int16 counts to physical units.
+
+    Args:
+        full_range: Configured full-scale range (e.g. range_g or range_dps)
+
+    Returns:
+        Units per LSB
+    """
+    return float(full_range) / INT16_FULL_SCALE
+
+
+def decode_frame(data: bytearray, width: int, dtype: np.dtype,
+                 scale: float) -> Tuple[int, np.ndarray]:
+    """Decode a packed multi-sample frame without copying the payload.
+
+    Args:
+        data: Raw notification payload
+        width: Number of values per sample
+        dtype: Wire dtype of a single value
+        scale: Factor applied to convert raw counts to physical units
+
+    Returns:
+        Tuple of (device timestamp in microseconds, float32 array of
+        shape (N, width))
+    """
+    view = memoryview(data)
+    sample_size = width * dtype.itemsize
+    payload_size = len(view) - FRAME_HEADER_SIZE
+    if payload_size < sample_size or payload_size % sample_size:
+        raise ValueError(f"Malformed frame of {len(view)} bytes")
+
+    device_time_us = int.from_bytes(view[:FRAME_HEADER_SIZE], "little")
+    raw = np.frombuffer(view, dtype=dtype, offset=FRAME_HEADER_SIZE)
+    values = np.multiply(raw, scale, dtype=np.float32)
+
+    return device_time_us, values.reshape(-1, width)
+
+
+def encode_frame(device_time_us: int, raw: np.ndarray, dtype: np.dtype) -> bytes:
+    """Pack raw sample counts into the wire format.
+
+    Args:
+        device_time_us: Device timestamp of the first sample
+        raw: Array of raw counts with shape (N, width)
+        dtype: Wire dtype of a single value
+
+    Returns:
+        Encoded notification payload
+    """
+    header = (int(device_time_us) & 0xFFFFFFFF).to_bytes(FRAME_HEADER_SIZE, "little")
+    return header + np.ascontiguousarray(raw, dtype=dtype).tobytes()
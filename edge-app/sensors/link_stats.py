@@ -0,0 +1,119 @@
+import time
+from typing import Dict, Optional
+
+
+class _ChannelStats:
+    """Notification count and gaps of one characteristic."""
+
+    __slots__ = ("notifications", "last", "gap_count", "gap_sum_s", "gap_max_s")
+
+    def __init__(self):
+        self.notifications = 0
+        self.last: Optional[float] = None
+        self.gap_count = 0
+        self.gap_sum_s = 0.0
+        self.gap_max_s = 0.0
+
+
+class LinkStats:
+    """Uptime and notification gap statistics of one BLE link.
+
+    Gaps are measured between consecutive notifications of any
+    characteristic while connected, and separately per characteristic;
+    the time spent disconnected is counted as downtime, not as a gap.
+    """
+
+    def __init__(self, gap_warning_ms: float = 500):
+        """Initialize the statistics.
+
+        Args:
+            gap_warning_ms: Gaps longer than this are counted as long gaps
+        """
+        self.gap_warning_s = gap_warning_ms / 1000
+        self.created = time.monotonic()
+
+        self.connects = 0
+        self.disconnects = 0
+        self.connected_since: Optional[float] = None
+        self.uptime_s = 0.0  # Of previous connections
+
+        self.notifications = 0
+        self.last_notification: Optional[float] = None
+        self.gap_count = 0
+        self.gap_sum_s = 0.0
+        self.gap_max_s = 0.0
+        self.long_gaps = 0
+        self.channels: Dict[str, _ChannelStats] = {}
+
+    def connected(self) -> None:
+        """Record that the link came up."""
+        self.connects += 1
+        self.connected_since = time.monotonic()
+        self.last_notification = None
+        for channel in self.channels.values():
+            channel.last = None
+
+    def disconnected(self) -> None:
+        """Record that the link went down."""
+        if self.connected_since is None:
+            return
+        self.disconnects += 1
+        self.uptime_s += time.monotonic() - self.connected_since
+        self.connected_since = None
+
+    def notification(self, channel: str) -> None:
+        """Record a notification; called once per received frame.
+
+        Args:
+            channel: Characteristic the frame arrived on
+        """
+        now = time.monotonic()
+        stats = self.channels.get(channel)
+        if stats is None:
+            stats = self.channels[channel] = _ChannelStats()
+        if stats.last is not None:
+            gap = now - stats.last
+            stats.gap_count += 1
+            stats.gap_sum_s += gap
+            if gap > stats.gap_max_s:
+                stats.gap_max_s = gap
+        stats.last = now
+        stats.notifications += 1
+
+        if self.last_notification is not None:
+            gap = now - self.last_notification
+            self.gap_count += 1
+            self.gap_sum_s += gap
+            if gap > self.gap_max_s:
+                self.gap_max_s = gap
+            if gap > self.gap_warning_s:
+                self.long_gaps += 1
+        self.last_notification = now
+        self.notifications += 1
+
+    def snapshot(self) -> Dict:
+        """Get the current statistics."""
+        now = time.monotonic()
+        current = now - self.connected_since if self.connected_since is not None else 0.0
+        uptime = self.uptime_s + current
+        return {
+            "connected": self.connected_since is not None,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "current_uptime_s": round(current, 1),
+            "uptime_s": round(uptime, 1),
+            "uptime_ratio": round(uptime / max(now - self.created, 1e-9), 3),
+            "notifications": self.notifications,
+            "gap_mean_ms": round(1000 * self.gap_sum_s / self.gap_count, 1) if self.gap_count else 0.0,
+            "gap_max_ms": round(1000 * self.gap_max_s, 1),
+            "long_gaps": self.long_gaps,
+            "channels": {
+                name: {
+                    "notifications": stats.notifications,
+                    "rate_hz": round(stats.notifications / uptime, 1) if uptime else 0.0,
+                    "gap_mean_ms": round(1000 * stats.gap_sum_s / stats.gap_count, 1) if stats.gap_count else 0.0,
+                    "gap_max_ms": round(1000 * stats.gap_max_s, 1)
+                }
+                for name, stats in self.channels.items()
+            }
+        }
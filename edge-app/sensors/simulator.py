@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import math
+import time
+import numpy as np
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sensors.fake_ble import FakeBleBackend
+from sensors.frames import (
+    IMU_SAMPLE_DTYPE,
+    INT16_FULL_SCALE,
+    PRESSURE_SAMPLE_DTYPE,
+    UINT16_FULL_SCALE,
+    encode_frame,
+    imu_scale,
+)
+from sensors.slipper_sensor import SlipperSensor
+from storage.raw_recorder import RawReader
+
+logger = logging.getLogger("GOSPL.simulator")
+
+SCENARIOS = ("gait", "idle", "fall")
+
+CHANNEL_UUIDS = {
+    "accelerometer": SlipperSensor.ACCELEROMETER_CHAR_UUID,
+    "gyroscope": SlipperSensor.GYROSCOPE_CHAR_UUID,
+    "pressure": SlipperSensor.PRESSURE_CHAR_UUID
+}
+
+
+class SyntheticSource:
+    """Synthetic slipper signals of one wearer, in physical units.
+
+    Acceleration is linear (gravity removed) with y vertical, as the
+    analysis expects. While walking, the slipper strikes the ground once
+    per stride: a vertical impulse at heel strike, pressure rolling from
+    heel to toe during stance and a pitch rotation during swing. "idle" is
+    quiet standing. "fall" walks until ``fall_at_s``, then has an impact
+    followed by lying still.
+    """
+
+    NOISE_G = 0.02
+    NOISE_DPS = 0.5
+
+    def __init__(self, scenario: str = "gait", num_pressure_sensors: int = 4,
+                 cadence_spm: float = 100, fall_at_s: float = 10.0,
+                 seed: Optional[int] = None):
+        """Initialize the source.
+
+        Args:
+            scenario: "gait", "idle" or "fall"
+            num_pressure_sensors: Pressure points per slipper
+            cadence_spm: Walking cadence in steps per minute (both feet)
+            fall_at_s: Time of the impact in the "fall" scenario
+            seed: Seed of the noise generator
+        """
+        if scenario not in SCENARIOS:
+            raise ValueError(f"Unknown scenario: {scenario}")
+
+        self.scenario = scenario
+        self.num_pressure_sensors = num_pressure_sensors
+        self.stride_s = 120.0 / cadence_spm  # One strike of this foot per two steps
+        self.fall_at_s = fall_at_s if scenario == "fall" else math.inf
+        self.rng = np.random.default_rng(seed)
+
+        # Random phase so that simulated wearers do not walk in lockstep
+        self.phase_offset = self.rng.uniform(0, self.stride_s)
+
+    def impacts(self, start: float, end: float) -> List[float]:
+        """Get the injected fall impacts within [start, end)."""
+        return [self.fall_at_s] if start <= self.fall_at_s < end else []
+
+    def _walking(self, t: np.ndarray) -> np.ndarray:
+        if self.scenario == "idle":
+            return np.zeros(len(t), dtype=bool)
+        return t < self.fall_at_s
+
+    def _phase(self, t: np.ndarray) -> np.ndarray:
+        return ((t + self.phase_offset) % self.stride_s) / self.stride_s
+
+    def samples(self, channel: str, t: np.ndarray) -> np.ndarray:
+        """Generate the samples of a channel at the given times.
+
+        Args:
+            channel: Channel name
+            t: Sample times in seconds since the start of the simulation
+
+        Returns:
+            Values with shape (len(t), width)
+        """
+        walking = self._walking(t)
+        phase = self._phase(t)
+        since_strike = phase * self.stride_s
+        swing = np.clip((phase - 0.6) / 0.4, 0.0, 1.0)
+
+        if channel == "accelerometer":
+            values = self.rng.normal(0.0, self.NOISE_G, (len(t), 3))
+            # Heel strike impulse, push-off and swing
+            strike = 1.4 * np.exp(-0.5 * (since_strike / 0.04) ** 2)
+            strike += 1.4 * np.exp(-0.5 * ((self.stride_s - since_strike) / 0.04) ** 2)
+            values[:, 0] += walking * 0.3 * np.sin(2 * np.pi * phase)
+            values[:, 1] += walking * (strike + 0.3 * np.sin(np.pi * swing))
+            # Impact of a fall, then lying still
+            dt = t - self.fall_at_s
+            values += (5.0 * np.exp(-0.5 * (dt / 0.03) ** 2))[:, None] * np.array([0.6, -0.7, 0.4])
+            return values
+
+        if channel == "gyroscope":
+            values = self.rng.normal(0.0, self.NOISE_DPS, (len(t), 3))
+            values[:, 1] += walking * 200.0 * np.sin(np.pi * swing)
+            values[:, 2] += walking * 20.0 * np.sin(2 * np.pi * phase)
+            return values
+
+        # Pressure rolls from the heel (first sensor) to the toe (last sensor)
+        n = self.num_pressure_sensors
+        centers = 0.1 + 0.4 * np.arange(n) / max(n - 1, 1)
+        stance = np.exp(-0.5 * ((phase[:, None] - centers) / 0.15) ** 2) * 0.9
+        stance *= (phase < 0.7)[:, None]
+        standing = np.full((len(t), n), 0.5)
+        values = np.where(walking[:, None], stance, standing)
+        if self.scenario == "fall":
+            values[t >= self.fall_at_s] = 0.0  # Lying down, no load on the sole
+        return np.clip(values + self.rng.normal(0.0, 0.01, values.shape), 0.0, 1.0)
+
+
+class ReplaySource:
+    """Samples recorded by a RawRecorder, shifted to start at time zero."""
+
+    def __init__(self, record_dir: str, start: Optional[float] = None):
+        """Initialize the source.
+
+        Args:
+            record_dir: Directory of one device's recording
+            start: Recorded time to start from (earliest sample if None)
+        """
+        self.reader = RawReader(record_dir)
+
+        # Extent of the recording over all channels
+        first, last = [], []
+        for channel in CHANNEL_UUIDS:
+            days = self.reader.days(channel)
+            if days:
+                first.append(self.reader.ranges(channel, days[0])[0][0])
+                last.append(self.reader.ranges(channel, days[-1])[-1][1])
+        if not first:
+            raise ValueError(f"No recordings in {record_dir}")
+
+        self.start = min(first) if start is None else start
+        self.duration_s = max(last) - self.start
+
+    def impacts(self, start: float, end: float) -> List[float]:
+        return []
+
+    def read(self, channel: str, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Get recorded samples within [start, end) seconds since the start.
+
+        Returns:
+            Tuple of (times since the start, values)
+        """
+        times, values = self.reader.read(channel, self.start + start, self.start + end)
+        return times - self.start, values
+
+
+class Simulator:
+    """Drive simulated slippers through a FakeBleBackend.
+
+    Samples are quantized and packed exactly like slipper notifications, so
+    they pass through the real SlipperSensor decoding, batching and
+    start_collection(callback) path. The backend clock follows simulated
+    time, so at 10x or maximum speed the pipeline still sees samples at
+    their nominal rate.
+    """
+
+    def __init__(self, backend: FakeBleBackend, slipper_config: Dict,
+                 sources: Dict[str, object], speed: float = 1.0,
+                 frame_interval_ms: float = 20,
+                 throttle: Optional[Callable[[], Awaitable[None]]] = None):
+        """Initialize the simulator.
+
+        Args:
+            backend: Fake backend the slippers are connected through
+            slipper_config: sensors.slipper configuration (rates and ranges)
+            sources: Mapping of device name to a SyntheticSource or ReplaySource
+            speed: Playback speed relative to real time; math.inf for maximum
+            frame_interval_ms: Time covered by one notification per channel
+            throttle: Awaited after every frame interval, e.g. to wait for a
+                full pipeline at maximum speed
+        """
+        self.backend = backend
+        self.sources = sources
+        self.speed = speed
+        self.frame_interval_s = frame_interval_ms / 1000
+        self.throttle = throttle
+
+        self.rates = {
+            channel: slipper_config[channel]["sample_rate_hz"] for channel in CHANNEL_UUIDS
+        }
+        self.raw_scales = {
+            "accelerometer": imu_scale(slipper_config["accelerometer"]["range_g"]),
+            "gyroscope": imu_scale(slipper_config["gyroscope"]["range_dps"]),
+            "pressure": 1.0 / UINT16_FULL_SCALE
+        }
+
+        self.start_time = time.time()
+        self.now = self.start_time
+        self.samples_sent = 0
+        self.frames_dropped = 0
+        self.impacts: Dict[str, List[float]] = {name: [] for name in sources}
+
+        backend.time_source = self.clock
+        for name in sources:
+            backend.add_device(name)
+
+    def clock(self) -> float:
+        """Get the simulated wall-clock time."""
+        return self.now
+
+    def _quantize(self, channel: str, values: np.ndarray) -> np.ndarray:
+        raw = np.rint(values / self.raw_scales[channel])
+        if channel == "pressure":
+            return np.clip(raw, 0, UINT16_FULL_SCALE)
+        return np.clip(raw, -INT16_FULL_SCALE, INT16_FULL_SCALE - 1)
+
+    def _frame(self, name: str, channel: str, start: float, end: float) -> None:
+        """Send the samples of one device and channel within [start, end)."""
+        source = self.sources[name]
+        if isinstance(source, ReplaySource):
+            t, values = source.read(channel, start, end)
+        else:
+            rate = self.rates[channel]
+            t = np.arange(math.ceil(start * rate), math.ceil(end * rate)) / rate
+            values = source.samples(channel, t)
+        if not len(t):
+            return
+
+        # The notification arrives when its last sample was taken
+        self.now = self.start_time + float(t[-1])
+        dtype = PRESSURE_SAMPLE_DTYPE if channel == "pressure" else IMU_SAMPLE_DTYPE
+        payload = encode_frame(int(t[0] * 1e6), self._quantize(channel, values), dtype)
+        if self.backend.notify(name, CHANNEL_UUIDS[channel], payload):
+            self.samples_sent += len(t)
+        else:
+            self.frames_dropped += 1
+
+    async def run(self, duration_s: float) -> None:
+        """Stream all devices for a span of simulated time.
+
+        Args:
+            duration_s: Simulated duration in seconds
+        """
+        wall_start = time.monotonic()
+        intervals = max(1, math.ceil(duration_s / self.frame_interval_s))
+        for i in range(intervals):
+            start = i * self.frame_interval_s
+            end = min(duration_s, start + self.frame_interval_s)
+            for name, source in self.sources.items():
+                for impact in source.impacts(start, end):
+                    self.impacts[name].append(self.start_time + impact)
+                for channel in CHANNEL_UUIDS:
+                    self._frame(name, channel, start, end)
+            self.now = self.start_time + end
+
+            if self.throttle:
+                await self.throttle()
+            if math.isinf(self.speed):
+                await asyncio.sleep(0)
+            else:
+                # Sleep against an absolute schedule so delays do not add up
+                delay = wall_start + end / self.speed - time.monotonic()
+                await asyncio.sleep(max(0.0, delay))
+
+        logger.info(
+            f"Simulated {duration_s:.0f}s of {len(self.sources)} devices in "
+            f"{time.monotonic() - wall_start:.1f}s ({self.samples_sent} samples)"
+        )
+
+
+def synthetic_sources(device_names: Sequence[str], scenario: str,
+                      num_pressure_sensors: int, seed: int = 0, **kwargs) -> Dict[str, SyntheticSource]:
+    """Create one synthetic wearer per device.
+
+    Args:
+        device_names: Simulated device names
+        scenario: "gait", "idle" or "fall"
+        num_pressure_sensors: Pressure points per slipper
+        seed: Base seed; each device gets its own noise
+        **kwargs: Further SyntheticSource arguments
+
+    Returns:
+        Mapping of device name to source
+    """
+    return {
+        name: SyntheticSource(scenario, num_pressure_sensors, seed=seed + i, **kwargs)
+        for i, name in enumerate(device_names)
+    }
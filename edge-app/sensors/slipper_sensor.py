@@ -1,7 +1,20 @@
 import asyncio
 import logging
+import numpy as np
 from typing import Callable, Dict, Optional
-from bleak import BleakClient, BleakScanner
+
+from processing.records import SensorSample
+from sensors.batcher import SampleBatcher
+from sensors.ble_backend import BleakBackend
+from sensors.frames import (
+    IMU_AXES,
+    IMU_SAMPLE_DTYPE,
+    PRESSURE_SAMPLE_DTYPE,
+    UINT16_FULL_SCALE,
+    decode_frame,
+    imu_scale,
+)
+from sensors.link_stats import LinkStats
 
 logger = logging.getLogger("GOSPL.sensor")
 
@@ -13,35 +26,76 @@ class SlipperSensor:
     GYROSCOPE_CHAR_UUID = "00000002-0000-1000-8000-00805f9b34fb"
     PRESSURE_CHAR_UUID = "00000003-0000-1000-8000-00805f9b34fb"
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, backend=None):
         """Initialize the slipper sensor interface.
         
         Args:
             config: Configuration dictionary for the sensor
+            backend: BLE backend (bleak unless a fake is given)
         """
         self.config = config
         self.device_name = config["device_name"]
-        self.client: Optional[BleakClient] = None
+        self.backend = backend or BleakBackend()
+        self.client = None
         self.connected = False
         self.callback = None
+        self.batcher: Optional[SampleBatcher] = None
+        
+        # Link health, and a hook called when the link drops unexpectedly
+        self.link = LinkStats(config.get("connection", {}).get("gap_warning_ms", 500))
+        self.on_disconnect: Optional[Callable] = None
+        self._closing = False
+        
+        # Raw count -> physical unit factors from the configured ranges
+        self.acc_scale = imu_scale(config["accelerometer"]["range_g"])
+        self.gyro_scale = imu_scale(config["gyroscope"]["range_dps"])
+        self.pressure_scale = 1.0 / UINT16_FULL_SCALE
+        self.num_pressure_sensors = config["pressure"]["num_sensors"]
+        
+        # Sample periods used to spread a multi-sample frame over time
+        self.acc_period = 1.0 / config["accelerometer"]["sample_rate_hz"]
+        self.gyro_period = 1.0 / config["gyroscope"]["sample_rate_hz"]
+        self.pressure_period = 1.0 / config["pressure"]["sample_rate_hz"]
         
-    async def connect(self) -> None:
-        """Connect to the smart slipper device."""
+        # Impacts above this magnitude bypass the batching latency and are never dropped
+        batch_config = config.get("batching", {})
+        self.urgent_acc_g = batch_config.get("urgent_acc_g", 3.0)
+        self.set_impact_threshold(self.urgent_acc_g)
+        
+    def set_impact_threshold(self, impact_threshold_g: float) -> None:
+        """Treat every impact the fall detector acts on as urgent.
+        
+        Args:
+            impact_threshold_g: Effective fall detection impact threshold of this slipper;
+                lowers the configured urgent magnitude when below it
+        """
+        urgent_acc_g = min(self.urgent_acc_g, impact_threshold_g)
+        self.urgent_acc_sq = urgent_acc_g * urgent_acc_g
+        
+    async def connect(self, device=None) -> None:
+        """Connect to the smart slipper device.
+        
+        Args:
+            device: Device found by a shared scan; scans for this slipper if None
+        """
         try:
-            # Scan for device
-            logger.info(f"Scanning for device: {self.device_name}")
-            device = await BleakScanner.find_device_by_name(
-                self.device_name, 
-                timeout=self.config["connection_retry_interval_s"]
-            )
-            
+            if device is None:
+                # Scan for device
+                logger.info(f"Scanning for device: {self.device_name}")
+                device = await self.backend.find(
+                    self.device_name, 
+                    timeout=self.config["connection_retry_interval_s"]
+                )
+                
             if not device:
                 raise Exception(f"Device {self.device_name} not found")
                 
             # Connect to device
-            self.client = BleakClient(device)
+            self._closing = False
+            self.client = self.backend.create_client(device, self._handle_disconnect)
             await self.client.connect()
             self.connected = True
+            self.link.connected()
             logger.info(f"Connected to {self.device_name}")
             
             # Enable notifications for all characteristics
@@ -54,11 +108,33 @@ class SlipperSensor:
             
     async def disconnect(self) -> None:
         """Disconnect from the smart slipper device."""
+        self._closing = True
+        if self.batcher:
+            self.batcher.flush_all()
+            
         if self.client and self.connected:
-            await self.client.disconnect()
             self.connected = False
+            self.link.disconnected()
+            await self.client.disconnect()
             logger.info(f"Disconnected from {self.device_name}")
             
+    def _handle_disconnect(self, client) -> None:
+        """Handle a link drop reported by the BLE stack."""
+        if client is not self.client or not self.connected:
+            return
+            
+        self.connected = False
+        self.link.disconnected()
+        
+        # Deliver what was received before the drop
+        if self.batcher:
+            self.batcher.flush_all()
+            
+        if not self._closing:
+            logger.warning(f"Lost connection to {self.device_name}")
+            if self.on_disconnect:
+                self.on_disconnect(self)
+            
     async def _setup_notifications(self) -> None:
         """Set up notifications for sensor characteristics."""
         if not self.client or not self.connected:
@@ -80,60 +156,95 @@ class SlipperSensor:
         
     def _handle_accelerometer_data(self, _: int, data: bytearray) -> None:
         """Handle incoming accelerometer data."""
-        # Convert raw bytes to acceleration values
-        # This implementation would depend on the specific sensor format
-        ax, ay, az = self._parse_accelerometer_data(data)
-        
-        if self.callback:
-            asyncio.create_task(self.callback({
-                "type": "accelerometer",
-                "timestamp": asyncio.get_event_loop().time(),
-                "data": {"ax": ax, "ay": ay, "az": az}
-            }))
+        self.link.notification("accelerometer")
+        try:
+            samples = self._parse_accelerometer_data(data)
+        except ValueError as e:
+            logger.warning(f"Dropped accelerometer frame: {e}")
+            return
+            
+        timestamps = self._sample_timestamps(len(samples), self.acc_period)
+        if self.batcher:
+            # Flush impacts right away so fall detection is not delayed
+            urgent = float(np.max(np.sum(samples * samples, axis=1))) > self.urgent_acc_sq
+            self.batcher.add("accelerometer", timestamps, samples, urgent=urgent)
+        elif self.callback:
+            for timestamp, values in zip(timestamps.tolist(), samples.tolist()):
+                ax, ay, az = values
+                urgent = ax * ax + ay * ay + az * az > self.urgent_acc_sq
+                asyncio.create_task(self.callback(SensorSample("accelerometer", timestamp, values, urgent)))
             
     def _handle_gyroscope_data(self, _: int, data: bytearray) -> None:
         """Handle incoming gyroscope data."""
-        # Convert raw bytes to angular velocity values
-        gx, gy, gz = self._parse_gyroscope_data(data)
-        
-        if self.callback:
-            asyncio.create_task(self.callback({
-                "type": "gyroscope",
-                "timestamp": asyncio.get_event_loop().time(),
-                "data": {"gx": gx, "gy": gy, "gz": gz}
-            }))
+        self.link.notification("gyroscope")
+        try:
+            samples = self._parse_gyroscope_data(data)
+        except ValueError as e:
+            logger.warning(f"Dropped gyroscope frame: {e}")
+            return
+            
+        timestamps = self._sample_timestamps(len(samples), self.gyro_period)
+        if self.batcher:
+            self.batcher.add("gyroscope", timestamps, samples)
+        elif self.callback:
+            for timestamp, values in zip(timestamps.tolist(), samples.tolist()):
+                asyncio.create_task(self.callback(SensorSample("gyroscope", timestamp, values)))
             
     def _handle_pressure_data(self, _: int, data: bytearray) -> None:
         """Handle incoming pressure sensor data."""
-        # Convert raw bytes to pressure values
-        pressures = self._parse_pressure_data(data)
-        
-        if self.callback:
-            asyncio.create_task(self.callback({
-                "type": "pressure",
-                "timestamp": asyncio.get_event_loop().time(),
-                "data": {"pressures": pressures}
-            }))
-            
-    def _parse_accelerometer_data(self, data: bytearray) -> tuple:
-        """Parse raw accelerometer data into x,y,z values."""
-        # Implementation would depend on sensor data format
-        # This is a placeholder implementation
-        return 0.0, 0.0, 0.0
-        
-    def _parse_gyroscope_data(self, data: bytearray) -> tuple:
-        """Parse raw gyroscope data into x,y,z angular velocities."""
-        # Implementation would depend on sensor data format
-        return 0.0, 0.0, 0.0
-        
-    def _parse_pressure_data(self, data: bytearray) -> list:
-        """Parse raw pressure sensor data into pressure values."""
-        # Implementation would depend on sensor data format
-        return [0.0] * self.config["num_sensors"]
+        self.link.notification("pressure")
+        try:
+            samples = self._parse_pressure_data(data)
+        except ValueError as e:
+            logger.warning(f"Dropped pressure frame: {e}")
+            return
+            
+        timestamps = self._sample_timestamps(len(samples), self.pressure_period)
+        if self.batcher:
+            self.batcher.add("pressure", timestamps, samples)
+        elif self.callback:
+            for timestamp, pressures in zip(timestamps.tolist(), samples.tolist()):
+                asyncio.create_task(self.callback(SensorSample("pressure", timestamp, pressures)))
+            
+    def _sample_timestamps(self, count: int, period: float) -> np.ndarray:
+        """Assign timestamps on the backend clock to the samples of one frame.
+        
+        The frame arrives when its last sample was taken, so earlier
+        samples are spaced backwards by the configured sample period.
+        
+        Args:
+            count: Number of samples in the frame
+            period: Sample period in seconds
+            
+        Returns:
+            Array of timestamps, oldest first
+        """
+        offsets = np.arange(count - 1, -1, -1, dtype=np.float64) * period
+        return self.backend.clock() - offsets
+            
+    def _parse_accelerometer_data(self, data: bytearray) -> np.ndarray:
+        """Parse a packed accelerometer frame into (N, 3) values in g."""
+        _, samples = decode_frame(data, IMU_AXES, IMU_SAMPLE_DTYPE, self.acc_scale)
+        return samples
+        
+    def _parse_gyroscope_data(self, data: bytearray) -> np.ndarray:
+        """Parse a packed gyroscope frame into (N, 3) angular velocities in dps."""
+        _, samples = decode_frame(data, IMU_AXES, IMU_SAMPLE_DTYPE, self.gyro_scale)
+        return samples
+        
+    def _parse_pressure_data(self, data: bytearray) -> np.ndarray:
+        """Parse a packed pressure frame into (N, num_sensors) values in 0..1."""
+        _, samples = decode_frame(
+            data, self.num_pressure_sensors, PRESSURE_SAMPLE_DTYPE, self.pressure_scale
+        )
+        return samples
         
     async def start_collection(self, callback: Callable) -> None:
         """Start collecting sensor data.
         
+        The callback receives a SensorSample per sample, or with batching
+        enabled in the config, SampleBlocks holding NumPy arrays.
+        
         Args:
             callback: Async function to call with new sensor data
         """
@@ -141,4 +252,18 @@ class SlipperSensor:
             raise Exception("Not connected to device")
             
         self.callback = callback
+        
+        batch_config = self.config.get("batching", {})
+        if batch_config.get("enabled", False):
+            self.batcher = SampleBatcher(
+                callback,
+                {
+                    "accelerometer": IMU_AXES,
+                    "gyroscope": IMU_AXES,
+                    "pressure": self.num_pressure_sensors
+                },
+                max_samples=batch_config.get("max_samples", 25),
+                max_latency_ms=batch_config.get("max_latency_ms", 100)
+            )
+            
         logger.info("Started sensor data collection") 
\ No newline at end of file
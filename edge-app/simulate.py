@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Run the edge application against simulated or replayed slippers.
+
+Examples:
+    python simulate.py --devices 20 --rate 200 --speed 10 --duration 120
+    python simulate.py --scenario fall --duration 20
+    python simulate.py --replay ./recordings --speed max
+"""
+
+import argparse
+import asyncio
+import copy
+import math
+import tempfile
+import time
+import yaml
+from pathlib import Path
+from typing import Dict, List
+
+from edge_app import GosplEdgeApp
+from sensors.simulator import SCENARIOS, ReplaySource, Simulator, synthetic_sources
+
+
+def parse_speed(value: str) -> float:
+    """Parse a playback speed such as "1", "10x" or "max"."""
+    if value == "max":
+        return math.inf
+    return float(value.rstrip("x"))
+
+
+def replay_sources(record_dir: str) -> Dict[str, ReplaySource]:
+    """Open a recording of one device, or of every device of a gateway."""
+    root = Path(record_dir)
+    if (root / "accelerometer").is_dir():
+        return {"REPLAY_000": ReplaySource(str(root))}
+    return {path.name: ReplaySource(str(path)) for path in sorted(root.iterdir()) if path.is_dir()}
+
+
+def simulation_config(base: Dict, device_names: List[str], rate_hz: float,
+                      data_dir: str) -> Dict:
+    """Derive the app configuration for simulated devices.
+
+    Args:
+        base: Configuration loaded from config.yaml
+        device_names: Simulated device names
+        rate_hz: IMU sample rate, or 0 to keep the configured rate
+        data_dir: Directory for the cache and spool of this run
+
+    Returns:
+        Configuration using the fake BLE backend
+    """
+    config = copy.deepcopy(base)
+    slipper = config["sensors"]["slipper"]
+    slipper.setdefault("connection", {})["backend"] = "fake"
+    slipper["connection_retry_interval_s"] = 0.1
+    if rate_hz:
+        slipper["accelerometer"]["sample_rate_hz"] = rate_hz
+        slipper["gyroscope"]["sample_rate_hz"] = rate_hz
+
+    if len(device_names) > 1:
+        config["devices"] = [{"device_name": name, "user_id": name} for name in device_names]
+    else:
+        config.pop("devices", None)
+        slipper["device_name"] = device_names[0]
+
+    config["data"]["local_cache_dir"] = str(Path(data_dir) / "cache")
+    recording = config["data"].setdefault("raw_recording", {})
+    recording["dir"] = str(Path(data_dir) / "recordings")
+    return config
+
+
+async def simulate(args) -> Dict:
+    """Run one simulation and return its summary."""
+    with open(args.config) as f:
+        base = yaml.safe_load(f)
+
+    if args.replay:
+        sources = replay_sources(args.replay)
+        device_names = list(sources)
+        duration_s = args.duration or max(source.duration_s for source in sources.values())
+    else:
+        device_names = [f"SIM_{i:03d}" for i in range(args.devices)]
+        sources = synthetic_sources(
+            device_names,
+            args.scenario,
+            base["sensors"]["slipper"]["pressure"]["num_sensors"],
+            fall_at_s=args.fall_at,
+            seed=args.seed
+        )
+        duration_s = args.duration or 60
+
+    config = simulation_config(base, device_names, args.rate, args.data_dir or tempfile.mkdtemp())
+    app = GosplEdgeApp(config=config)
+
+    async def wait_for_pipeline() -> None:
+        # At maximum speed, give the pipeline a chance to catch up
+        while any(len(q) > q.maxsize // 2 for q in app.pipeline.queues.values()):
+            await asyncio.sleep(0.001)
+
+    simulator = Simulator(
+        app.ble_backend,
+        config["sensors"]["slipper"],
+        sources,
+        speed=args.speed,
+        throttle=wait_for_pipeline
+    )
+
+    # Note when falls are detected, on the simulated clock
+    detections: Dict[str, List[float]] = {name: [] for name in device_names}
+    submit = app.alert_manager.submit
+
+    def record_alert(alert: Dict) -> None:
+        if alert["type"] == "fall":
+            detections[alert.get("user_id", device_names[0])].append(simulator.clock())
+        submit(alert)
+
+    app.alert_manager.submit = record_alert
+
+    app_task = asyncio.create_task(app.start())
+    while not all(sensor.connected for sensor in app.sensors.values()):
+        await asyncio.sleep(0.01)
+
+    wall_start = time.monotonic()
+    await simulator.run(duration_s)
+    wall_s = time.monotonic() - wall_start
+
+    app.request_stop()
+    await app_task
+
+    latencies = []
+    for name, impacts in simulator.impacts.items():
+        for impact in impacts:
+            detected = [t for t in detections[name] if t >= impact]
+            latencies.append(detected[0] - impact if detected else None)
+
+    return {
+        "devices": len(device_names),
+        "simulated_s": duration_s,
+        "wall_s": round(wall_s, 2),
+        "samples": simulator.samples_sent,
+        "samples_per_s": round(simulator.samples_sent / wall_s, 1) if wall_s else 0.0,
+        "frames_dropped": simulator.frames_dropped,
+        "fall_latency_s": [round(t, 2) if t is not None else None for t in latencies],
+        "falls_detected": sum(len(times) for times in detections.values()),
+        "queues": app.pipeline.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--devices", type=int, default=1, help="Number of simulated slippers")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="gait")
+    parser.add_argument("--rate", type=float, default=0, help="IMU sample rate in Hz (50-1000)")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1, 10x, ... or max")
+    parser.add_argument("--duration", type=float, help="Simulated seconds (default 60, or the whole replay)")
+    parser.add_argument("--fall-at", type=float, default=10.0, help="Impact time of the fall scenario")
+    parser.add_argument("--replay", help="Replay a RawRecorder directory instead of synthetic data")
+    parser.add_argument("--data-dir", help="Cache directory of the run (temporary if omitted)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    summary = asyncio.run(simulate(args))
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
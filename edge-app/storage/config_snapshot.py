@@ -0,0 +1,144 @@
+import hashlib
+import logging
+import os
+import pickle
+from numbers import Real
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("GOSPL.config")
+
+# Bump when validation or the snapshot layout changes, to invalidate old snapshots
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = "gospl"  # Under the user's cache directory
+
+# Settings read without a default, and their types; numbers must be positive
+REQUIRED_SETTINGS = {
+    "supabase": dict,
+    "sensors.slipper.device_name": str,
+    "sensors.slipper.connection_retry_interval_s": Real,
+    "sensors.slipper.accelerometer.sample_rate_hz": Real,
+    "sensors.slipper.accelerometer.range_g": Real,
+    "sensors.slipper.gyroscope.sample_rate_hz": Real,
+    "sensors.slipper.gyroscope.range_dps": Real,
+    "sensors.slipper.pressure.sample_rate_hz": Real,
+    "sensors.slipper.pressure.num_sensors": int,
+    "analysis.window_size_s": Real,
+    "analysis.step_detection.acc_threshold_g": Real,
+    "analysis.step_detection.min_step_interval_ms": Real,
+    "analysis.fall_detection.impact_threshold_g": Real,
+    "analysis.fall_detection.inactivity_time_s": Real,
+    "analysis.anomaly_detection.speed_deviation_threshold": Real,
+    "analysis.anomaly_detection.cadence_variation_threshold": Real,
+    "data.local_cache_dir": str,
+    "data.upload_interval_s": Real,
+    "data.cache_max_size_mb": Real,
+    "logging.level": str,
+    "logging.file": str
+}
+
+
+def validate_config(config: Dict) -> None:
+    """Check that the settings the app reads without defaults are usable.
+
+    Args:
+        config: Parsed configuration
+
+    Raises:
+        ValueError: Listing every missing or invalid setting
+    """
+    problems: List[str] = []
+    for path, expected in REQUIRED_SETTINGS.items():
+        value = config
+        for key in path.split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is None:
+            problems.append(f"{path} is missing")
+        elif not isinstance(value, expected) or isinstance(value, bool):
+            problems.append(f"{path} must be of type {expected.__name__}, not {type(value).__name__}")
+        elif expected in (Real, int) and value <= 0:
+            problems.append(f"{path} must be positive, not {value}")
+
+    if problems:
+        raise ValueError("Invalid configuration: " + "; ".join(problems))
+
+
+def snapshot_path(config_path: str) -> Path:
+    """Get where the snapshot of a config file is stored, in the user's cache directory."""
+    path = Path(config_path).resolve()
+    cache_dir = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+    digest = hashlib.sha256(str(path).encode()).hexdigest()[:16]
+    return cache_dir / SNAPSHOT_DIR / f"{path.name}-{digest}.pickle"
+
+
+def load_config(config_path: str) -> Dict:
+    """Load a YAML config, from its validated snapshot when it is current.
+
+    Parsing YAML (and importing the parser) is slow on a gateway, and the
+    config rarely changes, so the validated result is pickled and reused
+    until the file's modification time or size change.
+
+    Unpickling a file can run arbitrary code, so snapshots are trusted
+    only as far as the user's own files: they live in a private directory
+    of the user's cache, not next to the config, and are ignored unless
+    owned by the user and not writable by others.
+
+    Args:
+        config_path: Path of the YAML file
+
+    Returns:
+        Configuration dictionary
+
+    Raises:
+        ValueError: If the config is invalid
+    """
+    stat = os.stat(config_path)
+    key = (SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size)
+    snapshot = snapshot_path(config_path)
+
+    config = _read_snapshot(snapshot, key)
+    if config is not None:
+        return config
+
+    import yaml  # Only needed when the snapshot is stale
+
+    with open(config_path, "r") as f:
+        config = yaml.safe_load(f)
+    validate_config(config)
+    _write_snapshot(snapshot, key, config)
+    return config
+
+
+def _read_snapshot(snapshot: Path, key: tuple) -> Optional[Dict]:
+    """Get the config from a snapshot if it was taken of the current file."""
+    try:
+        with open(snapshot, "rb") as f:
+            if not _is_private(os.fstat(f.fileno())):
+                logger.warning(f"Ignoring config snapshot {snapshot} that others could have written")
+                return None
+            stored_key, config = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable config snapshot {snapshot}: {e}")
+        return None
+    return config if stored_key == key else None
+
+
+def _is_private(stat: os.stat_result) -> bool:
+    """Whether a file belongs to this user and only this user can change it."""
+    if hasattr(os, "getuid") and stat.st_uid != os.getuid():
+        return False
+    return not stat.st_mode & 0o022
+
+
+def _write_snapshot(snapshot: Path, key: tuple, config: Dict) -> None:
+    """Store a validated config; without a writable cache the app just parses every time."""
+    try:
+        snapshot.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = snapshot.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump((key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snapshot)
+    except OSError as e:
+        logger.debug(f"Could not write config snapshot {snapshot}: {e}")
@@ -0,0 +1,284 @@
+import logging
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("GOSPL.storage")
+
+# Fields of a cached gait metrics record, in on-disk order
+GAIT_RECORD_FIELDS = (
+    "timestamp",
+    "cadence",
+    "step_time_variability",
+    "estimated_stride_length",
+    "gait_speed",
+    "steps_in_window"
+)
+# float64 timestamp, float32 metrics, uint16 step count
+GAIT_RECORD_FORMAT = "<dffffH"
+# Gateways serving several users also store the device's cache ID (see DeviceRegistry)
+DEVICE_RECORD_FIELDS = GAIT_RECORD_FIELDS + ("device",)
+DEVICE_RECORD_FORMAT = GAIT_RECORD_FORMAT + "H"
+
+CRC = struct.Struct("<I")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+CURSOR_FILE = "cursor"
+
+
+class LocalCache:
+    """Durable, size-bounded append-only store for processed records.
+
+    Records are fixed-width binary structs followed by a CRC32, appended to
+    numbered segment files. A cursor file remembers how far records have
+    been acknowledged (e.g. uploaded). Fully acknowledged segments are
+    deleted, and the oldest segments are evicted when the cache exceeds its
+    size limit. On startup, a torn or corrupt tail left by a power loss is
+    truncated.
+    """
+
+    FSYNC_POLICIES = ("always", "interval", "never")
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 100,
+                 segment_size_kb: int = 256, fsync: str = "interval",
+                 fsync_interval_s: float = 5.0,
+                 fields: Sequence[str] = GAIT_RECORD_FIELDS,
+                 record_format: str = GAIT_RECORD_FORMAT):
+        """Initialize the cache, recovering any existing segments.
+
+        Args:
+            cache_dir: Directory holding the segment files
+            max_size_mb: Maximum total size of all segments
+            segment_size_kb: Size at which a new segment is started
+            fsync: One of "always", "interval" or "never"
+            fsync_interval_s: Minimum time between fsyncs for "interval"
+            fields: Record field names, in on-disk order
+            record_format: struct format of one record (without the CRC)
+        """
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {fsync}")
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_size_mb = max_size_mb
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.fsync = fsync
+        self.fsync_interval_s = fsync_interval_s
+
+        self.fields = tuple(fields)
+        self.record = struct.Struct(record_format)
+        self.record_size = self.record.size + CRC.size
+        self.records_per_segment = max(1, segment_size_kb * 1024 // self.record_size)
+
+        self.segments: List[int] = []  # Sequence numbers, oldest first
+        self.total_size = 0
+        self.cursor: Tuple[int, int] = (0, 0)  # (segment, byte offset) acked so far
+
+        self._writer = None
+        self._writer_records = 0
+        self._last_fsync = time.monotonic()
+
+        self._recover()
+
+    def _segment_path(self, seq: int) -> Path:
+        return self.cache_dir / f"{SEGMENT_PREFIX}{seq:010d}{SEGMENT_SUFFIX}"
+
+    def _recover(self) -> None:
+        """Rebuild state from disk, truncating a torn or corrupt tail."""
+        self.segments = sorted(
+            int(p.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for p in self.cache_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+        )
+
+        if self.segments:
+            path = self._segment_path(self.segments[-1])
+            with open(path, "rb") as f:
+                data = f.read()
+            valid = len(data) - len(data) % self.record_size
+            for offset in range(0, valid, self.record_size):
+                if not self._check(data[offset:offset + self.record_size]):
+                    valid = offset
+                    break
+            if valid != len(data):
+                logger.warning(f"Truncating {len(data) - valid} bytes of torn data in {path.name}")
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        self.total_size = sum(self._segment_path(s).stat().st_size for s in self.segments)
+        self.cursor = self._load_cursor()
+        if self.segments:
+            logger.info(f"Recovered local cache with {self.pending_records()} pending records")
+
+    def _check(self, raw: bytes) -> bool:
+        """Verify the CRC of one on-disk record."""
+        body = raw[:self.record.size]
+        return CRC.unpack_from(raw, self.record.size)[0] == zlib.crc32(body)
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        """Load the acknowledged position, clamped to the segments on disk."""
+        first = (self.segments[0], 0) if self.segments else (0, 0)
+        try:
+            seq, offset = (int(v) for v in (self.cache_dir / CURSOR_FILE).read_text().split())
+        except (OSError, ValueError):
+            return first
+        if not self.segments or seq < self.segments[0]:
+            return first
+        return seq, offset
+
+    def _save_cursor(self) -> None:
+        """Atomically persist the acknowledged position."""
+        tmp = self.cache_dir / (CURSOR_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(f"{self.cursor[0]} {self.cursor[1]}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.cache_dir / CURSOR_FILE)
+
+    def append(self, data: Dict) -> None:
+        """Append one record.
+
+        Args:
+            data: Dictionary with a value for every record field
+        """
+        if self._writer is None or self._writer_records >= self.records_per_segment:
+            self._rotate()
+
+        body = self.record.pack(*(data.get(name, 0) for name in self.fields))
+        self._writer.write(body + CRC.pack(zlib.crc32(body)))
+        self._writer_records += 1
+        self.total_size += self.record_size
+
+        if self.fsync == "always":
+            self._sync()
+        elif self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+            self._sync()
+
+        if self.total_size > self.max_size:
+            self._evict()
+
+    def _rotate(self) -> None:
+        """Close the current segment and start a new one."""
+        self._close_writer()
+        seq = self.segments[-1] + 1 if self.segments else 0
+        self.segments.append(seq)
+        self._writer = open(self._segment_path(seq), "ab")
+        self._writer_records = 0
+
+    def _sync(self) -> None:
+        """Flush buffered records to stable storage."""
+        if self._writer is not None:
+            self._writer.flush()
+            if self.fsync != "never":
+                os.fsync(self._writer.fileno())
+        self._last_fsync = time.monotonic()
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._sync()
+            self._writer.close()
+            self._writer = None
+
+    def _evict(self) -> None:
+        """Delete the oldest segments until the cache fits its size limit."""
+        while self.total_size > self.max_size and len(self.segments) > 1:
+            seq = self.segments.pop(0)
+            path = self._segment_path(seq)
+            size = path.stat().st_size
+            path.unlink()
+            self.total_size -= size
+            if self.cursor[0] <= seq:
+                self.cursor = (self.segments[0], 0)
+            logger.warning(f"Local cache over {self.max_size_mb} MB, evicted {path.name}")
+
+    def read(self, max_records: int = 5000) -> Tuple[List[Dict], Optional[Tuple[int, int]]]:
+        """Read unacknowledged records, oldest first.
+
+        Args:
+            max_records: Maximum number of records to return
+
+        Returns:
+            Tuple of (records, position to pass to ack once they are handled)
+        """
+        if self._writer is not None:
+            self._writer.flush()
+
+        records = []
+        seq, offset = self.cursor
+        for segment in self.segments:
+            if segment < seq:
+                continue
+            start = offset if segment == seq else 0
+            count = max_records - len(records)
+            with open(self._segment_path(segment), "rb") as f:
+                f.seek(start)
+                data = f.read(count * self.record_size)
+            usable = len(data) - len(data) % self.record_size
+            for pos in range(0, usable, self.record_size):
+                values = self.record.unpack_from(data, pos)
+                records.append(dict(zip(self.fields, values)))
+            seq, offset = segment, start + usable
+            if len(records) >= max_records:
+                break
+
+        if not records:
+            return [], None
+        return records, (seq, offset)
+
+    def ack(self, position: Optional[Tuple[int, int]]) -> None:
+        """Mark records up to a position returned by read as handled.
+
+        Args:
+            position: Position returned by read
+        """
+        if position is None:
+            return
+        self.cursor = position
+        self._save_cursor()
+
+        # Drop segments that are fully acknowledged and no longer written to
+        while len(self.segments) > 1 and self.segments[0] < self.cursor[0]:
+            seq = self.segments.pop(0)
+            path = self._segment_path(seq)
+            self.total_size -= path.stat().st_size
+            path.unlink()
+
+    def pending_records(self) -> int:
+        """Get the number of unacknowledged records."""
+        if self._writer is not None:
+            self._writer.flush()
+        pending = 0
+        for segment in self.segments:
+            if segment < self.cursor[0]:
+                continue
+            size = self._segment_path(segment).stat().st_size
+            if segment == self.cursor[0]:
+                size -= self.cursor[1]
+            pending += size // self.record_size
+        return pending
+
+    def compact(self) -> None:
+        """Sync buffered records and reclaim fully acknowledged space.
+
+        ack() never deletes the segment being written to. When everything
+        in it has been acknowledged, a fresh segment is started so the old
+        one can go, keeping an idle, fully uploaded cache near zero size.
+        """
+        self._sync()
+        if not self.segments or self.cursor[0] != self.segments[-1]:
+            return
+        seq = self.segments[-1]
+        if self.cursor[1] < self._segment_path(seq).stat().st_size or self.cursor[1] == 0:
+            return
+
+        self._rotate()
+        self.ack((self.segments[-1], 0))
+        logger.debug(f"Compacted local cache, released segment {seq}")
+
+    def close(self) -> None:
+        """Flush and close the active segment."""
+        self._close_writer()
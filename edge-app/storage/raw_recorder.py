@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import numpy as np
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from processing.records import SensorSample
+
+logger = logging.getLogger("GOSPL.storage")
+
+# Value fields of each raw channel, in column order
+CHANNEL_FIELDS = {
+    "accelerometer": ("ax", "ay", "az"),
+    "gyroscope": ("gx", "gy", "gz")
+}
+
+# A new time range starts in the index when samples are further apart than this
+RANGE_GAP_S = 1.0
+# Headroom over the nominal sample count when preallocating a day file
+CAPACITY_HEADROOM = 1.25
+
+
+def record_dtype(width: int) -> np.dtype:
+    """Get the fixed-width on-disk layout of one raw sample.
+
+    Args:
+        width: Number of values per sample
+
+    Returns:
+        Structured dtype with a float64 timestamp and float32 values
+    """
+    return np.dtype([("timestamp", "<f8"), ("values", "<f4", (width,))])
+
+
+def day_of(timestamp: float) -> str:
+    """Get the UTC date a timestamp belongs to, as YYYY-MM-DD."""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+class _DayFile:
+    """Memory-mapped fixed-width sample file for one channel and day."""
+
+    def __init__(self, path: Path, width: int, capacity: int):
+        self.path = path
+        self.index_path = path.with_suffix(".idx")
+        self.width = width
+        self.dtype = record_dtype(width)
+
+        index = {"count": 0, "ranges": []}
+        if self.index_path.exists():
+            index = json.loads(self.index_path.read_text())
+        self.count = index["count"]
+        self.ranges: List[List[float]] = index["ranges"]  # [start, end, first_row]
+
+        # Sparse preallocation; untouched pages take no disk space
+        size = max(capacity, self.count) * self.dtype.itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.capacity = os.path.getsize(path) // self.dtype.itemsize
+        self.map = np.memmap(path, dtype=self.dtype, mode="r+", shape=(self.capacity,))
+
+    def append(self, timestamps: np.ndarray, values: np.ndarray) -> int:
+        """Write as many samples as fit, returning how many were written."""
+        n = min(len(timestamps), self.capacity - self.count)
+        if n <= 0:
+            return 0
+
+        rows = self.map[self.count:self.count + n]
+        rows["timestamp"] = timestamps[:n]
+        rows["values"] = values[:n]
+
+        first, last = float(timestamps[0]), float(timestamps[n - 1])
+        if self.ranges and first - self.ranges[-1][1] <= RANGE_GAP_S:
+            self.ranges[-1][1] = last
+        else:
+            self.ranges.append([first, last, self.count])
+        self.count += n
+        return n
+
+    def flush(self) -> None:
+        """Persist samples and the index."""
+        self.map.flush()
+        tmp = self.index_path.with_suffix(".idx.tmp")
+        tmp.write_text(json.dumps({
+            "width": self.width,
+            "count": self.count,
+            "ranges": self.ranges
+        }))
+        os.replace(tmp, self.index_path)
+
+    def close(self) -> None:
+        self.flush()
+        del self.map
+
+
+class RawRecorder:
+    """Record decoded raw sensor samples into memory-mapped per-day files.
+
+    Each channel gets one fixed-width file per UTC day under
+    ``<record_dir>/<channel>/<YYYY-MM-DD>.bin``, plus a small JSON index
+    with the sample count and the time ranges covered. Files are sparse and
+    preallocated for a full day at the configured sample rate.
+    """
+
+    def __init__(self, record_dir: str, channels: Dict[str, Tuple[int, float]],
+                 flush_interval_s: float = 10.0):
+        """Initialize the recorder.
+
+        Args:
+            record_dir: Root directory for recordings
+            channels: Mapping of channel name to (values per sample, sample rate in Hz)
+            flush_interval_s: How often the index is persisted
+        """
+        self.record_dir = Path(record_dir)
+        self.channels = channels
+        self.flush_interval_s = flush_interval_s
+
+        self.files: Dict[str, _DayFile] = {}
+        self.days: Dict[str, str] = {}
+        self.last_flush = 0.0
+
+    def _day_file(self, channel: str, day: str) -> _DayFile:
+        """Get the open file for a channel and day, rolling over at midnight."""
+        if self.days.get(channel) != day:
+            if channel in self.files:
+                self.files.pop(channel).close()
+            width, rate_hz = self.channels[channel]
+            directory = self.record_dir / channel
+            directory.mkdir(parents=True, exist_ok=True)
+            capacity = int(rate_hz * 86400 * CAPACITY_HEADROOM)
+            self.files[channel] = _DayFile(directory / f"{day}.bin", width, capacity)
+            self.days[channel] = day
+        return self.files[channel]
+
+    def append(self, channel: str, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Record a block of samples from one channel.
+
+        Args:
+            channel: Channel name
+            timestamps: Sample timestamps with shape (N,)
+            values: Sample values with shape (N, width)
+        """
+        if channel not in self.channels or not len(timestamps):
+            return
+
+        start = 0
+        while start < len(timestamps):
+            day = day_of(float(timestamps[start]))
+            end = start + int(np.searchsorted(timestamps[start:], self._day_end(day)))
+            end = max(end, start + 1)
+            day_file = self._day_file(channel, day)
+            written = day_file.append(timestamps[start:end], values[start:end])
+            if written < end - start:
+                logger.warning(f"Raw {channel} file for {day} is full, dropped {end - start - written} samples")
+            start = end
+
+        last = float(timestamps[-1])
+        if last - self.last_flush >= self.flush_interval_s:
+            self.flush()
+            self.last_flush = last
+
+    def append_sample(self, sample: SensorSample) -> None:
+        """Record a single per-sample sensor event.
+
+        Args:
+            sample: Sensor reading of one channel
+        """
+        if sample.type != "pressure" and sample.type not in CHANNEL_FIELDS:
+            return
+        self.append(
+            sample.type, np.array([sample.timestamp]), np.array([sample.values], dtype=np.float32)
+        )
+
+    @staticmethod
+    def _day_end(day: str) -> float:
+        start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return (start + timedelta(days=1)).timestamp()
+
+    def flush(self) -> None:
+        """Persist all open files and indexes."""
+        for day_file in self.files.values():
+            day_file.flush()
+
+    def close(self) -> None:
+        """Flush and close all open files."""
+        for day_file in self.files.values():
+            day_file.close()
+        self.files.clear()
+        self.days.clear()
+
+
+class RawReader:
+    """Read recorded raw samples as zero-copy NumPy views."""
+
+    def __init__(self, record_dir: str):
+        """Initialize the reader.
+
+        Args:
+            record_dir: Root directory of a RawRecorder
+        """
+        self.record_dir = Path(record_dir)
+
+    def days(self, channel: str) -> List[str]:
+        """Get the days with recordings for a channel, oldest first."""
+        return sorted(p.stem for p in (self.record_dir / channel).glob("*.idx"))
+
+    def ranges(self, channel: str, day: str) -> List[Tuple[float, float]]:
+        """Get the contiguous time ranges recorded for a channel on a day."""
+        index = json.loads((self.record_dir / channel / f"{day}.idx").read_text())
+        return [(start, end) for start, end, _ in index["ranges"]]
+
+    def open_day(self, channel: str, day: str) -> np.ndarray:
+        """Map all samples of one channel and day read-only.
+
+        Args:
+            channel: Channel name
+            day: Day as YYYY-MM-DD
+
+        Returns:
+            Structured array view with timestamp and values fields
+        """
+        path = self.record_dir / channel / f"{day}.bin"
+        index = json.loads(path.with_suffix(".idx").read_text())
+        dtype = record_dtype(index["width"])
+        if not index["count"]:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(index["count"],))
+
+    def read(self, channel: str, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the samples of a channel within [start, end).
+
+        Slices within a single day are zero-copy views of the mapped file;
+        slices spanning several days are concatenated.
+
+        Args:
+            channel: Channel name
+            start: Start timestamp (inclusive)
+            end: End timestamp (exclusive)
+
+        Returns:
+            Tuple of (timestamps (N,), values (N, width))
+        """
+        parts = []
+        day = day_of(start)
+        while RawRecorder._day_end(day) - 86400 < end:
+            if (self.record_dir / channel / f"{day}.idx").exists():
+                rows = self.open_day(channel, day)
+                times = rows["timestamp"]
+                lo = int(np.searchsorted(times, start, side="left"))
+                hi = int(np.searchsorted(times, end, side="left"))
+                if hi > lo:
+                    parts.append(rows[lo:hi])
+            day = day_of(RawRecorder._day_end(day))
+
+        if not parts:
+            return np.empty(0, dtype=np.float64), np.empty((0, 0), dtype=np.float32)
+        rows = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return rows["timestamp"], rows["values"]
@@ -0,0 +1,61 @@
+import asyncio
+
+from network.alert_manager import AlertManager
+
+TTL_S = 0.1
+
+
+class RecordingQueue:
+    """Stand-in for the UploadQueue that keeps the queued alerts."""
+
+    def __init__(self):
+        self.alerts = []
+
+    def put_alert(self, alert):
+        self.alerts.append(alert)
+
+
+def warning(timestamp):
+    return {"timestamp": timestamp, "type": "gait_anomaly", "message": "Irregular gait",
+            "severity": "warning", "details": {}, "user_id": "u1"}
+
+
+def test_sustained_warning_episode_is_summarized_every_ttl():
+    queue = RecordingQueue()
+
+    async def scenario():
+        manager = AlertManager(queue, suppression_ttl_s=TTL_S)
+        # One warning every 20 ms for 0.45 s, then quiet
+        for i in range(23):
+            manager.submit(warning(1700000000.0 + i * 0.02))
+            await asyncio.sleep(0.02)
+        during = len(queue.alerts)
+        await asyncio.sleep(3 * TTL_S)
+        assert not manager.episodes
+        return during
+
+    during = asyncio.run(scenario())
+
+    assert during >= 3  # Reported while the episode lasts, at most one TTL apart
+    counts = [alert["details"]["occurrences"] for alert in queue.alerts]
+    assert counts == sorted(set(counts))
+    assert counts[-1] == 23
+    assert all(alert["details"]["first_detected"] == queue.alerts[0]["details"]["first_detected"]
+               for alert in queue.alerts)
+
+
+def test_quiet_episode_is_reported_once():
+    queue = RecordingQueue()
+
+    async def scenario():
+        manager = AlertManager(queue, suppression_ttl_s=TTL_S)
+        for i in range(3):
+            manager.submit(warning(1700000000.0 + i))
+        await asyncio.sleep(4 * TTL_S)
+        assert not manager.episodes
+
+    asyncio.run(scenario())
+
+    (alert,) = queue.alerts
+    assert alert["message"] == "Irregular gait (x3)"
+    assert alert["details"]["duration_s"] == 2.0
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import numpy as np
+
+from sensors import connection_manager
+from sensors.connection_manager import ConnectionManager
+from sensors.fake_ble import FakeBleBackend
+from sensors.frames import IMU_SAMPLE_DTYPE, encode_frame
+from sensors.slipper_sensor import SlipperSensor
+
+RETRY_INTERVAL_S = 0.05
+MAX_RETRY_INTERVAL_S = 0.4
+
+
+def slipper_config(device_name):
+    return {
+        "device_name": device_name,
+        "connection_retry_interval_s": RETRY_INTERVAL_S,
+        "connection": {"gap_warning_ms": 50},
+        "accelerometer": {"sample_rate_hz": 100, "range_g": 16},
+        "gyroscope": {"sample_rate_hz": 100, "range_dps": 2000},
+        "pressure": {"sample_rate_hz": 50, "num_sensors": 4}
+    }
+
+
+def run_manager(names, scenario, available=None):
+    """Run a scenario against a ConnectionManager of slippers on a fake backend."""
+    async def main():
+        backend = FakeBleBackend(names if available is None else available)
+        sensors = {name: SlipperSensor(slipper_config(name), backend) for name in names}
+        manager = ConnectionManager(
+            sensors, backend,
+            retry_interval_s=RETRY_INTERVAL_S, max_retry_interval_s=MAX_RETRY_INTERVAL_S
+        )
+        received = []
+
+        def callback_factory(name):
+            async def callback(data):
+                received.append((name, data))
+            return callback
+
+        await manager.start(callback_factory)
+        try:
+            await scenario(manager, backend, received)
+        finally:
+            await manager.stop()
+
+    asyncio.run(main())
+
+
+async def wait_until(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def connected(manager, name):
+    return manager.links[name].sensor.connected
+
+
+def test_shared_scan_connects_all_and_reconnects_dropped_link():
+    async def scenario(manager, backend, received):
+        await wait_until(lambda: connected(manager, "S1") and connected(manager, "S2"))
+        assert backend.scans == 1  # Both found by one scan
+
+        await asyncio.sleep(0.1)
+        backend.drop_link("S1")
+        assert not connected(manager, "S1")
+        await wait_until(lambda: connected(manager, "S1"))
+
+        stats = manager.stats()
+        assert stats["S1"]["connects"] == 2
+        assert stats["S1"]["disconnects"] == 1
+        assert stats["S1"]["retry_attempts"] == 0
+        assert 0.0 < stats["S1"]["uptime_ratio"] < 1.0
+        assert stats["S2"]["disconnects"] == 0
+
+        # Collection resumes on the new link without registering the callback again
+        assert backend.notify("S1", SlipperSensor.ACCELEROMETER_CHAR_UUID,
+                              encode_frame(0, np.zeros((1, 3)), IMU_SAMPLE_DTYPE))
+        await wait_until(lambda: received)
+        assert received[0][0] == "S1"
+
+    run_manager(["S1", "S2"], scenario)
+
+
+def test_backoff_grows_while_out_of_range_and_resets_on_connect(monkeypatch):
+    monkeypatch.setattr(connection_manager.random, "uniform", lambda low, high: high)
+    delays = []
+    backoff = ConnectionManager._backoff
+
+    def recording_backoff(self, name, reason):
+        backoff(self, name, reason)
+        delays.append(round(self.links[name].retry_at - time.monotonic(), 2))
+
+    monkeypatch.setattr(ConnectionManager, "_backoff", recording_backoff)
+
+    async def scenario(manager, backend, received):
+        await wait_until(lambda: connected(manager, "S1"))
+        backend.remove_device("S1")
+        await wait_until(lambda: len(delays) >= 5, timeout_s=3)
+        assert manager.links["S1"].attempts >= 5
+
+        backend.add_device("S1")
+        await wait_until(lambda: connected(manager, "S1"), timeout_s=3)
+        assert manager.links["S1"].attempts == 0
+
+    run_manager(["S1"], scenario)
+
+    # Doubling from the retry interval, capped at the maximum
+    assert delays[:5] == [0.05, 0.1, 0.2, 0.4, 0.4]
+
+
+def test_scan_failure_backs_off_and_keeps_running():
+    async def scenario(manager, backend, received):
+        scan = backend.scan
+        failures = []
+
+        async def failing_scan(names, timeout):
+            if len(failures) < 2:
+                failures.append(list(names))
+                raise OSError("adapter reset")
+            return await scan(names, timeout)
+
+        # Replaced before the manager's first scan, which runs at the next await
+        backend.scan = failing_scan
+        await wait_until(lambda: len(failures) == 2)
+        assert manager.links["S1"].attempts == 2
+        assert not manager._task.done()
+
+        await wait_until(lambda: connected(manager, "S1"))
+        assert manager.links["S1"].attempts == 0
+
+    run_manager(["S1"], scenario)
+
+
+def test_stats_report_notification_gaps():
+    async def scenario(manager, backend, received):
+        await wait_until(lambda: connected(manager, "S1"))
+        frame = encode_frame(0, np.zeros((1, 3)), IMU_SAMPLE_DTYPE)
+        for pause in (0.01, 0.01, 0.12, 0.01):
+            backend.notify("S1", SlipperSensor.ACCELEROMETER_CHAR_UUID, frame)
+            await asyncio.sleep(pause)
+        backend.notify("S1", SlipperSensor.GYROSCOPE_CHAR_UUID, frame)
+
+        stats = manager.stats()["S1"]
+        assert stats["notifications"] == 5
+        assert stats["long_gaps"] == 1  # Only the 120 ms pause exceeds 50 ms
+        assert 120 <= stats["gap_max_ms"] < 500
+        assert stats["gap_mean_ms"] >= (10 + 10 + 120 + 10) / 4
+        assert stats["channels"]["accelerometer"]["notifications"] == 4
+        assert stats["channels"]["gyroscope"]["notifications"] == 1
+        assert stats["uptime_ratio"] > 0.5
+
+    run_manager(["S1"], scenario)
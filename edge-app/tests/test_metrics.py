@@ -0,0 +1,84 @@
+from network.stats_server import render_prometheus
+from processing.metrics import LatencyHistogram, merge_histograms
+
+BOUNDS_US = (10, 100, 1000)
+
+
+def histogram(*elapsed_us):
+    result = LatencyHistogram(BOUNDS_US)
+    for us in elapsed_us:
+        result.observe(int(us * 1000))
+    return result
+
+
+def test_quantile_is_bucket_bound_capped_by_maximum():
+    assert LatencyHistogram(BOUNDS_US).quantile(0.5) == 0.0
+
+    latencies = histogram(*[5] * 90, *[500] * 10)
+    assert latencies.quantile(0.5) == 10.0
+    assert latencies.quantile(0.9) == 10.0
+    assert latencies.quantile(0.95) == 500.0  # Bucket bound is 1000, but nothing took that long
+    assert latencies.quantile(1.0) == 500.0
+
+    latencies.observe(5_000_000)  # Beyond the last bound
+    assert latencies.quantile(1.0) == 5000.0
+
+
+def test_merge_adds_observations():
+    merged = merge_histograms([
+        {"gait": histogram(5, 50), "anomaly": histogram(20)},
+        {"gait": histogram(500, 2000)}
+    ])
+    gait = merged["gait"]
+    assert gait.buckets == [1, 1, 1, 1]
+    assert (gait.count, gait.samples, gait.sum_ns, gait.max_ns) == (4, 4, 2_555_000, 2_000_000)
+    assert gait.quantile(0.5) == 100.0
+    assert merged["anomaly"].count == 1
+
+
+def link(connected):
+    channel = {"notifications": 10, "rate_hz": 50.0, "gap_mean_ms": 20.0, "gap_max_ms": 40.0}
+    return {"connected": connected, "uptime_ratio": 0.5, "disconnects": 1, "retry_attempts": 0,
+            "channels": {"accelerometer": channel, "pressure": channel}}
+
+
+def collected_metrics():
+    return {
+        "links": {"S1": link(True), 'S"2\\\n': link(False)},
+        "analysis": {"processor": histogram(5), "gait": histogram(50)},
+        "queues": {"frames": {"depth": 1, "high_water": 3, "dropped": 0}},
+        "pending_tasks": 4,
+        "upload": {
+            "request_times": {"alerts": histogram(500), "gait_data": histogram(900)},
+            "bytes_sent": {"alerts": 100, "gait_data": 2000},
+            "retries": 2,
+            "pending_alerts": 0,
+            "unsent_records": 5
+        }
+    }
+
+
+def test_exposition_groups_each_family():
+    lines = render_prometheus(collected_metrics()).splitlines()
+
+    declared = [line.split()[2] for line in lines if line.startswith("# TYPE")]
+    assert len(declared) == len(set(declared))
+    family = None
+    for line in lines:
+        if line.startswith("# TYPE"):
+            family = line.split()[2]
+        elif not line.startswith("#"):
+            # Every sample follows the declaration of its own family
+            assert line.split("{")[0].split()[0] in (
+                family, f"{family}_bucket", f"{family}_sum", f"{family}_count"
+            ), line
+
+    notifications = [line for line in lines if line.startswith("gospl_notifications_total")]
+    assert len(notifications) == 4
+    assert 'gospl_stage_duration_seconds_bucket{stage="gait",le="0.0001"} 1' in lines
+    assert "gospl_upload_retries_total 2" in lines
+
+
+def test_exposition_escapes_label_values():
+    lines = render_prometheus(collected_metrics()).splitlines()
+    assert 'gospl_link_connected{device="S\\"2\\\\\\n"} 0' in lines
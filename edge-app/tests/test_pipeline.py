@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from processing.pipeline import StageQueue
+
+
+async def drain(queue):
+    items = []
+    while len(queue):
+        items.append(await queue.get())
+        queue.task_done()
+    return items
+
+
+def test_drop_oldest_never_drops_protected_items():
+    async def scenario():
+        queue = StageQueue("accelerometer", 3, "drop_oldest")
+        await queue.put("a")
+        await queue.put("impact", protected=True)
+        await queue.put("b")
+        await queue.put("c")  # Drops "a"
+        await queue.put("d")  # Drops "b", skipping the impact
+        assert queue.stats()["dropped"] == 2
+        return await drain(queue)
+
+    assert asyncio.run(scenario()) == ["impact", "c", "d"]
+
+
+def test_only_protected_items_make_others_drop_and_protected_wait():
+    async def scenario():
+        queue = StageQueue("accelerometer", 2, "drop_oldest")
+        await queue.put("impact-1", protected=True)
+        await queue.put("impact-2", protected=True)
+        await queue.put("a")  # No room and nothing to drop but itself
+        assert queue.dropped == 1
+
+        waiting = asyncio.create_task(queue.put("impact-3", protected=True))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+
+        assert await queue.get() == "impact-1"
+        queue.task_done()
+        await asyncio.wait_for(waiting, 1)
+        return [await queue.get(), await queue.get()]
+
+    assert asyncio.run(scenario()) == ["impact-2", "impact-3"]
+
+
+def test_block_policy_waits_and_join_tracks_handled_items():
+    async def scenario():
+        queue = StageQueue("frames", 1, "block")
+        await queue.put(1)
+        waiting = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+
+        joined = asyncio.create_task(queue.join())
+        for expected in (1, 2):
+            assert await queue.get() == expected
+            await asyncio.sleep(0)
+            assert not joined.done()
+            queue.task_done()
+        await asyncio.wait_for(joined, 1)
+        assert queue.dropped == 0
+
+    asyncio.run(scenario())
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        StageQueue("frames", 1, "drop_newest")
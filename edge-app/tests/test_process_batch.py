@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from processing.etl import DataProcessor
+from processing.records import FusedFrame, GyroFeatures, PressureFeatures, SampleBlock
+
+NUM_SAMPLES = 600
+
+CHANNELS = {
+    "accelerometer": (3, FusedFrame.__slots__[:7]),
+    "gyroscope": (3, GyroFeatures.__slots__),
+    "pressure": (4, PressureFeatures.__slots__)
+}
+
+
+# The smallest window, odd and even windows the stream wraps, and one it never fills
+@pytest.mark.parametrize("window_size", [2, 37, 100, NUM_SAMPLES + 100])
+def test_process_batch_matches_process_block(window_size):
+    rng = np.random.default_rng(window_size)
+    timestamps = np.arange(NUM_SAMPLES) * 0.01
+
+    for channel, (width, fields) in CHANNELS.items():
+        values = rng.normal(0.0, 2.0, (NUM_SAMPLES, width)).astype(np.float32)
+        if channel == "pressure":
+            values = np.abs(values) * 1000
+        block = SampleBlock(channel, timestamps, values)
+
+        features = DataProcessor(window_size=window_size).process_block(block)
+        columns = DataProcessor(window_size=window_size).process_batch(block)
+
+        assert features[0] is None
+        assert set(columns) == set(fields)
+        for field in fields:
+            streamed = np.array([getattr(f, field) for f in features[1:]], dtype=np.float64)
+            assert np.array_equal(columns[field], streamed), f"{channel}.{field}"
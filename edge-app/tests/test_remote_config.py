@@ -0,0 +1,73 @@
+import asyncio
+import json
+from pathlib import Path
+
+import yaml
+
+from edge_app import GosplEdgeApp
+from network.remote_config import REMOTE_CONFIG_FILE, RemoteConfig, extract_thresholds
+from simulate import simulation_config
+
+CONFIG_FILE = Path(__file__).parent.parent / "config.yaml"
+
+ANALYSIS_CONFIG = {
+    "step_detection": {"acc_threshold_g": 0.8, "min_step_interval_ms": 250},
+    "fall_detection": {"impact_threshold_g": 3.0, "inactivity_time_s": 5.0},
+    "anomaly_detection": {"speed_deviation_threshold": 0.3}
+}
+
+
+def test_extract_thresholds_takes_values_within_range():
+    remote = {
+        "fall_detection": {"impact_threshold_g": 4.5, "inactivity_time_s": 1.25},
+        "step_detection": {"min_step_interval_ms": 1000},
+        "user_id": "u1"
+    }
+    assert extract_thresholds(remote, ANALYSIS_CONFIG) == {
+        "fall_detection": {"impact_threshold_g": 4.5, "inactivity_time_s": 1.25},
+        "step_detection": {"min_step_interval_ms": 1000}
+    }
+
+
+def test_extract_thresholds_rejects_invalid_and_out_of_range_values():
+    remote = {
+        "fall_detection": {
+            "impact_threshold_g": 300,  # Would never fire
+            "inactivity_time_s": 0.5,  # Below 5.0 / 4
+            "free_fall_g": 0.3  # Unknown
+        },
+        "step_detection": {"acc_threshold_g": True, "min_step_interval_ms": "250"},
+        "anomaly_detection": {"speed_deviation_threshold": -0.3}
+    }
+    assert extract_thresholds(remote, ANALYSIS_CONFIG) == {}
+    assert extract_thresholds({"fall_detection": {"impact_threshold_g": 5.0}}, ANALYSIS_CONFIG,
+                              max_ratio=1.5) == {}
+
+
+def test_cached_thresholds_are_validated_again(tmp_path):
+    (tmp_path / REMOTE_CONFIG_FILE).write_text(json.dumps({
+        "u1": {"etag": "\"v1\"", "thresholds": {"fall_detection": {"impact_threshold_g": 4.0}}},
+        "u2": {"etag": "\"v7\"", "thresholds": {"fall_detection": {"impact_threshold_g": 40.0}}},
+        "u3": {"etag": "\"v2\"", "thresholds": {}}
+    }))
+    config = RemoteConfig(None, str(tmp_path), ["u1", "u2"], ANALYSIS_CONFIG)
+
+    assert config.thresholds() == {"u1": {"fall_detection": {"impact_threshold_g": 4.0}}, "u2": {}}
+    assert config.users["u1"]["etag"] == "\"v1\""
+    assert config.users["u2"]["etag"] is None  # Fetched again in full
+
+
+def test_lowered_impact_threshold_lowers_urgent_magnitude(tmp_path, monkeypatch):
+    base = yaml.safe_load(CONFIG_FILE.read_text())
+    monkeypatch.chdir(tmp_path)
+    app = GosplEdgeApp(config=simulation_config(base, ["S1", "S2"], 0, str(tmp_path)))
+    urgent_acc_g = base["sensors"]["slipper"]["batching"]["urgent_acc_g"]
+
+    # Impacts the lowered detector acts on are protected from drop_oldest
+    asyncio.run(app._apply_thresholds({"S1": {"fall_detection": {"impact_threshold_g": 1.5}}, "S2": {}}))
+    assert app.sensors["S1"].urgent_acc_sq == 1.5 ** 2
+    assert app.sensors["S2"].urgent_acc_sq == urgent_acc_g ** 2
+
+    asyncio.run(app._apply_thresholds({"S1": {}}))
+    assert app.sensors["S1"].urgent_acc_sq == urgent_acc_g ** 2
+    app.cache.close()
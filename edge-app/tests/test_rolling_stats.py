@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from processing.etl import DataProcessor
+from processing.records import SensorSample
+from processing.rolling_stats import RollingStats
+
+# Long enough for float accumulators to drift visibly
+STREAM_LENGTH = 200_000
+CHECK_EVERY = 997
+
+
+def trailing_window(values: np.ndarray, end: int, size: int) -> np.ndarray:
+    return values[max(0, end + 1 - size):end + 1]
+
+
+def test_rolling_stats_do_not_drift():
+    rng = np.random.default_rng(1)
+    # Large offset and a few spikes: the worst case for add-and-subtract sums
+    values = 1000.0 + rng.normal(0.0, 1.0, STREAM_LENGTH)
+    values[::5000] += 500.0
+    stats = RollingStats(100, resolution_bits=20)
+    resolution = 2.0 ** -20
+
+    for i, value in enumerate(values.tolist()):
+        stats.push(value)
+        if i % CHECK_EVERY:
+            continue
+        window = trailing_window(values, i, 100)
+        assert len(stats) == len(window)
+        assert stats.mean() == pytest.approx(np.mean(window), abs=resolution)
+        assert stats.std() == pytest.approx(np.std(window), abs=1e-4)
+        assert stats.min() == np.min(window)
+        assert stats.max() == np.max(window)
+
+
+def test_rolling_stats_clear():
+    stats = RollingStats(4)
+    for value in (5.0, 1.0, 3.0):
+        stats.push(value)
+    stats.clear()
+    assert len(stats) == 0
+    assert (stats.mean(), stats.std(), stats.min(), stats.max()) == (0.0, 0.0, 0.0, 0.0)
+
+    stats.push(2.0)
+    assert (stats.mean(), stats.min(), stats.max()) == (2.0, 2.0, 2.0)
+
+
+def test_process_matches_numpy_over_long_stream():
+    rng = np.random.default_rng(2)
+    values = rng.normal(0.0, 1.0, (STREAM_LENGTH // 4, 3)) + (0.0, 1.0, 0.0)
+    processor = DataProcessor(window_size=100)
+
+    # The window stores float32 samples, so that is what the features describe
+    stored = values.astype(np.float32).astype(np.float64)
+    magnitude = np.sqrt(np.sum(stored * stored, axis=1))
+
+    for i, row in enumerate(values.tolist()):
+        frame = processor.process(SensorSample("accelerometer", i * 0.01, row))
+        if i == 0:
+            assert frame is None
+            continue
+        if i % CHECK_EVERY:
+            continue
+        window = trailing_window(magnitude, i, 100)
+        assert frame.timestamp == i * 0.01
+        assert frame.acc_magnitude == pytest.approx(magnitude[i], rel=1e-12)
+        assert frame.acc_mean == pytest.approx(np.mean(window), abs=2.0 ** -20)
+        assert frame.acc_std == pytest.approx(np.std(window), abs=1e-5)
+        assert frame.acc_min == pytest.approx(np.min(window), rel=1e-12)
+        assert frame.acc_max == pytest.approx(np.max(window), rel=1e-12)
+        assert frame.vertical_acceleration == stored[i, 1]
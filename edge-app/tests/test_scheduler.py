@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from processing import scheduler as scheduler_module
+from processing.scheduler import Scheduler
+
+INTERVAL_S = 0.1
+TOLERANCE_S = 0.03
+
+
+async def wait_until(condition, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.005)
+
+
+def run_overrunning_job(missed, expected_runs):
+    """Run a job whose first run blocks past three slots, until it started expected_runs times."""
+    async def main():
+        loop = asyncio.get_running_loop()
+        starts = []
+
+        async def job():
+            starts.append(loop.time())
+            if len(starts) == 1:
+                await asyncio.sleep(3.5 * INTERVAL_S)
+
+        scheduler = Scheduler()
+        added = scheduler.add_job("overrun", job, INTERVAL_S, jitter=0, missed=missed,
+                                  run_at_start=True)
+        scheduler.start()
+        await wait_until(lambda: len(starts) == expected_runs)
+        await asyncio.sleep(0.01)  # Let the last run finish
+        await scheduler.stop()
+        return [start - starts[0] for start in starts], added.stats()
+
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("missed, expected_offsets, missed_runs", [
+    # The slots at 0.1, 0.2 and 0.3 are dropped; the grid continues at 0.4
+    ("skip", [0.0, 0.4], 3),
+    # One run right away stands in for the three; the grid restarts from it
+    ("coalesce", [0.0, 0.35, 0.45], 2),
+    # Each missed slot runs back to back, then the grid continues at 0.4
+    ("catch_up", [0.0, 0.35, 0.35, 0.35, 0.4], 0)
+])
+def test_missed_run_policies(missed, expected_offsets, missed_runs):
+    offsets, stats = run_overrunning_job(missed, len(expected_offsets))
+
+    assert offsets == pytest.approx(expected_offsets, abs=TOLERANCE_S)
+    assert stats == {"runs": len(expected_offsets), "failures": 0,
+                     "missed_runs": missed_runs, "running": False}
+
+
+def test_jitter_delays_each_run_within_its_fraction_of_the_interval(monkeypatch):
+    draws = []
+    uniform = scheduler_module.random.uniform
+
+    def recording_uniform(low, high):
+        draws.append((low, high))
+        return uniform(low, high)
+
+    monkeypatch.setattr(scheduler_module.random, "uniform", recording_uniform)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        starts = []
+        scheduler = Scheduler()
+        scheduler.add_job("jittered", lambda: starts.append(loop.time()), INTERVAL_S, jitter=0.5)
+        started = loop.time()
+        scheduler.start()
+        await wait_until(lambda: len(starts) == 5)
+        await scheduler.stop()
+        return [start - started for start in starts]
+
+    offsets = asyncio.run(main())
+
+    assert set(draws) == {(0, 0.5 * INTERVAL_S)}
+    # Jitter never accumulates: every run stays within its own slot
+    for slot, offset in enumerate(offsets, start=1):
+        assert slot * INTERVAL_S <= offset + 1e-3
+        assert offset <= (slot + 0.5) * INTERVAL_S + TOLERANCE_S
+
+
+def test_timeout_cancels_the_run_and_counts_a_failure(caplog):
+    cancelled = []
+
+    async def hanging():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        scheduler = Scheduler()
+        job = scheduler.add_job("hanging", hanging, INTERVAL_S, jitter=0, run_at_start=True,
+                                timeout_s=0.05)
+        scheduler.start()
+        await wait_until(lambda: job.failures == 2)
+        await scheduler.stop()
+        return job.stats()
+
+    with caplog.at_level(logging.ERROR, logger="GOSPL.scheduler"):
+        stats = asyncio.run(main())
+
+    assert stats["runs"] == 0
+    assert stats["failures"] == 2
+    assert len(cancelled) >= 2
+    assert "Job hanging timed out after 0.05s" in caplog.messages
+
+
+def test_stop_cancels_running_jobs_and_timers():
+    cancelled = []
+
+    async def blocking():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def main():
+        scheduler = Scheduler()
+        running = scheduler.add_job("blocking", blocking, INTERVAL_S, jitter=0, run_at_start=True)
+        waiting = scheduler.add_job("waiting", lambda: None, 10 * INTERVAL_S, jitter=0)
+        scheduler.start()
+        await wait_until(lambda: running.task is not None)
+        await scheduler.stop()
+
+        assert cancelled == [True]
+        assert running.task is None and running.handle is None
+        assert waiting.handle is None
+        await asyncio.sleep(2 * INTERVAL_S)  # Nothing is armed again
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+
+    assert stats["blocking"] == {"runs": 0, "failures": 0, "missed_runs": 0, "running": False}
+    assert stats["waiting"]["runs"] == 0
@@ -0,0 +1,45 @@
+import argparse
+import asyncio
+import math
+from pathlib import Path
+
+import yaml
+
+import simulate
+
+CONFIG_FILE = Path(__file__).parent.parent / "config.yaml"
+
+
+def run_simulation(tmp_path, scenario, duration_s, fall_at_s=2.0):
+    """Simulate one slipper at maximum speed, logging into tmp_path."""
+    config = yaml.safe_load(CONFIG_FILE.read_text())
+    config["logging"].update(level="WARNING", file=str(tmp_path / "edge_app.log"))
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+
+    args = argparse.Namespace(
+        config=str(config_path), devices=1, scenario=scenario, rate=0,
+        speed=math.inf, duration=duration_s, fall_at=fall_at_s, replay=None,
+        data_dir=str(tmp_path), seed=0
+    )
+    return asyncio.run(simulate.simulate(args)), config
+
+
+def test_fall_is_detected_after_the_inactivity_time(tmp_path):
+    summary, config = run_simulation(tmp_path, "fall", 10.0)
+
+    inactivity_time_s = config["analysis"]["fall_detection"]["inactivity_time_s"]
+    (latency,) = summary["fall_latency_s"]
+    assert latency is not None
+    # Confirmed once the wearer has been still for the inactivity time
+    assert inactivity_time_s <= latency <= inactivity_time_s + 1.0
+    assert summary["falls_detected"] == 1
+    assert summary["frames_dropped"] == 0
+
+
+def test_gait_raises_no_fall(tmp_path):
+    summary, _ = run_simulation(tmp_path, "gait", 10.0)
+
+    assert summary["samples"] > 0
+    assert summary["fall_latency_s"] == []
+    assert summary["falls_detected"] == 0
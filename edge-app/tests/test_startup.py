@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from benchmarks.run import (
+    CONFIG_FILE, IMPORT_BUDGET_MS, LAZY_MODULES, bench_startup, check_startup, python_run
+)
+
+
+def test_import_loads_no_lazy_modules():
+    code = "import sys, edge_app; print(' '.join(m for m in sys.argv[1:] if m in sys.modules))"
+    assert python_run(code, *LAZY_MODULES).stdout.split() == []
+
+
+@pytest.mark.skipif(not os.getenv("GOSPL_TIMING_TESTS"),
+                    reason="wall-clock check; set GOSPL_TIMING_TESTS=1 on a quiet machine")
+def test_import_within_budget():
+    assert check_startup(bench_startup(runs=3), IMPORT_BUDGET_MS) == []
+
+
+def test_config_snapshot_skips_yaml(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(CONFIG_FILE.read_text())
+    code = (
+        "import sys\n"
+        "from storage.config_snapshot import load_config\n"
+        "load_config(sys.argv[1])\n"
+        "print('yaml' in sys.modules)"
+    )
+    # The first load parses the YAML and writes the snapshot, the second reads it
+    assert python_run(code, str(config_path)).stdout.split() == ["True"]
+    assert python_run(code, str(config_path)).stdout.split() == ["False"]
+    (snapshot,) = tmp_path.rglob("*.pickle")
+    assert snapshot.parent == tmp_path / "cache" / "gospl"
+
+    # A snapshot that others could have replaced is never unpickled
+    snapshot.chmod(0o666)
+    assert python_run(code, str(config_path)).stdout.split() == ["True"]
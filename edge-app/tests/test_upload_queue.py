@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+from aiohttp import test_utils, web
+
+from network.supabase_client import SupabaseClient
+from network.upload_queue import UploadQueue
+from storage.local_cache import LocalCache
+
+ALERTS_PATH = "/rest/v1/alerts"
+GAIT_PATH = "/rest/v1/gait_data"
+
+
+class StubSupabase:
+    """Local stand-in for the Supabase REST API that replays scripted responses."""
+
+    def __init__(self, responses):
+        """Initialize the stub.
+
+        Args:
+            responses: Path -> list of (status, headers) returned in order;
+                requests beyond the list are accepted with 201
+        """
+        self.responses = {path: list(script) for path, script in responses.items()}
+        self.requests = []  # (path, monotonic arrival time, status, JSON body)
+
+    async def handle(self, request):
+        body = await request.json()
+        script = self.responses.get(request.path)
+        status, headers = script.pop(0) if script else (201, {})
+        self.requests.append((request.path, time.monotonic(), status, body))
+        return web.Response(status=status, headers=headers)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post(ALERTS_PATH, self.handle)
+        app.router.add_post(GAIT_PATH, self.handle)
+        return app
+
+    def received(self, path):
+        return [(at, status, body) for p, at, status, body in self.requests if p == path]
+
+
+def run_queue(tmp_path, stub, scenario):
+    """Run a scenario against an UploadQueue that sends to the stub."""
+    async def main():
+        server = test_utils.TestServer(stub.app())
+        await server.start_server()
+        client = SupabaseClient(str(server.make_url("/")), "anon-key", "user-1")
+        cache = LocalCache(str(tmp_path / "cache"), fsync="never")
+        queue = UploadQueue(client, cache, str(tmp_path), base_backoff_s=0.05, max_backoff_s=0.5)
+        await queue.start()
+        try:
+            await scenario(queue, cache)
+        finally:
+            await queue.stop()
+            await client.close()
+            cache.close()
+            await server.close()
+
+    asyncio.run(main())
+
+
+async def wait_until(condition, timeout_s=10.0):
+    deadline = time.monotonic() + timeout_s
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def cache_records(cache, queue, count):
+    for i in range(count):
+        cache.append({"timestamp": 1700000000.0 + i, "cadence": 100.0, "steps_in_window": 8})
+    queue.notify_data(count)
+
+
+def alert(timestamp=1700000000.0):
+    return {"timestamp": timestamp, "type": "fall", "message": "Fall detected",
+            "severity": "critical", "details": {}}
+
+
+def drained(queue, cache):
+    return not queue.pending_alerts and cache.pending_records() == 0
+
+
+def test_retries_through_server_errors(tmp_path):
+    stub = StubSupabase({
+        ALERTS_PATH: [(503, {}), (500, {})],
+        GAIT_PATH: [(429, {}), (500, {})]
+    })
+
+    async def scenario(queue, cache):
+        cache_records(cache, queue, 30)
+        queue.put_alert(alert())
+        queue.request_flush()
+        await wait_until(lambda: drained(queue, cache))
+
+        assert queue.spool_path.read_text() == ""
+        assert queue.unsent_records == 0
+        assert queue.retries == 4
+
+    run_queue(tmp_path, stub, scenario)
+
+    alerts = stub.received(ALERTS_PATH)
+    gait = stub.received(GAIT_PATH)
+    assert [status for _, status, _ in alerts] == [503, 500, 201]
+    assert [status for _, status, _ in gait] == [429, 500, 201]
+    assert alerts[-1][2]["user_id"] == "user-1"
+    assert len(gait[-1][2]) == 30
+    # Alerts go first, and every retry waits for its backoff
+    assert gait[0][0] > alerts[-1][0]
+    for (previous, _, _), (retry, _, _) in zip(gait, gait[1:]):
+        assert retry - previous >= 0.025
+
+
+def test_retry_after_holds_both_lanes(tmp_path):
+    stub = StubSupabase({GAIT_PATH: [(429, {"Retry-After": "0.3"})]})
+
+    async def scenario(queue, cache):
+        cache_records(cache, queue, 10)
+        queue.request_flush()
+        await wait_until(lambda: stub.received(GAIT_PATH))
+
+        # A new alert may not jump the server's hold
+        queue.put_alert(alert())
+        await wait_until(lambda: drained(queue, cache))
+        assert queue.spool_path.read_text() == ""
+
+    run_queue(tmp_path, stub, scenario)
+
+    throttled_at = stub.received(GAIT_PATH)[0][0]
+    (alert_at, alert_status, _), = stub.received(ALERTS_PATH)
+    gait_retry_at = stub.received(GAIT_PATH)[1][0]
+    assert alert_status == 201
+    assert alert_at - throttled_at >= 0.3
+    assert gait_retry_at - throttled_at >= 0.3
+
+
+def test_sender_survives_local_errors(tmp_path):
+    stub = StubSupabase({})
+
+    async def scenario(queue, cache):
+        read = cache.read
+        failures = []
+
+        def failing_read(max_records):
+            if not failures:
+                failures.append(True)
+                raise OSError("disk error")
+            return read(max_records)
+
+        cache.read = failing_read
+        cache_records(cache, queue, 5)
+        queue.request_flush()
+        await wait_until(lambda: drained(queue, cache))
+        assert failures
+        assert queue.retries == 2  # Both lanes backed off once
+
+    run_queue(tmp_path, stub, scenario)
+
+    assert len(stub.received(GAIT_PATH)) == 1